@@ -0,0 +1,66 @@
+# analise.py - Analisador de português jurídico para os campos de texto do índice
+#
+# Na indexação: html_strip, tokenizer standard, minúsculas, asciifolding, stopwords de elasticsearch/stopwords_pt.txt
+# e o stemmer light_portuguese. Na busca, o mesmo encadeamento com os sinônimos de siglas jurídicas
+# (elasticsearch/sinonimos_juridicos.txt) antes das stopwords. As listas vão embutidas nas configurações do índice,
+# para não depender de arquivos no diretório de configuração de cada nó. Mudanças exigem `flask reconstruir-indice`.
+
+import os
+import unicodedata
+
+DIRETORIO_ELASTICSEARCH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'elasticsearch')
+STOPWORDS_PATH = os.path.join(DIRETORIO_ELASTICSEARCH, 'stopwords_pt.txt')
+SINONIMOS_PATH = os.path.join(DIRETORIO_ELASTICSEARCH, 'sinonimos_juridicos.txt')
+
+# Termos da lista genérica que têm sentido próprio em decisões ("Tribunal da Relação", "acidente de trabalho", ...).
+STOPWORDS_PRESERVADAS = {'relação', 'trabalho', 'conselho', 'sistema', 'obra'}
+
+ANALISADOR, ANALISADOR_BUSCA = 'juridico_pt', 'juridico_pt_busca'
+# Para o autocompletar: sem stopwords nem stemming, para que qualquer prefixo digitado case.
+ANALISADOR_SUGESTAO = 'sugestao_pt'
+
+def _sem_acentos(texto):
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+
+def _linhas(caminho):
+    with open(caminho, encoding='utf-8-sig') as arquivo:
+        for linha in arquivo:
+            linha = linha.strip()
+            if linha and not linha.startswith('#'):
+                yield linha
+
+def carregar_stopwords(caminho=STOPWORDS_PATH):
+    """Stopwords da lista, com e sem acentos (o filtro roda depois do asciifolding)."""
+    palavras = {p.lower() for p in _linhas(caminho)} - STOPWORDS_PRESERVADAS
+    return sorted(palavras | {_sem_acentos(p) for p in palavras})
+
+def carregar_sinonimos(caminho=SINONIMOS_PATH):
+    return list(_linhas(caminho))
+
+def configuracao_analise():
+    return {
+        "filter": {
+            "stopwords_pt": {"type": "stop", "ignore_case": True, "stopwords": carregar_stopwords()},
+            "stemmer_pt": {"type": "stemmer", "language": "light_portuguese"},
+            "sinonimos_juridicos": {"type": "synonym_graph", "lenient": True, "synonyms": carregar_sinonimos()}
+        },
+        "analyzer": {
+            ANALISADOR: {
+                "type": "custom", "char_filter": ["html_strip"], "tokenizer": "standard",
+                "filter": ["lowercase", "asciifolding", "stopwords_pt", "stemmer_pt"]
+            },
+            ANALISADOR_BUSCA: {
+                "type": "custom", "char_filter": ["html_strip"], "tokenizer": "standard",
+                "filter": ["lowercase", "asciifolding", "sinonimos_juridicos", "stopwords_pt", "stemmer_pt"]
+            },
+            ANALISADOR_SUGESTAO: {"type": "custom", "tokenizer": "standard", "filter": ["lowercase", "asciifolding"]}
+        }
+    }
+
+def campo_texto(**extras):
+    """Mapeamento de um campo de texto livre com o analisador jurídico."""
+    return {"type": "text", "analyzer": ANALISADOR, "search_analyzer": ANALISADOR_BUSCA, **extras}
+
+def campo_sugestao():
+    """Subcampo search_as_you_type (gera os subcampos _2gram, _3gram e _index_prefix) usado pelo autocompletar."""
+    return {"type": "search_as_you_type", "analyzer": ANALISADOR_SUGESTAO}
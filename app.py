@@ -3,71 +3,146 @@
 import os
 import json
 import time
-from flask import Flask, render_template_string, request, redirect, url_for
-from elasticsearch import Elasticsearch
+_inicio_da_carga = time.perf_counter()
+import sys
+import threading
+import itertools
+from contextlib import contextmanager
+import click
+from flask import Flask, render_template, request, redirect, url_for, jsonify, Response, stream_with_context
+from elasticsearch import NotFoundError
 from math import ceil
-from datetime import datetime
 import traceback
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
 
-# Importa os nossos scrapers Python modulares
-from coletores.lexml_scraper import scrape_lexml
-from coletores.bnp_scraper import scrape_bnp
+# Os coletores (selenium, requests, parsers) são importados só no primeiro uso, pelo registro (coletores/registro.py).
+from coletores.registro import registro_coletores, obter_coletor
+from coletores.arquivo_json import ler_registros
+from indexacao import indexar_em_lote, acrescentar_outras_fontes
+from duplicatas import AgrupadorDuplicatas, agrupar_duplicatas
+from datas import normalizar_documentos
+from analise import configuracao_analise, campo_texto, campo_sugestao
+from indices import (configuracoes_producao, criar_versao, finalizar_versao, trocar_alias, indices_do_alias, e_indice_concreto,
+                     identificador_do_indice, documentos_do_indice, reindexar_no_servidor, remover_versoes_antigas)
+from cliente_es import criar_cliente, aguardar_elasticsearch
+from registro_coleta import registro_padrao, chave_consulta
+from tarefas import fila_padrao, encerrar_fila_padrao
+from cache_busca import CacheBusca, chave_busca, chave_facetas
+from facetas import FACETAS, selecao_da_requisicao, chave_selecao, filtros_da_selecao, agregacoes, ler_agregacoes, alternar
+from metricas import (BUSCA_ETAPA_SEGUNDOS, BUSCAS_TOTAL, SUGESTOES_SEGUNDOS, MetricaCalculada, exportar_prometheus, memoria_residente,
+                     gravar_estado, iniciar_gravacao_periodica)
+from resultados import fonte_resultados, destaques, limite_da_contagem, resultado_do_hit, resumo_do_documento, total_dos_hits
+from busca_federada import Fonte, buscar_federado, timeout_da_fonte, FEDERADA_MAX_DOCUMENTOS
+from sugestoes import SUGESTOES_PREFIXO_MINIMO, SUGESTOES_TIMEOUT, normalizar_prefixo, consulta_sugestoes, ler_sugestoes
+from paginacao import (PIT_KEEP_ALIVE, MAX_RESULT_WINDOW, decodificar_cursor, ordenacao_com_desempate, inverter_ordenacao,
+                       cursores_da_pagina, ultima_pagina_numerada)
 
 app = Flask(__name__)
+app.jinja_env.globals['sugestoes_prefixo_minimo'] = SUGESTOES_PREFIXO_MINIMO
+app.jinja_env.globals['coletores_importacao'] = [d for d in registro_coletores().descricoes() if d.rota]
+app.jinja_env.globals['coletores_federados'] = [d for d in registro_coletores().descricoes() if d.federado]
 INDEX_NAME = 'jurisprudencia'
 RESULTS_PER_PAGE = 10
-es = Elasticsearch("http://elasticsearch:9200")
+# URL, pool de conexões, timeout e retries vêm do ambiente (cliente_es.py); no gunicorn cada worker recria o seu (iniciar_worker).
+es = criar_cliente()
+cache_busca = CacheBusca()
+# Imprime o corpo de cada consulta enviada ao Elasticsearch (caro: só para depuração).
+DEBUG_CONSULTAS = os.environ.get('DEBUG_CONSULTAS') == '1'
+PRONTO_TIMEOUT = float(os.environ.get('PRONTO_TIMEOUT', 2))
+# Trava que serializa a criação do índice entre os workers do gunicorn.
+PREPARACAO_TRAVA_PATH = os.environ.get('PREPARACAO_TRAVA_PATH', os.path.join('data', 'preparar_elasticsearch.lock'))
+
+MetricaCalculada(
+    'iurisadv_cache_busca_eventos_total', 'Eventos do cache de busca (acertos, falhas, expirados, invalidados, removidos_lru).',
+    lambda: {(k,): v for k, v in cache_busca.resumo().items() if k in cache_busca.metricas}, tipo='counter', rotulos=('evento',)
+)
+MetricaCalculada('iurisadv_cache_busca_itens', 'Entradas no cache de busca.', lambda: cache_busca.resumo()['itens'])
+MetricaCalculada('iurisadv_coletores_carregados', 'Coletores já importados neste processo.', lambda: len(registro_coletores().carregados()))
 
 # ... (Todo o resto do seu app.py: INDEX_MAPPING, extract_year, create_index_if_not_exists, INTERFACE_TEMPLATE, home, get_pagination_range, import_data_from_json)
 # A única mudança real é DENTRO das rotas de importação, que agora chamam os módulos Python.
 INDEX_MAPPING = {
     "mappings": {
         "properties": {
-            "tipo_documento": {"type": "keyword"},
-            "data_julgamento": {"type": "text"},
+            # A busca filtra por tipo_documento.keyword (como nos índices criados por mapeamento dinâmico).
+            "tipo_documento": {"type": "keyword", "fields": {"keyword": {"type": "keyword"}}},
+            # Data normalizada (ISO); o texto original fica em data_julgamento_texto, só para exibição.
+            "data_julgamento": {"type": "date", "format": "yyyy-MM-dd", "ignore_malformed": True},
+            "data_julgamento_texto": {"type": "keyword", "index": False},
             "ano_julgamento": {"type": "integer"},
             "fonte": {"type": "keyword"},
-            "autoridade": {"type": "text", "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}},
-            "classe": {"type": "keyword"},
-            "titulo": {"type": "text", "fields": {"keyword": {"type": "keyword"}}},
-            "ementa": {"type": "text"},
-            "texto_decisao": {"type": "text"},
+            "autoridade": {"type": "text", "fields": {"keyword": {"type": "keyword", "ignore_above": 256}, "sugestao": campo_sugestao()}},
+            "classe": {"type": "keyword", "fields": {"sugestao": campo_sugestao()}},
+            "titulo": campo_texto(fields={"keyword": {"type": "keyword"}, "sugestao": campo_sugestao()}),
+            "ementa": campo_texto(),
+            # Offsets no índice: os trechos destacados saem sem reanalisar o texto inteiro da decisão.
+            "texto_decisao": campo_texto(index_options="offsets"),
             "link": {"type": "keyword"},
+            # Vínculos para as mesmas decisões vindas de outras fontes (duplicatas.py): só exibidos, não buscados.
+            "outras_fontes": {"type": "object", "enabled": False},
             "id": {"type": "keyword"},
             "orgaoJulgador": {"type": "keyword"},
             "ramoDireito": {"type": "keyword"},
             "numeroUnico": {"type": "keyword"},
-            "assuntos": {"type": "text"}
+            "assuntos": campo_texto(fields={"keyword": {"type": "keyword", "ignore_above": 256}, "sugestao": campo_sugestao()})
         }
     },
-    "settings": {"index": {"number_of_shards": 1, "number_of_replicas": 0}}
+    # Shards e réplicas vêm de ES_SHARDS/ES_REPLICAS (indices.py).
+    "settings": {"index": configuracoes_producao(), "analysis": configuracao_analise()}
 }
 
-def extract_year(date_str):
-    if not date_str or len(date_str.strip()) < 4: return None
-    date_str = date_str.strip()
-    try:
-        year = int(datetime.strptime(date_str.strip()[:10], '%d/%m/%Y').strftime('%Y'))
-        if 1800 < year < 2100: return year
-    except (ValueError, IndexError): pass
-    try:
-        year = int(datetime.strptime(date_str.strip()[:10], '%Y-%m-%d').strftime('%Y'))
-        if 1800 < year < 2100: return year
-    except (ValueError, IndexError): pass
-    print(f"AVISO: Ano não pôde ser extraído da string: '{date_str}'")
-    return None
-
 def create_index_if_not_exists():
+    """Cria a primeira versão física (jurisprudencia_v1) e o alias INDEX_NAME, se nenhum dos dois existir."""
     try:
         if not es.indices.exists(index=INDEX_NAME):
             print(f"Índice '{INDEX_NAME}' não encontrado. Criando com o novo mapeamento...")
-            es.indices.create(index=INDEX_NAME, body=INDEX_MAPPING)
+            indice = criar_versao(es, INDEX_NAME, INDEX_MAPPING)
+            try:
+                finalizar_versao(es, indice)
+            except Exception:
+                # Sem o alias a versão ficaria órfã: a próxima chamada cria outra do zero.
+                es.indices.delete(index=indice)
+                raise
+            trocar_alias(es, INDEX_NAME, indice)
+            cache_busca.invalidar()
             print(f"Índice '{INDEX_NAME}' criado com sucesso.")
         else:
             print(f"Índice '{INDEX_NAME}' já existe.")
     except Exception as e:
         print(f"Erro ao criar índice: {e}")
 
+def reconstruir_indice(no_servidor=False):
+    """
+    Cria a próxima versão física com o INDEX_MAPPING atual, copia os documentos da versão em uso e move o alias.
+    Por padrão a cópia passa pela normalização de datas (scroll + _bulk); `no_servidor` usa o _reindex do Elasticsearch,
+    mais rápido quando o mapeamento novo aceita os documentos como estão. Importações feitas durante a cópia
+    vão para a versão antiga e devem ser repetidas depois da troca: o registro de coleta é por índice físico,
+    então a repetição reenvia os documentos à versão nova em vez de pulá-los como inalterados.
+    """
+    origem = INDEX_NAME if e_indice_concreto(es, INDEX_NAME) else next(iter(indices_do_alias(es, INDEX_NAME)), None)
+    novo = criar_versao(es, INDEX_NAME, INDEX_MAPPING)
+    try:
+        if origem and no_servidor:
+            reindexar_no_servidor(es, origem, novo)
+        elif origem:
+            datas = {}
+            relatorio = indexar_em_lote(es, _documentos_coletados(documentos_do_indice(es, origem), datas), novo, rotulo='reindexação')
+            _registrar_datas(relatorio, datas, 'reindexação')
+            if relatorio['total_erros']:
+                raise RuntimeError(f"{relatorio['total_erros']} documentos falharam na cópia para '{novo}'; o alias não foi trocado.")
+        finalizar_versao(es, novo)
+    except Exception:
+        print(f"Reconstrução abortada; '{INDEX_NAME}' continua apontando para '{origem}'. A versão incompleta '{novo}' foi removida.")
+        es.indices.delete(index=novo)
+        raise
+    trocar_alias(es, INDEX_NAME, novo)
+    cache_busca.invalidar()
+    remover_versoes_antigas(es, INDEX_NAME)
+    return novo
+
 INTERFACE_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="pt-BR">
@@ -106,6 +181,14 @@ INTERFACE_TEMPLATE = """
       .filters-box .year-group { display: flex; gap: 10px; }
       .content-wrapper { display: flex; gap: 2em; align-items: flex-start; }
       .results-column { flex-grow: 1; }
+      .facets-column { flex: 0 0 220px; }
+      .facet-group { background-color: #fff; border: 1px solid #e1e8ed; border-radius: 8px; padding: 1em; margin-bottom: 1em; }
+      .facet-group h4 { margin: 0 0 0.5em 0; color: #2c3e50; }
+      .facet-group ul { list-style: none; margin: 0; padding: 0; max-height: 260px; overflow-y: auto; }
+      .facet-group li { margin: 0.25em 0; font-size: 0.9em; }
+      .facet-group a { text-decoration: none; color: #1b4f72; }
+      .facet-group a.selected { font-weight: bold; }
+      .facet-group .count { color: #888; }
       .result-item { background-color: #fff; border: 1px solid #e1e8ed; border-radius: 8px; margin-bottom: 1.5em; padding: 1.5em; }
       .result-item h3 a { text-decoration: none; color: #1b4f72; font-size: 1.1em;}
       .result-item h3 a:hover { text-decoration: underline; }
@@ -135,7 +218,8 @@ INTERFACE_TEMPLATE = """
             </div>
             <div class="search-container">
                 <div class="search-bar">
-                    <input type="text" name="q" placeholder="Digite sua busca..." value="{{ query }}">
+                    <input type="text" name="q" placeholder="Digite sua busca..." value="{{ query }}" list="sugestoes" autocomplete="off">
+                    <datalist id="sugestoes"></datalist>
                     <button type="submit">Pesquisar</button>
                 </div>
                 <div class="advanced-search-toggle">
@@ -166,11 +250,18 @@ INTERFACE_TEMPLATE = """
                         </div>
                     </div>
                 </div>
+                {% for parametro, valores in (selecao or {}).items() %}{% for valor in valores %}<input type="hidden" name="{{ parametro }}" value="{{ valor }}">{% endfor %}{% endfor %}
                 <button type="submit" style="width: 100%; padding: 12px; border: none; background-color: #27ae60; color: white; border-radius: 4px; font-size: 1em; cursor: pointer; margin-top: 1em;">Aplicar Filtros</button>
             </div>
         </form>
         <div class="content-wrapper">
             <div class="results-column">
+                {% if tarefa %}
+                    <div class="message-box import" id="tarefa-box" data-tarefa="{{ tarefa }}">
+                        <p><strong>Coleta em andamento.</strong> Os resultados aparecerão aqui quando a importação terminar.</p>
+                        <p id="tarefa-status">Aguardando início...</p>
+                    </div>
+                {% endif %}
                 {% if needs_import %}
                     <div class="message-box import">
                         <p><strong>O banco de dados está vazio.</strong></p>
@@ -181,18 +272,19 @@ INTERFACE_TEMPLATE = """
                 {% elif trigger_scrape %}
                     <div class="message-box import">
                          <p><strong>Nenhum resultado encontrado para "{{ query }}".</strong></p>
-                         {% if search_type == 'jurisprudencia' %}
-                            <a href="{{ url_for('importar_lexml', q=query) }}">Buscar e importar Jurisprudência do LexML</a>
-                         {% else %}
-                            <a href="{{ url_for('importar_bnp', q=query) }}">Buscar e importar Precedentes do Pangea BNP</a>
-                         {% endif %}
+                         <p><a href="#" id="federada-iniciar" data-q="{{ query }}" data-type="{{ search_type }}">Buscar agora em {{ coletores_federados|map(attribute='rotulo')|join(', ') }}</a> (os resultados aparecem à medida que cada fonte responde)</p>
+                         <p id="federada-status"></p>
+                         {% for coletor in coletores_importacao if coletor.tipo_documento == search_type %}
+                            <a href="{{ url_for('importar_' + coletor.nome, q=query) }}">{{ coletor.chamada }}</a>
+                         {% endfor %}
                     </div>
-                {% elif total is defined and total is not none and not is_homepage %}
-                     <div class="results-info"><p>Exibindo página {{ current_page }} de {{ total_pages }} ({{ total }} resultados no total).</p></div>
+                {% elif total is defined and not is_homepage and (total is not none or results) %}
+                     <div class="results-info"><p>Exibindo página {{ current_page }}{% if total is not none %} de {{ total_pages }} ({% if total_exato is sameas false %}mais de {% endif %}{{ total }} resultados no total){% else %} (total de resultados não contado){% endif %}.</p></div>
                 {% endif %}
                 {% if is_homepage %}
                     <h2>Documentos Mais Recentes</h2>
                 {% endif %}
+                <div id="federada-resultados"></div>
                 {% for result in results %}
                     <div class="result-item">
                         <h3><a href="{{ result.link }}" target="_blank">{{ result.titulo }}</a></h3>
@@ -202,32 +294,57 @@ INTERFACE_TEMPLATE = """
                                 {% if result.ramoDireito %}<dt>Ramo do Direito:</dt><dd>{{ result.ramoDireito }}</dd>{% endif %}
                                 {% if result.numeroUnico %}<dt>Número Único:</dt><dd>{{ result.numeroUnico }}</dd>{% endif %}
                                 {% if result.assuntos %}<dt>Assuntos:</dt><dd>{{ result.assuntos }}</dd>{% endif %}
-                                {% if result.data_julgamento %}<dt>Data:</dt><dd>{{ result.data_julgamento }}</dd>{% endif %}
+                                {% if result.data_julgamento_texto or result.data_julgamento %}<dt>Data:</dt><dd>{{ result.data_julgamento_texto or result.data_julgamento }}</dd>{% endif %}
                             {% else %}
                                 {% if result.autoridade %}<dt>Autoridade:</dt><dd>{{ result.autoridade }}</dd>{% endif %}
-                                {% if result.data_julgamento %}<dt>Data:</dt><dd>{{ result.data_julgamento }}</dd>{% endif %}
-                                {% if result.ementa %}<dt>Ementa:</dt><dd>{{ result.ementa }}</dd>{% endif %}
+                                {% if result.data_julgamento_texto or result.data_julgamento %}<dt>Data:</dt><dd>{{ result.data_julgamento_texto or result.data_julgamento }}</dd>{% endif %}
+                                {% if result.trechos and result.trechos.ementa %}<dt>Ementa:</dt><dd>{{ result.trechos.ementa|map('safe')|join(' … ') }}</dd>
+                                {% elif result.ementa %}<dt>Ementa:</dt><dd>{{ result.ementa }}</dd>{% endif %}
                             {% endif %}
+                            {% if result.trechos and result.trechos.texto_decisao %}<dt>Trechos:</dt><dd>&hellip; {{ result.trechos.texto_decisao|map('safe')|join(' … ') }} &hellip;</dd>{% endif %}
                             {% if result.fonte %}<dt>Fonte:</dt><dd>{{ result.fonte }}</dd>{% endif %}
+                            {% if result.outras_fontes %}<dt>Também em:</dt><dd>{% for outra in result.outras_fontes %}{% if not loop.first %}, {% endif %}{% if outra.link and outra.link != '#' %}<a href="{{ outra.link }}" target="_blank">{{ outra.fonte or outra.id }}</a>{% else %}{{ outra.fonte or outra.id }}{% endif %}{% endfor %}</dd>{% endif %}
                         </dl>
                     </div>
                 {% endfor %}
                 {% if total_pages and total_pages > 1 %}
                 <div class="pagination">
-                    <a href="{{ url_for('home', q=query, type=search_type, page=1, sort=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters) }}">&laquo;</a>
+                    <a href="{{ url_for('home', q=query, type=search_type, page=1, sort=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters, **selecao) }}">&laquo;</a>
+                    {% if cursor_mode %}
+                        {% if cursor_anterior %}<a href="{{ url_for('home', q=query, type=search_type, cursor=cursor_anterior, sort=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters, **selecao) }}">&lsaquo; Anterior</a>{% endif %}
+                        <span class="current">{{ current_page }}</span>
+                    {% else %}
                     {% for page_num in page_numbers %}
                         {% if page_num == '...' %}
                             <span class="dots">...</span>
                         {% elif page_num == current_page %}
                             <span class="current">{{ page_num }}</span>
                         {% else %}
-                            <a href="{{ url_for('home', q=query, type=search_type, page=page_num, sort=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters) }}">{{ page_num }}</a>
+                            <a href="{{ url_for('home', q=query, type=search_type, page=page_num, sort=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters, **selecao) }}">{{ page_num }}</a>
                         {% endif %}
                     {% endfor %}
-                    <a href="{{ url_for('home', q=query, type=search_type, page=total_pages, sort=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters) }}">&laquo;</a>
+                    {% endif %}
+                    {% if proximo_cursor %}<a href="{{ url_for('home', q=query, type=search_type, cursor=proximo_cursor, sort=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters, **selecao) }}">Próxima &rsaquo;</a>{% endif %}
+                    {% if not cursor_mode %}
+                    <a href="{{ url_for('home', q=query, type=search_type, page=last_page, sort=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters, **selecao) }}">&raquo;</a>
+                    {% endif %}
                 </div>
                 {% endif %}
             </div>
+            {% if facetas %}
+            <div class="facets-column">
+                {% for grupo in facetas %}
+                <div class="facet-group">
+                    <h4>{{ grupo.rotulo }}</h4>
+                    <ul>
+                        {% for opcao in grupo.opcoes %}
+                        <li><a href="{{ opcao.url }}" {% if opcao.selecionado %}class="selected"{% endif %}>{% if opcao.selecionado %}&#10003; {% endif %}{{ opcao.valor }}</a>{% if opcao.contagem is not none %} <span class="count">({{ opcao.contagem }})</span>{% endif %}</li>
+                        {% endfor %}
+                    </ul>
+                </div>
+                {% endfor %}
+            </div>
+            {% endif %}
         </div>
     </div>
     <script>
@@ -235,6 +352,94 @@ INTERFACE_TEMPLATE = """
             const filtersBox = document.getElementById('filters-box');
             filtersBox.classList.toggle('visible');
         }
+        function acompanharTarefa() {
+            const box = document.getElementById('tarefa-box');
+            if (!box) return;
+            const status = document.getElementById('tarefa-status');
+            fetch('/tarefas/' + box.dataset.tarefa).then(r => r.json()).then(tarefa => {
+                const p = tarefa.progresso || {};
+                if (tarefa.estado === 'concluida') {
+                    const url = new URL(window.location.href);
+                    url.searchParams.delete('tarefa');
+                    window.location.replace(url.toString());
+                } else if (tarefa.estado === 'erro') {
+                    box.className = 'message-box error';
+                    status.textContent = 'Erro na coleta: ' + tarefa.erro;
+                } else {
+                    status.textContent = (tarefa.estado === 'pendente' ? 'Na fila...' : 'Etapa: ' + (p.etapa || 'iniciando')) +
+                        (p.coletados !== undefined ? ' | coletados: ' + p.coletados : '') +
+                        (p.indexados !== undefined ? ' | indexados: ' + p.indexados : '');
+                    setTimeout(acompanharTarefa, 2000);
+                }
+            }).catch(() => setTimeout(acompanharTarefa, 5000));
+        }
+        document.addEventListener('DOMContentLoaded', acompanharTarefa);
+        function buscaFederada(evento) {
+            evento.preventDefault();
+            const link = evento.target, status = document.getElementById('federada-status');
+            const lista = document.getElementById('federada-resultados');
+            const fontes = [];
+            status.textContent = 'Consultando as fontes...';
+            const origem = new EventSource('/busca-federada?q=' + encodeURIComponent(link.dataset.q) + '&type=' + link.dataset.type);
+            origem.addEventListener('resultados', function(e) {
+                const dados = JSON.parse(e.data);
+                fontes.push(dados.fonte + ': ' + (dados.estado === 'ok' ? dados.resultados.length : dados.estado));
+                status.textContent = fontes.join(' | ');
+                dados.resultados.forEach(r => {
+                    const item = document.createElement('div');
+                    item.className = 'result-item';
+                    const titulo = document.createElement('a');
+                    titulo.href = r.link || '#';
+                    titulo.target = '_blank';
+                    titulo.textContent = r.titulo || r.id;
+                    const cabecalho = document.createElement('h3');
+                    cabecalho.appendChild(titulo);
+                    item.appendChild(cabecalho);
+                    const detalhes = document.createElement('p');
+                    // Os trechos já vêm escapados pelo servidor (apenas <em> de destaque).
+                    detalhes.innerHTML = ((r.trechos && r.trechos.ementa) || []).join(' … ');
+                    item.appendChild(detalhes);
+                    const fonte = document.createElement('small');
+                    fonte.textContent = r.fonte || dados.fonte;
+                    item.appendChild(fonte);
+                    lista.appendChild(item);
+                });
+            });
+            origem.addEventListener('fim', function() {
+                origem.close();
+                status.textContent = fontes.join(' | ') + ' — novos documentos estão sendo indexados.';
+            });
+            origem.onerror = function() { origem.close(); };
+        }
+        document.addEventListener('DOMContentLoaded', function() {
+            const link = document.getElementById('federada-iniciar');
+            if (link) link.addEventListener('click', buscaFederada);
+        });
+        let temporizadorSugestoes = null, ultimoPrefixo = '';
+        function sugerir() {
+            const campo = document.querySelector('input[name="q"]');
+            const prefixo = campo.value.trim();
+            if (prefixo.length < {{ sugestoes_prefixo_minimo }} || prefixo === ultimoPrefixo) return;
+            ultimoPrefixo = prefixo;
+            const tipo = document.querySelector('input[name="type"]:checked');
+            fetch('/sugestoes?q=' + encodeURIComponent(prefixo) + '&type=' + (tipo ? tipo.value : 'jurisprudencia'))
+                .then(r => r.json()).then(dados => {
+                    if (campo.value.trim() !== prefixo) return;
+                    const lista = document.getElementById('sugestoes');
+                    lista.innerHTML = '';
+                    dados.sugestoes.forEach(s => {
+                        const opcao = document.createElement('option');
+                        opcao.value = s.texto;
+                        lista.appendChild(opcao);
+                    });
+                }).catch(() => {});
+        }
+        document.addEventListener('DOMContentLoaded', function() {
+            document.querySelector('input[name="q"]').addEventListener('input', function() {
+                clearTimeout(temporizadorSugestoes);
+                temporizadorSugestoes = setTimeout(sugerir, 120);
+            });
+        });
         document.addEventListener('DOMContentLoaded', function() {
             const urlParams = new URLSearchParams(window.location.search);
             if (urlParams.get('show_filters') === 'true' || 
@@ -249,66 +454,176 @@ INTERFACE_TEMPLATE = """
 </body>
 </html>
 """
+# Compilado uma vez; render_template aceita o objeto Template e aplica os context processors do Flask.
+TEMPLATE_INTERFACE = app.jinja_env.from_string(INTERFACE_TEMPLATE)
+
+CAMPOS_BUSCA = ["titulo^2", "ementa^1.5", "texto_decisao", "autoridade", "assuntos"]
+
+def consulta_texto(query):
+    return {"multi_match": {"query": query, "fields": CAMPOS_BUSCA, "type": "best_fields", "operator": "or"}}
+
+def parametros_da_busca(args):
+    """Parâmetros de buscar() a partir da query string; usados pela página e por /api/search."""
+    query = args.get('q', '').strip()
+    sort_order = args.get('sort', 'relevance')
+    year_min, year_max = args.get('year_min', ''), args.get('year_max', '')
+    cursor = args.get('cursor')
+    if cursor and decodificar_cursor(cursor) is None: cursor = None
+    selecao = selecao_da_requisicao(args)
+    return {
+        "query": query, "search_type": args.get('type', 'jurisprudencia'), "page": max(args.get('page', 1, type=int), 1),
+        "sort_order": sort_order, "year_min": year_min, "year_max": year_max, "cursor": cursor, "selecao": selecao,
+        "is_homepage": not query and not year_min and not year_max and sort_order == 'relevance' and not cursor and not selecao,
+        "limite_contagem": limite_da_contagem(args.get('track_total_hits'))
+    }
+
+def buscar(query, search_type, page, sort_order, year_min, year_max, is_homepage, cursor=None, selecao=None, limite_contagem=None):
+    """
+    Executa a busca no índice, ou a devolve do cache. Retorna None se o índice ainda não existe.
+    Com `cursor` a página é obtida por search_after num point-in-time, com custo constante em qualquer profundidade.
+    `selecao` ({faceta: valores}) filtra os resultados; as contagens das facetas vêm na mesma consulta e ficam em cache.
+    Cada resultado traz só os campos de CAMPOS_RESULTADO e os trechos destacados (resultados.py); `limite_contagem`
+    é o track_total_hits (None usa BUSCA_TOTAL_EXATO_ATE).
+    """
+    selecao = selecao or {}
+    if limite_contagem is None: limite_contagem = limite_da_contagem(None)
+    dados_cursor = decodificar_cursor(cursor) if cursor else None
+    chave = chave_busca(query, search_type, page, sort_order, year_min, year_max, chave_selecao(selecao), limite_contagem, is_homepage)
+    chave_f = chave_facetas(query, search_type, year_min, year_max, chave_selecao(selecao))
+    geracao = cache_busca.geracao
+    if dados_cursor is None:
+        resultado = cache_busca.obter(chave)
+        if resultado is not None:
+            BUSCAS_TOTAL.incrementar(origem='cache')
+            return resultado
+    if not es.indices.exists(index=INDEX_NAME): return None
+    inicio = time.perf_counter()
+    facetas = None if is_homepage else cache_busca.obter(chave_f)
+    page = min(page, ultima_pagina_numerada(RESULTS_PER_PAGE))
+    from_value = (page - 1) * RESULTS_PER_PAGE
+    filters_for_es = [{"term": {"tipo_documento.keyword": search_type}}]
+    year_range_filter = {}
+    if year_min and year_min.isdigit(): year_range_filter["gte"] = int(year_min)
+    if year_max and year_max.isdigit(): year_range_filter["lte"] = int(year_max)
+    if year_range_filter: filters_for_es.append({"range": {"ano_julgamento": year_range_filter}})
+    sort_query = []
+    if sort_order == 'date_desc': sort_query = [{"ano_julgamento": {"order": "desc", "missing": "_last"}}]
+    elif sort_order == 'date_asc': sort_query = [{"ano_julgamento": {"order": "asc", "missing": "_last"}}]
+    search_body = {
+        "from": from_value, "size": RESULTS_PER_PAGE, "_source": fonte_resultados(), "highlight": destaques(),
+        "track_total_hits": limite_contagem
+    }
+    # Um hit além da página diz se existe a próxima sem depender do total, que vem limitado por track_total_hits (ou
+    # nem vem). Só não cabe na última página numerada, em que from+size passaria de MAX_RESULT_WINDOW.
+    extra = 0 if is_homepage or (dados_cursor is None and from_value + RESULTS_PER_PAGE >= MAX_RESULT_WINDOW) else 1
+    search_body["size"] = RESULTS_PER_PAGE + extra
+    if is_homepage:
+        search_body["query"] = {"bool": {"filter": filters_for_es, "must": {"match_all": {}}}}
+        search_body["sort"] = [{"ano_julgamento": {"order": "desc", "missing": "_last"}}]
+        search_body["size"] = 3
+        search_body["track_total_hits"] = False
+    else:
+        must_clause = {"match_all": {}}
+        if query:
+            must_clause = consulta_texto(query)
+        search_body["query"] = {"bool": {"must": must_clause, "filter": filters_for_es}}
+        search_body["sort"] = ordenacao_com_desempate(sort_query)
+        # A seleção das facetas filtra os hits, mas não as agregações (cada uma aplica as seleções das outras).
+        if selecao: search_body["post_filter"] = {"bool": {"filter": filtros_da_selecao(selecao)}}
+        if facetas is None: search_body["aggs"] = agregacoes(selecao)
+    pit_id, anterior = None, False
+    if dados_cursor is not None:
+        page = dados_cursor.get('pagina', page)
+        del search_body["from"]
+        anterior = dados_cursor.get('direcao') == 'anterior'
+        if anterior: search_body["sort"] = inverter_ordenacao(search_body["sort"])
+        search_body["search_after"] = dados_cursor['valores']
+        pit_id = dados_cursor.get('pit') or es.open_point_in_time(index=INDEX_NAME, keep_alive=PIT_KEEP_ALIVE)['id']
+        search_body["pit"] = {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE}
+    if DEBUG_CONSULTAS: print(f"CONSULTA ELASTICSEARCH:\n{json.dumps(search_body, indent=2, ensure_ascii=False)}\n")
+    BUSCA_ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa='construcao')
+    inicio = time.perf_counter()
+    if dados_cursor is None:
+        res = es.search(index=INDEX_NAME, body=search_body)
+    else:
+        try:
+            res = es.search(body=search_body)
+        except NotFoundError:
+            # O point-in-time expirou: abre outro e continua a partir dos mesmos valores de ordenação.
+            search_body["pit"]["id"] = es.open_point_in_time(index=INDEX_NAME, keep_alive=PIT_KEEP_ALIVE)['id']
+            res = es.search(body=search_body)
+        pit_id = res.get('pit_id', search_body["pit"]["id"])
+    hits = res['hits']['hits']
+    # Voltando (ordenação invertida), o hit a mais é de antes desta página, e a próxima é a página de onde se veio.
+    ha_proxima = True if anterior else (len(hits) > RESULTS_PER_PAGE if extra else None)
+    if not is_homepage: hits = hits[:RESULTS_PER_PAGE]
+    if anterior: hits = hits[::-1]
+    # es_rede é o tempo de ida e volta visto pela aplicação; es_took, o tempo gasto dentro do Elasticsearch.
+    BUSCA_ETAPA_SEGUNDOS.observar(time.perf_counter() - inicio, etapa='es_rede')
+    BUSCA_ETAPA_SEGUNDOS.observar(res.get('took', 0) / 1000, etapa='es_took')
+    BUSCAS_TOTAL.incrementar(origem='elasticsearch')
+    total, total_exato = total_dos_hits(res['hits'])
+    if 'aggregations' in res:
+        facetas = ler_agregacoes(res['aggregations'])
+        cache_busca.guardar(chave_f, facetas, geracao)
+    proximo_cursor, cursor_anterior = (None, None) if is_homepage else cursores_da_pagina(hits, pit_id, page, RESULTS_PER_PAGE, ha_proxima)
+    resultado = {
+        "results": [resultado_do_hit(hit) for hit in hits], "total": total, "total_exato": total_exato, "pagina": page,
+        "proximo_cursor": proximo_cursor, "cursor_anterior": cursor_anterior, "facetas": facetas or {}
+    }
+    if dados_cursor is None: cache_busca.guardar(chave, resultado, geracao)
+    return resultado
 
 @app.route('/', endpoint='home')
 def home():
     try:
-        query = request.args.get('q', '').strip()
-        search_type = request.args.get('type', 'jurisprudencia')
-        page = request.args.get('page', 1, type=int)
-        sort_order = request.args.get('sort', 'relevance')
-        year_min = request.args.get('year_min', '')
-        year_max = request.args.get('year_max', '')
+        parametros = parametros_da_busca(request.args)
+        query, search_type, page, sort_order = parametros["query"], parametros["search_type"], parametros["page"], parametros["sort_order"]
+        year_min, year_max, cursor, selecao = parametros["year_min"], parametros["year_max"], parametros["cursor"], parametros["selecao"]
+        is_homepage = parametros["is_homepage"]
         show_filters = request.args.get('show_filters', 'false')
-        if page < 1: page = 1
-        from_value = (page - 1) * RESULTS_PER_PAGE
-        if not es.indices.exists(index=INDEX_NAME):
-            return render_template_string(
-                INTERFACE_TEMPLATE, needs_import=True, query=query, search_type=search_type,
+        tarefa = request.args.get('tarefa')
+        resultado = buscar(**parametros)
+        if resultado is None:
+            return render_template(
+                TEMPLATE_INTERFACE, needs_import=True, query=query, search_type=search_type,
                 sort_order=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters,
                 results=[], page_numbers=[], current_page=1, total_pages=0, total=0,
-                is_homepage=False, error=None, trigger_scrape=False
+                is_homepage=False, error=None, trigger_scrape=False, tarefa=tarefa, selecao=selecao
+            )
+        results, total, page = resultado["results"], resultado["total"], resultado["pagina"]
+        total_pages = ceil(total / RESULTS_PER_PAGE) if not is_homepage and total is not None else 0
+        if not is_homepage and (cursor or total is None):
+            # Por cursor a página pode estar além do total limitado por track_total_hits (10.000, "gte"), e com
+            # track_total_hits=false não há total: as páginas conhecidas vão até a atual e a próxima, se houver.
+            total_pages = max(total_pages, page + (1 if resultado["proximo_cursor"] else 0))
+        elif page > total_pages and total_pages > 0: page = total_pages
+        # Os links numerados só vão até onde from+size alcança; dali em diante a navegação é por cursor.
+        last_page = min(total_pages, ultima_pagina_numerada(RESULTS_PER_PAGE))
+        page_numbers = get_pagination_range(page, last_page) if not cursor else []
+        sem_resultados = total == 0 if total is not None else not results
+        trigger_scrape = query and sem_resultados and not is_homepage and not tarefa and not selecao
+
+        def url_para(nova_selecao, **alteracoes):
+            parametros = dict(q=query, type=search_type, sort=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters)
+            parametros.update(alteracoes)
+            return url_for('home', **{k: v for k, v in parametros.items() if v not in ('', None)}, **nova_selecao)
+        facetas = _facetas_para_exibicao(resultado["facetas"], selecao, url_para, year_min, year_max)
+        with BUSCA_ETAPA_SEGUNDOS.cronometrar(etapa='renderizacao'):
+            return render_template(
+                TEMPLATE_INTERFACE,
+                query=query, search_type=search_type, results=results, total=total, current_page=page, total_pages=total_pages,
+                sort_order=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters,
+                is_homepage=is_homepage, page_numbers=page_numbers, needs_import=False, error=None,
+                trigger_scrape=trigger_scrape, tarefa=tarefa, cursor_mode=bool(cursor), last_page=last_page,
+                proximo_cursor=resultado["proximo_cursor"], cursor_anterior=resultado["cursor_anterior"],
+                selecao=selecao, facetas=facetas, total_exato=resultado["total_exato"]
             )
-        filters_for_es = [{"term": {"tipo_documento.keyword": search_type}}]
-        year_range_filter = {}
-        if year_min and year_min.isdigit(): year_range_filter["gte"] = int(year_min)
-        if year_max and year_max.isdigit(): year_range_filter["lte"] = int(year_max)
-        if year_range_filter: filters_for_es.append({"range": {"ano_julgamento": year_range_filter}})
-        sort_query = []
-        if sort_order == 'date_desc': sort_query = [{"ano_julgamento": {"order": "desc", "missing": "_last"}}]
-        elif sort_order == 'date_asc': sort_query = [{"ano_julgamento": {"order": "asc", "missing": "_last"}}]
-        is_homepage = not query and not year_min and not year_max and sort_order == 'relevance'
-        search_body = {"from": from_value, "size": RESULTS_PER_PAGE}
-        if is_homepage:
-            search_body["query"] = {"bool": {"filter": filters_for_es, "must": {"match_all": {}}}}
-            search_body["sort"] = [{"ano_julgamento": {"order": "desc", "missing": "_last"}}]
-            search_body["size"] = 3
-        else:
-            must_clause = {"match_all": {}}
-            if query:
-                must_clause = {"multi_match": {"query": query, "fields": ["titulo^2", "ementa^1.5", "texto_decisao", "autoridade", "assuntos"], "type": "best_fields", "operator": "or"}}
-            search_body["query"] = {"bool": {"must": must_clause, "filter": filters_for_es}}
-            if sort_query: search_body["sort"] = sort_query
-        print(f"CONSULTA ELASTICSEARCH:\n{json.dumps(search_body, indent=2, ensure_ascii=False)}\n")
-        res = es.search(index=INDEX_NAME, body=search_body)
-        results = [hit['_source'] for hit in res['hits']['hits']]
-        total = res['hits']['total']['value']
-        total_pages = ceil(total / RESULTS_PER_PAGE) if not is_homepage else 0
-        if page > total_pages and total_pages > 0: page = total_pages
-        page_numbers = get_pagination_range(page, total_pages)
-        trigger_scrape = query and total == 0 and not is_homepage
-        return render_template_string(
-            INTERFACE_TEMPLATE,
-            query=query, search_type=search_type, results=results, total=total, current_page=page, total_pages=total_pages,
-            sort_order=sort_order, year_min=year_min, year_max=year_max, show_filters=show_filters,
-            is_homepage=is_homepage, page_numbers=page_numbers, needs_import=False, error=None,
-            trigger_scrape=trigger_scrape
-        )
     except Exception as e:
         print(f"Erro na rota de busca: {e}")
         traceback.print_exc()
-        return render_template_string(
-            INTERFACE_TEMPLATE, query=request.args.get('q', ''), search_type=request.args.get('type', 'jurisprudencia'), 
+        return render_template(
+            TEMPLATE_INTERFACE, query=request.args.get('q', ''), search_type=request.args.get('type', 'jurisprudencia'), 
             results=[], total=0, current_page=1, total_pages=0, sort_order=request.args.get('sort', 'relevance'),
             year_min=request.args.get('year_min', ''), year_max=request.args.get('year_max', ''),
             show_filters=request.args.get('show_filters', 'false'), is_homepage=False,
@@ -316,6 +631,103 @@ def home():
             trigger_scrape=False
         )
 
+def _json_compacto(corpo, status=200):
+    # Sem indentação nem escapes \uXXXX, mesmo com debug ligado (o jsonify do Flask indenta em modo debug).
+    return Response(json.dumps(corpo, ensure_ascii=False, separators=(',', ':')), status=status, mimetype='application/json')
+
+@app.route('/api/search')
+def api_search():
+    """
+    A mesma busca da página, em JSON: resultados com os campos de CAMPOS_RESULTADO e os trechos destacados,
+    facetas e cursores. Aceita os parâmetros da página e `track_total_hits` (true, false ou um limite).
+    """
+    try:
+        parametros = parametros_da_busca(request.args)
+        # Sem termo nem filtros a API lista o índice paginado, em vez dos três mais recentes da página inicial.
+        parametros["is_homepage"] = False
+        resultado = buscar(**parametros)
+        if resultado is None: return _json_compacto({"erro": "O índice ainda não foi criado."}, 503)
+        return _json_compacto({
+            "q": parametros["query"], "type": parametros["search_type"], "pagina": resultado["pagina"],
+            "por_pagina": RESULTS_PER_PAGE, "total": resultado["total"], "total_exato": resultado["total_exato"],
+            "resultados": resultado["results"], "facetas": resultado["facetas"],
+            "proximo_cursor": resultado["proximo_cursor"], "cursor_anterior": resultado["cursor_anterior"]
+        })
+    except Exception as e:
+        print(f"Erro na API de busca: {e}")
+        traceback.print_exc()
+        return _json_compacto({"erro": str(e)}, 500)
+
+def _indexar_federados(documentos, rotulo):
+    create_index_if_not_exists()
+    relatorio = indexar_coletados(documentos, rotulo=rotulo)
+    print(f"Busca federada: {relatorio['indexados']} documentos de {rotulo} indexados em segundo plano.")
+
+def fontes_federadas(query, search_type):
+    """O índice local e os coletores federados do registro, ao vivo; o que os coletores trazem é indexado em segundo plano."""
+    fontes = [Fonte('indice', lambda: (buscar(query, search_type, 1, 'relevance', '', '', False) or {}).get("results", []),
+                    timeout_da_fonte('indice'), local=True)]
+    for descricao in registro_coletores().descricoes():
+        if not descricao.federado: continue
+        fontes.append(Fonte(
+            descricao.nome, lambda nome=descricao.nome: obter_coletor(nome).buscar(query, max_documentos=FEDERADA_MAX_DOCUMENTOS),
+            timeout_da_fonte(descricao.nome), ao_coletar=lambda documentos, rotulo=descricao.rotulo: _indexar_federados(documentos, rotulo),
+            chave=query.lower()
+        ))
+    return fontes
+
+def _evento_sse(evento, dados):
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+@app.route('/busca-federada')
+def busca_federada():
+    """
+    Busca em todas as fontes ao mesmo tempo, como Server-Sent Events: um evento 'resultados' por fonte, assim que
+    ela responde (ou 'timeout'/'erro'), e 'fim' no final. Documentos já enviados por outra fonte não se repetem.
+    """
+    query = ' '.join(request.args.get('q', '').split())
+    search_type = request.args.get('type', 'jurisprudencia')
+    if not query: return _json_compacto({"erro": "Nenhum termo de busca fornecido."}, 400)
+
+    def eventos():
+        vistos, total = set(), 0
+        for evento in buscar_federado(fontes_federadas(query, search_type)):
+            resultados = []
+            for documento in evento["documentos"]:
+                chave = documento.get('id') or documento.get('link')
+                if chave in vistos: continue
+                vistos.add(chave)
+                resultados.append(documento if 'trechos' in documento else resumo_do_documento(documento))
+            total += len(resultados)
+            dados = {"fonte": evento["fonte"], "estado": evento["estado"], "segundos": evento["segundos"], "resultados": resultados}
+            if "erro" in evento: dados["erro"] = evento["erro"]
+            yield _evento_sse('resultados', dados)
+        yield _evento_sse('fim', {"total": total})
+
+    resposta = Response(stream_with_context(eventos()), mimetype='text/event-stream')
+    resposta.headers['Cache-Control'] = 'no-cache'
+    # Sem buffer em proxies (nginx), para cada evento chegar quando a fonte responde.
+    resposta.headers['X-Accel-Buffering'] = 'no'
+    return resposta
+
+def _facetas_para_exibicao(facetas, selecao, url_para, year_min, year_max):
+    """Grupos de opções para o template: cada opção com a contagem e o link que a seleciona ou desmarca."""
+    grupos = []
+    for parametro, _, rotulo in FACETAS:
+        contagens = dict(facetas.get(parametro, []))
+        # Um valor selecionado fora do top-N continua visível para poder ser desmarcado.
+        valores = list(contagens) + [v for v in selecao.get(parametro, ()) if v not in contagens]
+        opcoes = [{"valor": v, "contagem": contagens.get(v), "selecionado": v in selecao.get(parametro, ()),
+                   "url": url_para(alternar(selecao, parametro, v))} for v in valores]
+        if opcoes: grupos.append({"rotulo": rotulo, "opcoes": opcoes})
+    anos = []
+    for ano, contagem in facetas.get('ano', []):
+        selecionado = year_min == year_max == str(ano)
+        url = url_para(selecao, year_min='', year_max='') if selecionado else url_para(selecao, year_min=ano, year_max=ano)
+        anos.append({"valor": ano, "contagem": contagem, "selecionado": selecionado, "url": url})
+    if anos: grupos.append({"rotulo": "Ano", "opcoes": anos})
+    return grupos
+
 def get_pagination_range(current_page, total_pages, window=2):
     if total_pages is None or total_pages <= 1: return []
     if total_pages <= 7: return list(range(1, total_pages + 1))
@@ -328,91 +740,396 @@ def get_pagination_range(current_page, total_pages, window=2):
     if total_pages not in pages: pages.append(total_pages)
     return pages
 
+def _documentos_do_json(jurisprudencias):
+    for doc in jurisprudencias:
+        doc_id = doc.get("numero_processo")
+        if not doc_id: continue
+        yield {
+            "tipo_documento": "jurisprudencia", "id": doc_id, "titulo": doc.get("classe", "") + " - " + doc.get("assunto", ""),
+            "classe": doc.get("classe"), "assunto": doc.get("assunto"), "magistrado": doc.get("magistrado"), "comarca": doc.get("comarca"),
+            "data_julgamento": doc.get("data_julgamento"), "ementa": doc.get("ementa"),
+            "texto_decisao": doc.get("inteiro_teor"), "fonte": "TJSC (Arquivo JSON)", "link": "#", "autoridade": doc.get("magistrado", "")
+        }
+
+def _documentos_coletados(documentos, datas=None, agrupador=None):
+    """
+    Normaliza data_julgamento/ano_julgamento em lotes; `datas`, se informado, acumula as contagens (inclusive falhas).
+    Com um `agrupador` (duplicatas.AgrupadorDuplicatas), só os canônicos de cada grupo de duplicatas seguem adiante.
+    """
+    documentos = normalizar_documentos(documentos, relatorio=datas)
+    return agrupar_duplicatas(documentos, agrupador) if agrupador is not None else documentos
+
+def _registrar_duplicatas(relatorio, agrupador, rotulo):
+    """Aplica os vínculos tardios do agrupador ao índice e copia as contagens de duplicatas para o relatório."""
+    relatorio['duplicatas'] = agrupador.relatorio['duplicatas_processo'] + agrupador.relatorio['duplicatas_ementa']
+    relatorio['vinculos_tardios'] = acrescentar_outras_fontes(es, INDEX_NAME, agrupador.vinculos_tardios)
+    if relatorio['duplicatas']:
+        print(f"{rotulo}: {relatorio['duplicatas']} duplicatas agrupadas em outras_fontes "
+              f"({agrupador.relatorio['duplicatas_processo']} pelo processo, {agrupador.relatorio['duplicatas_ementa']} pela ementa).")
+
+def _registrar_datas(relatorio, datas, rotulo):
+    relatorio['datas_nao_reconhecidas'] = datas.get('falhas', 0)
+    if relatorio['datas_nao_reconhecidas']:
+        print(f"{rotulo}: {relatorio['datas_nao_reconhecidas']} datas de julgamento não reconhecidas (ano e data ficaram vazios).")
+
+def importar_arquivo_json(filepath, ao_progredir=None):
+    """Indexa um arquivo JSON, NDJSON ou .gz em streaming, sem carregá-lo inteiro na memória."""
+    create_index_if_not_exists()
+    datas, agrupador = {}, AgrupadorDuplicatas()
+    documentos = _documentos_coletados(_documentos_do_json(ler_registros(filepath)), datas, agrupador)
+    relatorio = indexar_em_lote(es, documentos, INDEX_NAME, rotulo='arquivo JSON', ao_progredir=ao_progredir)
+    _registrar_datas(relatorio, datas, 'arquivo JSON')
+    _registrar_duplicatas(relatorio, agrupador, 'arquivo JSON')
+    if relatorio['indexados']: cache_busca.invalidar()
+    print(f"Importados {relatorio['indexados']} documentos do arquivo JSON")
+    return relatorio
+
+def importar_eclis(caminho, origem=None, workers=None, requisicoes_por_segundo=None, limite=None, repetir_erros=True, ao_progredir=None):
+    """
+    Coleta e indexa as decisões de uma lista de ECLIs. Retomável: ECLIs já indexados ou não encontrados
+    (e, com repetir_erros=False, também os que falharam) ficam no checkpoint e são pulados na próxima execução.
+    """
+    from coletores.ecli import ler_eclis, criar_buscador, CheckpointECLI, ColetaECLI
+    create_index_if_not_exists()
+    checkpoint = CheckpointECLI()
+    coleta = ColetaECLI(criar_buscador(origem, workers, requisicoes_por_segundo), checkpoint, workers, ao_progredir)
+    eclis = checkpoint.pendentes(ler_eclis(caminho, coleta.relatorio), repetir_erros)
+    if limite: eclis = itertools.islice(eclis, limite)
+    datas = {}
+    try:
+        indexar_em_lote(
+            es, _documentos_coletados(coleta.documentos(eclis), datas), INDEX_NAME, rotulo='ECLI',
+            ao_progredir=coleta.ao_indexar, ao_confirmar=coleta.ao_confirmar
+        )
+    finally:
+        # Numa interrupção, grava o que já foi confirmado; os ECLIs ainda sem resposta do _bulk são refeitos na próxima execução.
+        relatorio = coleta.finalizar()
+        checkpoint.fechar()
+    _registrar_datas(relatorio, datas, 'ECLI')
+    if relatorio['indexados']: cache_busca.invalidar()
+    return relatorio
+
+def reprocessar_paginas(fontes=None, workers=None, todos=False, ao_progredir=None):
+    """
+    Extrai de novo, com os parsers atuais, as páginas guardadas pelos coletores (coletores/paginas.py) e indexa o
+    resultado, sem acessar as fontes. Só os documentos que mudaram são reenviados, a menos que `todos`.
+    """
+    from coletores.paginas import reprocessar, armazem_padrao
+    create_index_if_not_exists()
+    paginas = {}
+    documentos = reprocessar(armazem_padrao(), fontes, workers, relatorio=paginas)
+    if todos:
+        datas, agrupador = {}, AgrupadorDuplicatas()
+        relatorio = indexar_em_lote(es, _documentos_coletados(documentos, datas, agrupador), INDEX_NAME, rotulo='reprocessamento', ao_progredir=ao_progredir)
+        _registrar_datas(relatorio, datas, 'reprocessamento')
+        _registrar_duplicatas(relatorio, agrupador, 'reprocessamento')
+        if relatorio['indexados']: cache_busca.invalidar()
+    else:
+        relatorio = indexar_coletados(documentos, rotulo='reprocessamento', ao_progredir=ao_progredir)
+    relatorio.update(paginas=paginas['paginas'], documentos_extraidos=paginas['documentos'], falhas_extracao=paginas['falhas'])
+    return relatorio
+
+def indexar_coletados(documentos, rotulo, ao_progredir=None, forcar=False):
+    """
+    Indexa apenas os documentos novos ou alterados segundo o registro de coleta do índice físico atual; os inalterados
+    não geram escrita. `forcar` reenvia todos.
+    """
+    sessao = registro_padrao().sessao(identificador_do_indice(es, INDEX_NAME), forcar)
+    datas, agrupador = {}, AgrupadorDuplicatas()
+    documentos = sessao.filtrar_alterados(_documentos_coletados(documentos, datas, agrupador))
+    relatorio = indexar_em_lote(es, documentos, INDEX_NAME, rotulo=rotulo, ao_progredir=ao_progredir)
+    _registrar_datas(relatorio, datas, rotulo)
+    _registrar_duplicatas(relatorio, agrupador, rotulo)
+    sessao.confirmar(relatorio['ids_com_erro'])
+    if relatorio['indexados']: cache_busca.invalidar()
+    relatorio['inalterados'] = len(sessao.inalterados)
+    print(f"{rotulo}: {relatorio['inalterados']} documentos inalterados desde a última coleta foram ignorados.")
+    return relatorio
+
+def _resumo_da_indexacao(relatorio):
+    return {
+        "etapa": "concluida", "indexados": relatorio['indexados'], "erros": relatorio['total_erros'],
+        "primeiros_erros": relatorio['erros'][:10], "inalterados": relatorio.get('inalterados', 0),
+        "datas_nao_reconhecidas": relatorio.get('datas_nao_reconhecidas', 0), "duplicatas": relatorio.get('duplicatas', 0),
+        "docs_por_segundo": round(relatorio['docs_por_segundo'], 1)
+    }
+
+def _progresso_da_indexacao(atualizar):
+    return lambda relatorio: atualizar(etapa='indexando', indexados=relatorio['indexados'], erros=relatorio['total_erros'])
+
+def tarefa_importar_json(parametros, atualizar):
+    atualizar(etapa='indexando', indexados=0)
+    relatorio = importar_arquivo_json(parametros['arquivo'], ao_progredir=_progresso_da_indexacao(atualizar))
+    return _resumo_da_indexacao(relatorio)
+
+def tarefa_importar_coletor(nome):
+    """Tarefa 'importar-<nome>' de um coletor do registro: coleta os termos e indexa o que mudou."""
+    def tarefa(parametros, atualizar):
+        descricao, coletor = registro_coletores().descricao(nome), obter_coletor(nome)
+        # Tarefas enfileiradas antes do registro de coletores guardavam um único termo em 'q'.
+        termos = parametros.get('termos') or [parametros['q']]
+        opcoes = {chave: parametros.get(chave) for chave, tipo in descricao.parametros if tipo is not bool}
+        forcar = bool(parametros.get('forcar'))
+        create_index_if_not_exists()
+        indice = identificador_do_indice(es, INDEX_NAME)
+        if descricao.incremental:
+            # Cada termo tem a sua marca: a recoleta de um termo parte do último ano já coletado para ele, e a marca
+            # só avança para os termos cuja coleta percorreu todos os resultados da janela de anos.
+            documentos, marcas = [], []
+            for termo in termos:
+                consulta = chave_consulta(nome, termo)
+                marca = registro_padrao().marca(consulta, indice)
+                opcoes_termo = dict(opcoes)
+                if opcoes.get('ano_inicial') is None and marca and not (parametros.get('completo') or forcar):
+                    opcoes_termo['ano_inicial'] = int(marca)
+                atualizar(etapa='coletando', termo=termo, ano_inicial=opcoes_termo.get('ano_inicial'))
+                coleta = {}
+                documentos_termo = coletor.coletar([termo], relatorio=coleta, **opcoes_termo)
+                anos = [doc['ano_julgamento'] for doc in documentos_termo if doc.get('ano_julgamento')]
+                if coleta.get('completo') and anos and max(anos) > int(marca or 0):
+                    marcas.append((consulta, max(anos)))
+                documentos.extend(documentos_termo)
+        else:
+            atualizar(etapa='coletando')
+            documentos, marcas = coletor.coletar(termos, relatorio={}, **opcoes), []
+        atualizar(etapa='indexando', coletados=len(documentos))
+        relatorio = indexar_coletados(documentos, rotulo=descricao.rotulo, ao_progredir=_progresso_da_indexacao(atualizar), forcar=forcar)
+        for consulta, marca in marcas:
+            registro_padrao().atualizar_marca(consulta, marca, indice)
+        print(f"Total de documentos indexados do {descricao.rotulo}: {relatorio['indexados']}")
+        return _resumo_da_indexacao(relatorio)
+    return tarefa
+
+def fila_de_tarefas():
+    fila = fila_padrao()
+    if not fila.handlers:
+        fila.registrar('importar-json', tarefa_importar_json)
+        for descricao in registro_coletores().descricoes():
+            if descricao.rota: fila.registrar(f'importar-{descricao.nome}', tarefa_importar_coletor(descricao.nome))
+    fila.iniciar()
+    return fila
+
+def _resposta_da_tarefa(tarefa_id, **parametros_home):
+    """Clientes JSON recebem 202 com o id da tarefa; o navegador volta para a busca, que acompanha a tarefa."""
+    if request.args.get('formato') == 'json' or request.accept_mimetypes.best == 'application/json':
+        return jsonify({"tarefa": tarefa_id, "status": url_for('status_tarefa', tarefa_id=tarefa_id)}), 202
+    return redirect(url_for('home', tarefa=tarefa_id, **parametros_home))
+
+@app.route('/sugestoes')
+def sugestoes():
+    """Autocompletar: títulos, classes, assuntos e autoridades que começam com `q`, em JSON."""
+    prefixo = normalizar_prefixo(request.args.get('q'))
+    search_type = request.args.get('type', 'jurisprudencia')
+    if len(prefixo) < SUGESTOES_PREFIXO_MINIMO: return jsonify(q=prefixo, sugestoes=[])
+    inicio = time.perf_counter()
+    chave = ('sugestoes', prefixo, search_type)
+    resultado = cache_busca.obter(chave)
+    origem = 'cache'
+    if resultado is None:
+        origem = 'elasticsearch'
+        geracao = cache_busca.geracao
+        try:
+            res = es.options(request_timeout=SUGESTOES_TIMEOUT).search(
+                index=INDEX_NAME, body=consulta_sugestoes(prefixo, search_type), request_cache=True
+            )
+            resultado = ler_sugestoes(res, prefixo)
+            cache_busca.guardar(chave, resultado, geracao)
+        except Exception as e:
+            print(f"Erro no autocompletar ('{prefixo}'): {e}")
+            resultado = []
+    SUGESTOES_SEGUNDOS.observar(time.perf_counter() - inicio, origem=origem)
+    resposta = jsonify(q=prefixo, sugestoes=resultado)
+    resposta.headers['Cache-Control'] = 'private, max-age=60'
+    return resposta
+
+@app.route('/metricas/cache')
+def metricas_cache():
+    return jsonify(cache_busca.resumo())
+
+@app.route('/saude')
+def saude():
+    """Liveness: o processo está atendendo (não consulta o Elasticsearch)."""
+    return _json_compacto({"status": "ok"})
+
+@app.route('/pronto')
+def pronto():
+    """Readiness: 200 só quando o Elasticsearch responde e o índice (alias) de busca existe; 503 caso contrário."""
+    try:
+        cliente = es.options(request_timeout=PRONTO_TIMEOUT, max_retries=0)
+        if not cliente.indices.exists(index=INDEX_NAME): return _json_compacto({"status": "sem_indice", "indice": INDEX_NAME}, 503)
+        return _json_compacto({"status": "pronto", "indice": INDEX_NAME})
+    except Exception as e:
+        return _json_compacto({"status": "elasticsearch_indisponivel", "erro": str(e)}, 503)
+
+@app.route('/metrics')
+def metrics():
+    """Métricas no formato de exposição do Prometheus: deste processo ou, com METRICAS_DIR, somadas entre os workers."""
+    return Response(exportar_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/tarefas/<tarefa_id>')
+def status_tarefa(tarefa_id):
+    status = fila_de_tarefas().status(tarefa_id)
+    if status is None: return jsonify({"erro": "Tarefa não encontrada."}), 404
+    return jsonify(status)
+
 @app.route('/import-json')
 def import_data_from_json():
     try:
-        create_index_if_not_exists()
         filepath = os.path.join('data', 'jurisprudencias.json')
         if not os.path.exists(filepath): return "Arquivo jurisprudencias.json não encontrado no diretório data/", 404
-        with open(filepath, 'r', encoding='utf-8') as f:
-            jurisprudencias = json.load(f)
-        count = 0
-        for doc in jurisprudencias:
-            doc_id = doc.get("numero_processo")
-            if not doc_id: continue
-            original_date = doc.get("data_julgamento")
-            doc_to_index = {
-                "tipo_documento": "jurisprudencia", "id": doc_id, "titulo": doc.get("classe", "") + " - " + doc.get("assunto", ""),
-                "classe": doc.get("classe"), "assunto": doc.get("assunto"), "magistrado": doc.get("magistrado"), "comarca": doc.get("comarca"),
-                "data_julgamento": original_date, "ano_julgamento": extract_year(original_date), "ementa": doc.get("ementa"),
-                "texto_decisao": doc.get("inteiro_teor"), "fonte": "TJSC (Arquivo JSON)", "link": "#", "autoridade": doc.get("magistrado", "")
-            }
-            es.index(index=INDEX_NAME, id=doc_id, body=doc_to_index)
-            count += 1
-        es.indices.refresh(index=INDEX_NAME)
-        print(f"Importados {count} documentos do arquivo JSON")
-        return redirect(url_for('home'))
+        tarefa_id = fila_de_tarefas().enfileirar('importar-json', {"arquivo": filepath})
+        return _resposta_da_tarefa(tarefa_id)
     except Exception as e:
         print(f"Erro ao importar JSON: {e}")
         traceback.print_exc()
         return f"Erro ao importar JSON: {e}", 500
 
-@app.route('/importar-lexml')
-def importar_lexml():
-    """Chama o scraper do LexML e indexa os resultados."""
-    termo_de_busca = request.args.get('q')
-    if not termo_de_busca: return "Erro: Nenhum termo de busca fornecido.", 400
-    try:
-        create_index_if_not_exists()
-        documentos = scrape_lexml(termo_de_busca)
-        total_coletado = 0
-        for doc in documentos:
-            doc['ano_julgamento'] = extract_year(doc.get('data_julgamento'))
-            es.index(index=INDEX_NAME, id=doc['id'], body=doc)
-            total_coletado += 1
-        es.indices.refresh(index=INDEX_NAME)
-        print(f"Total de jurisprudências indexadas do LexML: {total_coletado}")
-        return redirect(url_for('home', q=termo_de_busca, type='jurisprudencia'))
-    except Exception as e:
-        print(f"Erro na rota de importação do LexML: {e}")
-        traceback.print_exc()
-        return f"Erro durante a coleta: {e}", 500
+def _rota_de_importacao(descricao):
+    def importar():
+        termos = [' '.join(t.split()) for t in request.args.getlist('q') if t.strip()]
+        if not termos: return "Erro: Nenhum termo de busca fornecido.", 400
+        try:
+            # forcar=1 ignora o registro de coleta: reenvia tudo, inclusive o que não mudou desde a última coleta.
+            parametros = {"termos": termos if descricao.varios_termos else termos[:1], "forcar": request.args.get('forcar') == '1'}
+            for chave, tipo in descricao.parametros:
+                parametros[chave] = request.args.get(chave) == '1' if tipo is bool else request.args.get(chave, type=tipo)
+            tarefa_id = fila_de_tarefas().enfileirar(f'importar-{descricao.nome}', parametros)
+            return _resposta_da_tarefa(tarefa_id, q=termos[0], type=descricao.tipo_documento)
+        except Exception as e:
+            print(f"Erro na rota de importação do {descricao.rotulo}: {e}")
+            traceback.print_exc()
+            return f"Erro durante a coleta do {descricao.rotulo}: {e}", 500
+    importar.__doc__ = f"Enfileira a coleta do {descricao.rotulo} e a indexação dos resultados."
+    return importar
 
-@app.route('/importar-bnp')
-def importar_bnp():
-    """Chama o scraper do BNP e indexa os resultados."""
-    termo_de_busca = request.args.get('q')
-    if not termo_de_busca: return "Erro: Nenhum termo de busca fornecido.", 400
-    try:
-        create_index_if_not_exists()
-        documentos = scrape_bnp(termo_de_busca)
-        total_coletado = 0
-        for doc in documentos:
-            doc['ano_julgamento'] = extract_year(doc.get('data_julgamento'))
-            es.index(index=INDEX_NAME, id=doc['id'], body=doc)
-            total_coletado += 1
-        es.indices.refresh(index=INDEX_NAME)
-        print(f"Total de precedentes indexados do Pangea BNP: {total_coletado}")
-        return redirect(url_for('home', q=termo_de_busca, type='precedente'))
-    except Exception as e:
-        print(f"Erro na rota de importação do BNP: {e}")
-        traceback.print_exc()
-        return f"Erro durante a coleta do Pangea BNP: {e}", 500
+# /importar-lexml, /importar-bnp, ...: uma rota por coletor do registro (endpoint importar_<nome>).
+for _descricao in registro_coletores().descricoes():
+    if _descricao.rota:
+        app.add_url_rule(f'/importar-{_descricao.nome}', endpoint=f'importar_{_descricao.nome}', view_func=_rota_de_importacao(_descricao))
 
-if __name__ == '__main__':
-    max_retries = 10
-    retry_count = 0
-    while retry_count < max_retries:
+@app.cli.command('importar-json')
+@click.argument('filepath', default=os.path.join('data', 'jurisprudencias.json'), type=click.Path(exists=True, dir_okay=False))
+def importar_json_command(filepath):
+    """Importa um arquivo JSON/NDJSON (opcionalmente .gz) para o índice."""
+    relatorio = importar_arquivo_json(filepath)
+    click.echo(f"{relatorio['indexados']} documentos indexados, {relatorio['total_erros']} erros ({relatorio['docs_por_segundo']:.1f} docs/s).")
+
+@app.cli.command('importar-coletor')
+@click.argument('nome', type=click.Choice([d.nome for d in registro_coletores().descricoes() if d.rota]))
+@click.argument('termos', nargs=-1, required=True)
+@click.option('--completo', is_flag=True, help='Coleta toda a janela de anos, ignorando a marca da última coleta.')
+@click.option('--forcar', is_flag=True, help='Ignora o registro de coleta: reenvia também os documentos inalterados.')
+def importar_coletor_command(nome, termos, completo, forcar):
+    """Coleta os termos num coletor do registro e indexa o resultado, sem passar pela fila de tarefas."""
+    descricao = registro_coletores().descricao(nome)
+    parametros = {"termos": list(termos) if descricao.varios_termos else list(termos[:1]), "completo": completo, "forcar": forcar}
+    resumo = tarefa_importar_coletor(nome)(parametros, lambda **progresso: None)
+    click.echo(f"{resumo['indexados']} documentos indexados, {resumo['inalterados']} inalterados, {resumo['erros']} erros.")
+
+@app.cli.command('importar-eclis')
+@click.argument('arquivo', default='eclis.txt', type=click.Path(exists=True, dir_okay=False))
+@click.option('--origem', default=None, help='URL base do portal do CSM ou diretório local com as páginas salvas.')
+@click.option('--workers', type=int, default=None, help='Requisições simultâneas.')
+@click.option('--taxa', type=float, default=None, help='Requisições por segundo na fonte remota.')
+@click.option('--limite', type=int, default=None, help='Processa no máximo este número de ECLIs pendentes.')
+@click.option('--sem-repetir-erros', is_flag=True, help='Não tenta de novo os ECLIs que falharam em execuções anteriores.')
+def importar_eclis_command(arquivo, origem, workers, taxa, limite, sem_repetir_erros):
+    """Coleta e indexa as decisões de uma lista de ECLIs, retomando de onde a última execução parou."""
+    relatorio = importar_eclis(arquivo, origem, workers, taxa, limite, repetir_erros=not sem_repetir_erros)
+    click.echo(f"{relatorio['processados']} ECLIs processados: {relatorio['indexados']} indexados, "
+               f"{relatorio['nao_encontrados']} não encontrados, {relatorio['erros_coleta'] + relatorio['erros_indexacao']} erros "
+               f"({relatorio['eclis_por_segundo']:.1f} ECLIs/s).")
+    if relatorio.get('invalidos'): click.echo(f"{relatorio['invalidos']} linhas com ECLI inválido ignoradas.")
+    for erro in relatorio['ultimos_erros']:
+        click.echo(f"  {erro['ecli']}: {erro['erro']}")
+
+@app.cli.command('reprocessar-paginas')
+@click.option('--fonte', 'fontes', multiple=True, type=click.Choice([d.nome for d in registro_coletores().descricoes()]), help='Só as páginas desta fonte (repetível).')
+@click.option('--workers', type=int, default=None, help='Processos de extração (padrão: número de CPUs).')
+@click.option('--todos', is_flag=True, help='Reenvia todos os documentos, não só os que mudaram desde a última indexação.')
+def reprocessar_paginas_command(fontes, workers, todos):
+    """Roda os parsers atuais sobre as páginas guardadas e reindexa o resultado, sem acessar as fontes."""
+    inicio = time.perf_counter()
+    relatorio = reprocessar_paginas(list(fontes) or None, workers, todos)
+    click.echo(f"{relatorio['paginas']} páginas, {relatorio['documentos_extraidos']} documentos extraídos, "
+               f"{relatorio['indexados']} indexados, {relatorio['total_erros']} erros de indexação, "
+               f"{len(relatorio['falhas_extracao'])} páginas com falha na extração ({time.perf_counter() - inicio:.1f}s).")
+    for falha in relatorio['falhas_extracao'][:10]:
+        click.echo(f"  {falha['fonte']} {falha['url']}: {falha['erro']}")
+
+@app.cli.command('paginas-armazenadas')
+def paginas_armazenadas_command():
+    """Resumo do armazém de páginas brutas, por fonte."""
+    from coletores.paginas import armazem_padrao
+    for fonte, resumo in sorted(armazem_padrao().resumo().items()):
+        click.echo(f"{fonte}: {resumo['buscas']} buscas, {resumo['urls']} URLs, {resumo['conteudos']} conteúdos distintos, "
+                   f"{resumo['bytes_originais'] / 1e6:.1f} MB sem compressão")
+
+@app.cli.command('reconstruir-indice')
+@click.option('--no-servidor', is_flag=True, help='Copia com o _reindex do Elasticsearch, sem renormalizar os documentos.')
+def reconstruir_indice_command(no_servidor):
+    """Reconstrói o índice numa nova versão com o mapeamento atual e troca o alias sem tirar a busca do ar."""
+    novo = reconstruir_indice(no_servidor)
+    click.echo(f"'{INDEX_NAME}' agora aponta para '{novo}'.")
+
+@contextmanager
+def _trava_entre_processos(caminho):
+    """Exclusão mútua entre processos da máquina (flock); sem fcntl, não trava."""
+    if fcntl is None:
+        yield
+        return
+    diretorio = os.path.dirname(caminho)
+    if diretorio: os.makedirs(diretorio, exist_ok=True)
+    with open(caminho, 'a') as arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
         try:
-            if es.ping():
-                print("Conectado ao Elasticsearch com sucesso!")
-                create_index_if_not_exists()
-                break
-        except Exception as e:
-            retry_count += 1
-            print(f"Tentativa {retry_count}/{max_retries} - Erro ao conectar ao Elasticsearch: {e}")
-            if retry_count < max_retries: time.sleep(5)
-            else: print("Não foi possível conectar ao Elasticsearch. A aplicação pode não funcionar.")
-    
-    app.run(host='0.0.0.0', port=3000, debug=True)
+            yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+def preparar_elasticsearch():
+    """
+    Espera o cluster (backoff exponencial) e cria o índice se preciso. Com vários workers, um de cada vez: o primeiro
+    cria o índice e os outros, ao obter a trava, já o encontram.
+    """
+    if not aguardar_elasticsearch(es): return
+    with _trava_entre_processos(PREPARACAO_TRAVA_PATH):
+        create_index_if_not_exists()
 
+def aquecer_navegadores():
+    if os.environ.get('BNP_POOL_AQUECER') == '1' and any(d.nome == 'bnp' for d in registro_coletores().descricoes()):
+        # Inicia os navegadores em segundo plano para que a primeira busca no BNP não espere o startup do Chrome.
+        threading.Thread(target=lambda: obter_coletor('bnp').aquecer(), daemon=True).start()
+
+def relatorio_de_inicializacao():
+    """Tempo de carga do app.py, RSS do processo e o que já foi importado (num worker só de busca, nenhum coletor)."""
+    pesados = sorted(m for m in ('selenium', 'lxml', 'bs4') if m in sys.modules)
+    print(f"Processo {os.getpid()}: aplicação carregada em {CARGA_SEGUNDOS * 1000:.0f}ms, RSS {memoria_residente() / 1e6:.1f} MB, "
+          f"{len(sys.modules)} módulos; coletores carregados: {', '.join(registro_coletores().carregados()) or 'nenhum'}; "
+          f"dependências de coleta importadas: {', '.join(pesados) or 'nenhuma'}.")
+
+def iniciar_worker():
+    """Chamado em cada worker do gunicorn após o fork: cliente do Elasticsearch, índice, métricas e navegadores."""
+    global es
+    es = criar_cliente()
+    iniciar_gravacao_periodica()
+    # Em segundo plano: esperar o cluster aqui seguraria o boot do worker além do timeout do gunicorn. Até o índice
+    # existir, /pronto responde 503.
+    threading.Thread(target=preparar_elasticsearch, daemon=True, name='preparar-elasticsearch').start()
+    aquecer_navegadores()
+    relatorio_de_inicializacao()
+
+def encerrar_worker():
+    """Chamado na saída de cada worker do gunicorn: devolve à fila as tarefas em execução e grava as métricas finais."""
+    encerrar_fila_padrao()
+    gravar_estado()
+
+CARGA_SEGUNDOS = time.perf_counter() - _inicio_da_carga
+MetricaCalculada('iurisadv_aplicacao_carga_segundos', 'Tempo de importação do app.py (módulos e configuração).', lambda: CARGA_SEGUNDOS)
+
+if __name__ == '__main__':
+    # Servidor de desenvolvimento (um processo). Em produção: gunicorn -c gunicorn.conf.py app:app
+    preparar_elasticsearch()
+    aquecer_navegadores()
+    relatorio_de_inicializacao()
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 3000)), debug=os.environ.get('FLASK_DEBUG') == '1')
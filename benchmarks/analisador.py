@@ -0,0 +1,96 @@
+# benchmarks/analisador.py - Compara o analisador jurídico (analise.py) com o analisador padrão num conjunto fixo de consultas
+#
+# Cria dois índices temporários com os mesmos documentos, um com o INDEX_MAPPING atual e outro sem os analisadores
+# customizados, e mede para cada consulta a latência (took do Elasticsearch e ida e volta) e a sobreposição do top-10.
+#
+# Uso: ES_URL=http://localhost:9200 python -m benchmarks.analisador [--arquivo data/jurisprudencias.json] [--limite 20000]
+
+import os
+import copy
+import time
+import argparse
+import itertools
+import statistics
+
+from elasticsearch import Elasticsearch
+
+from app import INDEX_MAPPING, consulta_texto, _documentos_do_json, _documentos_coletados
+from coletores.arquivo_json import ler_registros
+from indexacao import indexar_em_lote
+
+INDICE_PADRAO, INDICE_JURIDICO = 'bench_analisador_padrao', 'bench_analisador_juridico'
+CONSULTAS_PATH = os.path.join(os.path.dirname(__file__), 'consultas.txt')
+
+def mapeamento_padrao():
+    """INDEX_MAPPING sem o analisador jurídico: os campos de texto voltam ao analisador standard (os subcampos não mudam)."""
+    corpo = copy.deepcopy(INDEX_MAPPING)
+    for campo in corpo["mappings"]["properties"].values():
+        campo.pop("analyzer", None)
+        campo.pop("search_analyzer", None)
+    return corpo
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def criar_e_carregar(es, indice, corpo, arquivo, limite):
+    if es.indices.exists(index=indice): es.indices.delete(index=indice)
+    es.indices.create(index=indice, body=corpo)
+    documentos = _documentos_coletados(itertools.islice(_documentos_do_json(ler_registros(arquivo)), limite))
+    relatorio = indexar_em_lote(es, documentos, indice, rotulo=indice)
+    es.indices.forcemerge(index=indice, max_num_segments=1)
+    return relatorio['indexados']
+
+def medir(es, indice, consulta, repeticoes):
+    corpo = {"query": consulta_texto(consulta), "size": 10, "track_total_hits": True}
+    for _ in range(2):
+        es.search(index=indice, body=corpo, request_cache=False)
+    tooks, rede = [], []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        res = es.search(index=indice, body=corpo, request_cache=False)
+        rede.append((time.perf_counter() - inicio) * 1000)
+        tooks.append(res['took'])
+    return {"ids": [hit['_id'] for hit in res['hits']['hits']], "total": res['hits']['total']['value'], "took": tooks, "rede": rede}
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara latência e top-10 do analisador jurídico com o analisador padrão.')
+    parser.add_argument('--es', default=os.environ.get('ES_URL', 'http://localhost:9200'))
+    parser.add_argument('--arquivo', default=os.path.join('data', 'jurisprudencias.json'))
+    parser.add_argument('--limite', type=int, default=None, help='Máximo de documentos carregados.')
+    parser.add_argument('--consultas', default=CONSULTAS_PATH)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--manter', action='store_true', help='Não apaga os índices temporários ao final.')
+    args = parser.parse_args()
+
+    es = Elasticsearch(args.es, request_timeout=120)
+    with open(args.consultas, encoding='utf-8') as arquivo:
+        consultas = [linha.strip() for linha in arquivo if linha.strip()]
+    for indice, corpo in ((INDICE_PADRAO, mapeamento_padrao()), (INDICE_JURIDICO, INDEX_MAPPING)):
+        print(f"{indice}: {criar_e_carregar(es, indice, corpo, args.arquivo, args.limite)} documentos")
+
+    print(f"\n{'consulta':42} {'took p50 (ms)':>15} {'total de hits':>17} {'top-10 em comum':>16}")
+    tooks = {INDICE_PADRAO: [], INDICE_JURIDICO: []}
+    rede = {INDICE_PADRAO: [], INDICE_JURIDICO: []}
+    sobreposicoes = []
+    for consulta in consultas:
+        padrao, juridico = medir(es, INDICE_PADRAO, consulta, args.repeticoes), medir(es, INDICE_JURIDICO, consulta, args.repeticoes)
+        for indice, resultado in ((INDICE_PADRAO, padrao), (INDICE_JURIDICO, juridico)):
+            tooks[indice].extend(resultado['took'])
+            rede[indice].extend(resultado['rede'])
+        em_comum = len(set(padrao['ids']) & set(juridico['ids']))
+        base = max(len(padrao['ids']), len(juridico['ids'])) or 1
+        sobreposicoes.append(em_comum / base)
+        print(f"{consulta[:42]:42} {statistics.median(padrao['took']):>6.1f} -> {statistics.median(juridico['took']):<6.1f} "
+              f"{padrao['total']:>7} -> {juridico['total']:<7} {em_comum:>9}/{base}")
+
+    print()
+    for indice in (INDICE_PADRAO, INDICE_JURIDICO):
+        print(f"{indice}: took p50 {percentil(tooks[indice], 50):.1f}ms p95 {percentil(tooks[indice], 95):.1f}ms | "
+              f"ida e volta p50 {percentil(rede[indice], 50):.1f}ms p95 {percentil(rede[indice], 95):.1f}ms")
+    print(f"Sobreposição média do top-10: {statistics.mean(sobreposicoes):.0%}")
+    if not args.manter:
+        es.indices.delete(index=[INDICE_PADRAO, INDICE_JURIDICO])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/carga.py - Teste de carga da aplicação (página, /api/search e /sugestoes) contra o stub do Elasticsearch
+#
+# Sobe o stub do Elasticsearch (em outro processo, para não disputar o GIL com os clientes) e a aplicação (gunicorn
+# com gunicorn.conf.py, ou o servidor de desenvolvimento do Werkzeug, para comparação), espera /pronto e dispara
+# `--concorrencia` clientes por `--duracao` segundos, com consultas e páginas sorteadas de consultas.txt.
+# Com --url mede um servidor já em execução.
+#
+# Uso: python -m benchmarks.carga [--servidor gunicorn|werkzeug] [--concorrencia 16] [--duracao 15] [--workers 4]
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+import subprocess
+import statistics
+
+import requests
+
+from benchmarks.analisador import CONSULTAS_PATH, percentil
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def rotas(consultas, rng):
+    consulta = rng.choice(consultas)
+    return rng.choice((
+        ('pagina', f"/?q={consulta}&page={rng.randint(1, 5)}"),
+        ('api', f"/api/search?q={consulta}&page={rng.randint(1, 5)}"),
+        ('sugestoes', f"/sugestoes?q={consulta[:rng.randint(2, 8)]}"),
+    ))
+
+def _cliente(url, consultas, fim, resultados, semente):
+    rng = random.Random(semente)
+    sessao = requests.Session()
+    while time.monotonic() < fim:
+        rota, caminho = rotas(consultas, rng)
+        inicio = time.perf_counter()
+        try:
+            status = sessao.get(url + caminho, timeout=30).status_code
+        except requests.RequestException:
+            status = 0
+        resultados.append((rota, status, (time.perf_counter() - inicio) * 1000))
+
+def medir(url, consultas, concorrencia, duracao):
+    resultados = []
+    fim = time.monotonic() + duracao
+    clientes = [threading.Thread(target=_cliente, args=(url, consultas, fim, resultados, i)) for i in range(concorrencia)]
+    for cliente in clientes: cliente.start()
+    for cliente in clientes: cliente.join()
+    return resultados
+
+def aguardar_pronto(url, prazo=60):
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        try:
+            if requests.get(url + '/pronto', timeout=2).status_code == 200: return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+def iniciar_stub(porta, latencia):
+    comando = [sys.executable, '-m', 'benchmarks.stub_elasticsearch', '--porta', str(porta), '--latencia', str(latencia)]
+    return subprocess.Popen(comando, cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def iniciar_servidor(tipo, porta, es_url, workers, threads, sem_cache):
+    ambiente = dict(os.environ, ES_URL=es_url, PORT=str(porta), GUNICORN_WORKERS=str(workers), GUNICORN_THREADS=str(threads),
+                    GUNICORN_ACCESSLOG='', ES_ESPERA_MAXIMA='10')
+    if sem_cache: ambiente['CACHE_BUSCA_TTL'] = '0'
+    if tipo == 'gunicorn':
+        comando = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app']
+    else:
+        comando = [sys.executable, 'app.py']
+    return subprocess.Popen(comando, cwd=RAIZ, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def relatorio(resultados, duracao):
+    latencias = [ms for _, status, ms in resultados if status == 200]
+    erros = sum(1 for _, status, _ in resultados if status != 200)
+    print(f"{len(resultados)} requisições em {duracao}s: {len(latencias) / duracao:.1f} req/s com sucesso, {erros} erros")
+    if latencias:
+        print(f"latência p50 {percentil(latencias, 50):.1f}ms p95 {percentil(latencias, 95):.1f}ms p99 {percentil(latencias, 99):.1f}ms")
+    for rota in sorted({r for r, _, _ in resultados}):
+        da_rota = [ms for r, status, ms in resultados if r == rota and status == 200]
+        if da_rota:
+            print(f"  {rota:10} {len(da_rota):>7} req  p50 {statistics.median(da_rota):.1f}ms  p99 {percentil(da_rota, 99):.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga da busca contra um stub local do Elasticsearch.')
+    parser.add_argument('--url', default=None, help='Mede um servidor já em execução, sem subir stub nem aplicação.')
+    parser.add_argument('--servidor', choices=('gunicorn', 'werkzeug'), default='gunicorn')
+    parser.add_argument('--porta', type=int, default=3099)
+    parser.add_argument('--porta-es', type=int, default=9299)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--duracao', type=int, default=15)
+    parser.add_argument('--latencia-es', type=float, default=0.005, help='Latência simulada de cada busca no stub (s).')
+    parser.add_argument('--sem-cache', action='store_true', help='Desliga o cache de buscas da aplicação (CACHE_BUSCA_TTL=0).')
+    parser.add_argument('--consultas', default=CONSULTAS_PATH)
+    args = parser.parse_args()
+    with open(args.consultas, encoding='utf-8') as arquivo:
+        consultas = [linha.strip() for linha in arquivo if linha.strip()]
+
+    if args.url:
+        relatorio(medir(args.url.rstrip('/'), consultas, args.concorrencia, args.duracao), args.duracao)
+        return
+    stub = iniciar_stub(args.porta_es, args.latencia_es)
+    processo = iniciar_servidor(args.servidor, args.porta, f"http://127.0.0.1:{args.porta_es}", args.workers, args.threads, args.sem_cache)
+    try:
+        url = f"http://127.0.0.1:{args.porta}"
+        if not aguardar_pronto(url): raise SystemExit("A aplicação não ficou pronta (veja /pronto).")
+        descricao = f"{args.workers} workers x {args.threads} threads" if args.servidor == 'gunicorn' else "1 processo"
+        print(f"{args.servidor} ({descricao}) | {args.concorrencia} clientes | stub do Elasticsearch com {args.latencia_es * 1000:.0f}ms por busca")
+        relatorio(medir(url, consultas, args.concorrencia, args.duracao), args.duracao)
+    finally:
+        for filho in (processo, stub):
+            filho.terminate()
+            filho.wait(timeout=30)
+
+if __name__ == '__main__':
+    main()
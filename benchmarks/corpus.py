@@ -0,0 +1,118 @@
+# benchmarks/corpus.py - Corpus sintético no formato de data/jurisprudencias.json (10 mil, 100 mil ou 1 milhão de decisões)
+#
+# Os campos seguem o arquivo do TJSC (numero_processo, classe, assunto, magistrado, comarca, data_julgamento, ementa,
+# inteiro_teor). O vocabulário vem das ementas de data/jurisprudencias.json e das listas de benchmarks/fixtures.py;
+# as ementas são montadas a partir de um conjunto fixo de frases (e não palavra por palavra), para que o corpus de
+# 1 milhão saia em cerca de um minuto. Os tamanhos de ementa e inteiro teor acompanham os do arquivo real.
+# Uma fração das datas vem por extenso ou dd/mm/aaaa (como nas fontes) e uma fração das decisões é republicada com
+# outro número e a ementa levemente alterada, para exercitar a normalização de datas e o agrupamento de duplicatas.
+# A saída é NDJSON comprimido (lido em streaming por coletores.arquivo_json.ler_registros), determinística pela semente.
+#
+# Uso: python -m benchmarks.corpus [--tamanho 10000] [--saida data/benchmarks/jurisprudencias-10000.ndjson.gz]
+
+import os
+import re
+import time
+import gzip
+import json
+import random
+import argparse
+
+from benchmarks.fixtures import ASSUNTOS, CLASSES
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AMOSTRA_PATH = os.path.join(RAIZ, 'data', 'jurisprudencias.json')
+CORPUS_DIR = os.path.join(RAIZ, 'data', 'benchmarks')
+TAMANHOS = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+COMARCAS = ["Capital", "Joinville", "Blumenau", "São Francisco do Sul", "Chapecó", "Criciúma", "Itajaí", "Lages",
+            "Balneário Camboriú", "Jaraguá do Sul", "Tubarão", "Brusque", "Palhoça", "São José", "Concórdia"]
+MAGISTRADOS = ["Andrea Cristina Rodrigues Studer", "Alexandre Morais da Rosa", "Ana Lia Moura Lisboa Carneiro",
+               "Jaime Ramos", "Cláudia Lambert de Faria", "Luiz Fernando Boller", "Sérgio Roberto Baasch Luz",
+               "Denise Volpato", "Hélio David Vieira Figueira dos Santos", "Vera Lúcia Ferreira Copetti"]
+MESES = ["janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho", "agosto", "setembro", "outubro", "novembro", "dezembro"]
+FRASES = 2000
+TAXA_DATAS_DMA, TAXA_DATAS_EXTENSO, TAXA_SEM_DATA = 0.15, 0.05, 0.01
+TAXA_REPUBLICADAS = 0.03
+
+def _vocabulario():
+    """Palavras das ementas reais (quando o arquivo existe) mais os termos das fixtures."""
+    palavras = " ".join(ASSUNTOS + CLASSES).upper().split()
+    try:
+        with open(AMOSTRA_PATH, encoding='utf-8') as arquivo:
+            for registro in json.load(arquivo):
+                palavras.extend(re.findall(r'\w+', (registro.get('ementa') or '').upper()))
+    except (OSError, ValueError):
+        pass
+    return palavras
+
+def _frases(rng, vocabulario):
+    return [" ".join(rng.choice(vocabulario) for _ in range(rng.randint(4, 14))) + "." for _ in range(FRASES)]
+
+def _data(rng):
+    ano, mes, dia = rng.randint(2000, 2024), rng.randint(1, 12), rng.randint(1, 28)
+    sorteio = rng.random()
+    if sorteio < TAXA_SEM_DATA: return None
+    if sorteio < TAXA_SEM_DATA + TAXA_DATAS_EXTENSO: return f"{dia} de {MESES[mes - 1]} de {ano}"
+    if sorteio < TAXA_SEM_DATA + TAXA_DATAS_EXTENSO + TAXA_DATAS_DMA: return f"{dia:02d}/{mes:02d}/{ano}"
+    return f"{ano}-{mes:02d}-{dia:02d}"
+
+def _numero_cnj(rng, n):
+    return f"{n % 10_000_000:07d}-{rng.randint(10, 99)}.{rng.randint(2000, 2024)}.8.24.{rng.randint(1, 999):04d}"
+
+def gerar_documentos(quantidade, semente=0):
+    """Gera `quantidade` registros no formato do arquivo JSON do TJSC."""
+    rng = random.Random(semente)
+    frases = _frases(rng, _vocabulario())
+    anteriores = []
+    for n in range(quantidade):
+        if anteriores and rng.random() < TAXA_REPUBLICADAS:
+            # Republicação: outro número de processo, a mesma ementa com uma frase trocada no final.
+            base = rng.choice(anteriores)
+            ementa = base["ementa"].rsplit('.', 2)[0] + ". " + rng.choice(frases)
+            registro = dict(base, numero_processo=_numero_cnj(rng, n), ementa=ementa)
+        else:
+            ementa = " ".join(rng.choice(frases) for _ in range(rng.randint(4, 12)))
+            registro = {
+                "numero_processo": _numero_cnj(rng, n), "classe": rng.choice(CLASSES), "assunto": rng.choice(ASSUNTOS),
+                "magistrado": rng.choice(MAGISTRADOS), "comarca": rng.choice(COMARCAS), "data_julgamento": _data(rng),
+                "ementa": ementa,
+                "inteiro_teor": ementa + " " + " ".join(rng.choice(frases) for _ in range(rng.randint(5, 25))),
+            }
+            if len(anteriores) < 1000: anteriores.append(registro)
+            elif rng.random() < 0.01: anteriores[rng.randrange(1000)] = registro
+        yield registro
+
+def caminho_corpus(quantidade, diretorio=None):
+    return os.path.join(diretorio or CORPUS_DIR, f"jurisprudencias-{quantidade}.ndjson.gz")
+
+def escrever_corpus(quantidade, caminho=None, semente=0):
+    """Grava o corpus em NDJSON.gz e devolve o caminho."""
+    caminho = caminho or caminho_corpus(quantidade)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + '.tmp'
+    with gzip.open(temporario, 'wt', encoding='utf-8', compresslevel=1) as arquivo:
+        for registro in gerar_documentos(quantidade, semente):
+            arquivo.write(json.dumps(registro, ensure_ascii=False))
+            arquivo.write('\n')
+    os.replace(temporario, caminho)
+    return caminho
+
+def obter_corpus(quantidade, semente=0):
+    """Caminho do corpus desse tamanho, gerando-o na primeira vez."""
+    caminho = caminho_corpus(quantidade)
+    if not os.path.exists(caminho): escrever_corpus(quantidade, caminho, semente)
+    return caminho
+
+def tamanho(valor):
+    return TAMANHOS.get(valor.lower()) or int(valor)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera um corpus sintético de jurisprudência (NDJSON.gz).")
+    parser.add_argument('--tamanho', type=tamanho, default=10_000, help="Número de decisões ou 10k, 100k, 1m.")
+    parser.add_argument('--saida', default=None)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args()
+    inicio = time.perf_counter()
+    caminho = escrever_corpus(args.tamanho, args.saida, args.semente)
+    print(f"{args.tamanho} decisões em {caminho} ({os.path.getsize(caminho) / 1e6:.1f} MB, {time.perf_counter() - inicio:.1f}s)")
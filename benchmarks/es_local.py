@@ -0,0 +1,268 @@
+# benchmarks/es_local.py - Elasticsearch em memória, no próprio processo, para medir indexação e busca sem cluster
+#
+# Um nó do elastic_transport (node_class do cliente) que responde às requisições em memória: o cliente real
+# serializa os corpos, faz a checagem de produto e desserializa as respostas, mas não há socket nem outro processo.
+# Cobre o que a aplicação usa: criação de índices e aliases, settings, _bulk (index, create, update), _search com
+# paginação (from+size e search_after), facetas e PIT. A busca não calcula relevância nem aplica a consulta: todo
+# documento tem _score 1.0, a ordenação pedida vale sobre os campos do _source (com missing _first/_last) e as
+# agregações são contadas sobre uma amostra (AMOSTRA_AGREGACOES), como o stub HTTP (stub_elasticsearch.py).
+# Com `max_documentos`, cada índice guarda só os primeiros documentos e conta os demais (cargas de 1 milhão sem
+# manter o corpus inteiro na memória).
+#
+# Uso: cluster = ClusterLocal(); es = cluster.cliente()
+
+import json
+import time
+import bisect
+import fnmatch
+import functools
+import itertools
+from urllib.parse import urlsplit, unquote
+
+from elasticsearch import Elasticsearch
+from elastic_transport import BaseNode, ApiResponseMeta, HttpHeaders
+
+try:
+    from elastic_transport._node._base import NodeApiResponse
+except ImportError:
+    # elastic-transport < 8.10: o nó devolve a tupla (meta, corpo).
+    NodeApiResponse = lambda meta, corpo: (meta, corpo)
+
+from benchmarks.stub_elasticsearch import CABECALHOS_ES, _hit, _agregacoes
+
+AMOSTRA_AGREGACOES = 1000
+
+def _valor_de_ordenacao(documento, campo):
+    if campo == '_score': return 1.0
+    if campo.endswith('.keyword'): campo = campo[:-len('.keyword')]
+    return documento.get(campo)
+
+def _criterios(ordenacao):
+    """[(campo, decrescente, ausentes_primeiro)] a partir do "sort" da busca."""
+    criterios = []
+    for criterio in ordenacao:
+        if isinstance(criterio, str): criterio = {criterio: {}}
+        campo, opcoes = next(iter(criterio.items()))
+        if isinstance(opcoes, str): opcoes = {"order": opcoes}
+        decrescente = opcoes.get("order", "desc" if campo == '_score' else "asc") == "desc"
+        criterios.append((campo, decrescente, opcoes.get("missing", "_last") == "_first"))
+    return criterios
+
+def _comparador(criterios):
+    def comparar(a, b):
+        for (_, decrescente, ausentes_primeiro), x, y in zip(criterios, a, b):
+            if x == y: continue
+            # Ausentes vão para o começo ou o fim independentemente da direção, como no Elasticsearch.
+            if x is None: return -1 if ausentes_primeiro else 1
+            if y is None: return 1 if ausentes_primeiro else -1
+            return (1 if x > y else -1) * (-1 if decrescente else 1)
+        return 0
+    return comparar
+
+class IndiceLocal:
+    def __init__(self, nome, corpo=None, max_documentos=None):
+        self.nome = nome
+        self.corpo = corpo or {}
+        self.configuracoes = dict((self.corpo.get('settings') or {}).get('index', {}))
+        self.documentos = {}
+        self.max_documentos = max_documentos
+        self.descartados = 0
+        self._lista = None
+
+    def lista(self):
+        if self._lista is None: self._lista = list(self.documentos.values())
+        return self._lista
+
+    def total(self):
+        return len(self.documentos) + self.descartados
+
+    def gravar(self, doc_id, documento):
+        criado = doc_id not in self.documentos
+        if criado and self.max_documentos is not None and len(self.documentos) >= self.max_documentos:
+            self.descartados += 1
+            return True
+        self.documentos[doc_id] = documento
+        self._lista = None
+        return criado
+
+class ClusterLocal:
+    """Índices e aliases em memória; `cliente()` devolve um Elasticsearch (elasticsearch-py) ligado a este cluster."""
+
+    def __init__(self, latencia=0.0, max_documentos=None):
+        self.latencia = latencia
+        self.max_documentos = max_documentos
+        self.indices = {}
+        self.aliases = {}
+        self.requisicoes = 0
+        self._pits = itertools.count(1)
+        self._ordenados = {}
+
+    def cliente(self, **opcoes):
+        cluster = self
+
+        class NoLocal(BaseNode):
+            def perform_request(self, method, target, body=None, headers=None, request_timeout=None):
+                inicio = time.perf_counter()
+                status, resposta = cluster.responder(method, target, body)
+                dados = json.dumps(resposta).encode('utf-8') if resposta is not None else b''
+                meta = ApiResponseMeta(status=status, http_version='1.1', headers=HttpHeaders(CABECALHOS_ES),
+                                       duration=time.perf_counter() - inicio, node=self.config)
+                return NodeApiResponse(meta, dados)
+
+        return Elasticsearch('http://es-local:9200', node_class=NoLocal, **opcoes)
+
+    def resolver(self, nome):
+        """Nomes de índices, padrões com * ou aliases (separados por vírgula) -> lista de IndiceLocal existentes."""
+        indices = []
+        for parte in nome.split(','):
+            if '*' in parte:
+                indices.extend(self.indices[real] for real in sorted(fnmatch.filter(self.indices, parte)))
+                continue
+            for real in self.aliases.get(parte, [parte]):
+                if real in self.indices: indices.append(self.indices[real])
+        return indices
+
+    def documentos(self, nome):
+        indices = self.resolver(nome)
+        if len(indices) == 1: return indices[0].lista()
+        return [d for indice in indices for d in indice.lista()]
+
+    def responder(self, metodo, alvo, corpo):
+        self.requisicoes += 1
+        if self.latencia: time.sleep(self.latencia)
+        caminho = unquote(urlsplit(alvo).path)
+        partes = [p for p in caminho.split('/') if p]
+        dados = corpo or b''
+        if partes and partes[-1] == '_bulk':
+            return 200, self._bulk(partes[0] if len(partes) == 2 else None, dados)
+        json_corpo = json.loads(dados) if dados else {}
+        if not partes:
+            return 200, {"name": "es-local", "cluster_name": "es-local", "version": {"number": "8.4.2"}, "tagline": "You Know, for Search"}
+        if partes[0] == '_alias':
+            existe = partes[1] in self.aliases
+            if metodo == 'HEAD': return (200 if existe else 404), None
+            return (200, {i: {"aliases": {partes[1]: {}}} for i in self.aliases[partes[1]]}) if existe else (404, {"error": "alias_not_found"})
+        if partes[0] == '_aliases':
+            return 200, self._atualizar_aliases(json_corpo.get('actions', []))
+        if partes[0] == '_cluster':
+            return 200, {"status": "green", "timed_out": False}
+        if partes[0] == '_pit':
+            return 200, {"succeeded": True, "num_freed": 1}
+        if partes[0] == '_search':
+            return 200, self._buscar(json_corpo.get('pit', {}).get('id', ''), json_corpo)
+        nome = partes[0]
+        if len(partes) == 1:
+            if metodo == 'HEAD': return (200 if self.resolver(nome) else 404), None
+            if metodo == 'PUT':
+                self.indices[nome] = IndiceLocal(nome, json_corpo, self.max_documentos)
+                for alias in json_corpo.get('aliases', {}): self.aliases.setdefault(alias, []).append(nome)
+                return 200, {"acknowledged": True, "shards_acknowledged": True, "index": nome}
+            if metodo == 'DELETE':
+                self.indices.pop(nome, None)
+                for alias in self.aliases.values():
+                    if nome in alias: alias.remove(nome)
+                return 200, {"acknowledged": True}
+            return 200, {i.nome: {"mappings": i.corpo.get('mappings', {}), "settings": {"index": i.configuracoes}} for i in self.resolver(nome)}
+        operacao = partes[1]
+        if operacao == '_settings':
+            if metodo == 'PUT':
+                for indice in self.resolver(nome): indice.configuracoes.update(json_corpo.get('index', json_corpo))
+                return 200, {"acknowledged": True}
+            return 200, {i.nome: {"settings": {"index": {k: v for k, v in i.configuracoes.items() if v is not None}}} for i in self.resolver(nome)}
+        if operacao == '_refresh':
+            return 200, {"_shards": {"total": 1, "successful": 1, "failed": 0}}
+        if operacao == '_pit':
+            return 200, {"id": f"{nome}|{next(self._pits)}"}
+        if operacao == '_search':
+            return 200, self._buscar(nome, json_corpo)
+        if operacao == '_count':
+            return 200, {"count": sum(i.total() for i in self.resolver(nome))}
+        if operacao == '_doc' and len(partes) == 3:
+            documento = next((i.documentos[partes[2]] for i in self.resolver(nome) if partes[2] in i.documentos), None)
+            if documento is None: return 404, {"_index": nome, "_id": partes[2], "found": False}
+            return 200, {"_index": nome, "_id": partes[2], "found": True, "_source": documento}
+        return 200, {"acknowledged": True}
+
+    def _atualizar_aliases(self, acoes):
+        for acao in acoes:
+            (tipo, parametros), = acao.items()
+            if tipo == 'add':
+                indices = self.aliases.setdefault(parametros['alias'], [])
+                if parametros['index'] not in indices: indices.append(parametros['index'])
+            elif tipo == 'remove':
+                indices = self.aliases.get(parametros['alias'], [])
+                if parametros['index'] in indices: indices.remove(parametros['index'])
+            elif tipo == 'remove_index':
+                self.indices.pop(parametros['index'], None)
+        return {"acknowledged": True}
+
+    def _ordenar(self, nome, ordenacao):
+        """(chaves de ordenação comparáveis, valores de "sort", documentos), guardados até o índice mudar."""
+        listas = [i.lista() for i in self.resolver(nome)]
+        chave = (nome, json.dumps(ordenacao, sort_keys=True))
+        guardado = self._ordenados.get(chave)
+        if guardado is None or len(guardado[0]) != len(listas) or any(a is not b for a, b in zip(guardado[0], listas)):
+            criterios = _criterios(ordenacao)
+            envolver = functools.cmp_to_key(_comparador(criterios))
+            valores = [([_valor_de_ordenacao(d, campo) for campo, _, _ in criterios], d) for d in itertools.chain(*listas)]
+            valores.sort(key=lambda par: envolver(par[0]))
+            guardado = self._ordenados[chave] = (listas, envolver, [envolver(v) for v, _ in valores], valores)
+        return guardado[1:]
+
+    def _buscar(self, nome, corpo):
+        if '|' in nome: nome = nome.split('|')[0]
+        tamanho = corpo.get('size', 10)
+        if corpo.get('sort'):
+            envolver, chaves, valores = self._ordenar(nome, corpo['sort'])
+            inicio = corpo.get('from', 0)
+            # search_after: o primeiro documento depois dos valores de ordenação do cursor.
+            if corpo.get('search_after') is not None: inicio = bisect.bisect_right(chaves, envolver(corpo['search_after']))
+            hits = [dict(_hit(d, corpo), sort=v) for v, d in valores[inicio:inicio + tamanho]]
+            documentos = [d for _, d in valores]
+        else:
+            documentos = self.documentos(nome)
+            inicio = corpo.get('from', 0)
+            if corpo.get('search_after') is not None: inicio = 0
+            hits = [_hit(d, corpo) for d in documentos[inicio:inicio + tamanho]]
+        resposta = {"took": 0, "timed_out": False, "hits": {"hits": hits}}
+        rastrear = corpo.get('track_total_hits', 10000)
+        if rastrear is not False:
+            total = sum(i.total() for i in self.resolver(nome))
+            if rastrear is True or total <= rastrear: resposta["hits"]["total"] = {"value": total, "relation": "eq"}
+            else: resposta["hits"]["total"] = {"value": rastrear, "relation": "gte"}
+        if 'aggs' in corpo: resposta["aggregations"] = _agregacoes(corpo, documentos[:AMOSTRA_AGREGACOES])
+        if 'pit' in corpo: resposta["pit_id"] = corpo['pit']['id']
+        return resposta
+
+    def _bulk(self, indice_padrao, dados):
+        linhas = iter(dados.splitlines())
+        itens, erros = [], False
+        for linha in linhas:
+            if not linha.strip(): continue
+            (operacao, meta), = json.loads(linha).items()
+            fonte = json.loads(next(linhas)) if operacao != 'delete' else None
+            nome = meta.get('_index') or indice_padrao
+            indices = self.resolver(nome)
+            if not indices:
+                self.indices[nome] = IndiceLocal(nome, max_documentos=self.max_documentos)
+                indices = [self.indices[nome]]
+            indice = indices[-1]
+            doc_id = meta.get('_id') or str(len(indice.documentos) + 1)
+            item = {"_index": indice.nome, "_id": doc_id, "status": 200}
+            if operacao in ('index', 'create'):
+                if indice.gravar(doc_id, fonte): item["status"] = 201
+                item["result"] = "created" if item["status"] == 201 else "updated"
+            elif operacao == 'update':
+                atual = indice.documentos.get(doc_id)
+                if atual is None and 'upsert' not in fonte:
+                    item.update(status=404, error={"type": "document_missing_exception", "reason": f"[{doc_id}]: document missing"})
+                    erros = True
+                else:
+                    # Scripts (painless) não são executados: o documento é regravado com o `doc` parcial, se houver.
+                    indice.gravar(doc_id, {**(atual or fonte.get('upsert', {})), **fonte.get('doc', {})})
+                    item["result"] = "updated"
+            elif operacao == 'delete':
+                item["result"] = "deleted" if indice.documentos.pop(doc_id, None) is not None else "not_found"
+                indice._lista = None
+            itens.append({operacao: item})
+        return {"took": 0, "errors": erros, "items": itens}
@@ -0,0 +1,117 @@
+# benchmarks/extracao.py - Compara a extração de páginas do LexML/BNP com o parser original (BeautifulSoup + lambdas)
+#
+# Uso: python -m benchmarks.extracao [--repeticoes 200]
+# Confere que a saída de cada parser é idêntica à do parser original e mede o tempo por página.
+
+import argparse
+import os
+import time
+from bs4 import BeautifulSoup
+
+from coletores import extracao
+from duplicatas import hash_estavel
+
+DIRETORIO_HTML = os.path.join(os.path.dirname(__file__), 'html')
+LEXML_BASE_URL = 'https://www.lexml.gov.br'
+BNP_BASE_URL = 'https://pangeabnp.pdpj.jus.br'
+
+def lexml_original(html):
+    """Cópia da extração original de scrape_lexml, usada como referência."""
+    soup = BeautifulSoup(html, 'html.parser')
+    documentos = []
+    for item in soup.find_all('div', class_='docHit'):
+        try:
+            titulo_tag = item.find(lambda t: t.name == 'td' and 'Título' in t.text)
+            urn_tag = item.find(lambda t: t.name == 'td' and 'URN' in t.text)
+            if not (titulo_tag and urn_tag): continue
+            doc_id = urn_tag.find_next_sibling('td').text.strip()
+            titulo_link_tag = titulo_tag.find_next_sibling('td').find('a')
+            if not (doc_id and titulo_link_tag): continue
+            data_tag = item.find(lambda t: t.name == 'td' and 'Data' in t.text)
+            autoridade_tag = item.find(lambda t: t.name == 'td' and 'Autoridade' in t.text)
+            ementa_tag = item.find(lambda t: t.name == 'td' and 'Ementa' in t.text)
+            original_date_str = data_tag.find_next_sibling('td').text.strip() if data_tag else ''
+            documentos.append({
+                "tipo_documento": "jurisprudencia",
+                "id": doc_id,
+                "titulo": titulo_link_tag.text.strip(),
+                "ementa": ementa_tag.find_next_sibling('td').text.strip() if ementa_tag else '',
+                "data_julgamento": original_date_str,
+                "autoridade": autoridade_tag.find_next_sibling('td').text.strip() if autoridade_tag else '',
+                "link": f"{LEXML_BASE_URL}{titulo_link_tag['href']}",
+                "fonte": "LexML"
+            })
+        except Exception as e:
+            print(f"Erro ao processar item do LexML: {e}")
+    link_proxima = soup.find('a', string=lambda text: text and 'Próxima' in text.strip())
+    return documentos, link_proxima is not None
+
+def bnp_original(html):
+    """Cópia da extração original de scrape_bnp, usada como referência."""
+    soup = BeautifulSoup(html, 'html.parser')
+    documentos = []
+    for item in soup.find_all('app-card-precedente-item'):
+        try:
+            titulo_tag = item.find('h5', class_='card-title')
+            link_tag = item.find('a', class_='card-title-link')
+            if not (titulo_tag and link_tag): continue
+            titulo = titulo_tag.get_text(strip=True)
+            link = link_tag['href']
+            detalhes = {
+                dl.find('dt').get_text(strip=True): dl.find('dd').get_text(strip=True)
+                for dl in item.find_all('dl') if dl.find('dt') and dl.find('dd')
+            }
+            ementa_tag = item.find('p', class_='card-text')
+            ementa = ementa_tag.get_text(strip=True) if ementa_tag else ''
+            numero_unico = detalhes.get('Número Único:', '')
+            documentos.append({
+                "tipo_documento": "precedente", "id": f"BNP-{numero_unico}" if numero_unico else f"BNP-{hash_estavel(titulo)}", "titulo": titulo,
+                "link": f"{BNP_BASE_URL}{link}", "fonte": "Pangea BNP",
+                "data_julgamento": detalhes.get('Data de Julgamento:', ''),
+                "orgaoJulgador": detalhes.get('Órgão Julgador:', ''),
+                "ramoDireito": detalhes.get('Ramo do Direito:', ''),
+                "numeroUnico": numero_unico, "assuntos": detalhes.get('Assuntos:', ''), "ementa": ementa
+            })
+        except Exception as e:
+            print(f"Erro ao processar um item individual do BNP: {e}")
+    return documentos
+
+def _medir(funcao, html, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao(html)
+    return resultado, (time.perf_counter() - inicio) / repeticoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark e verificação de equivalência dos parsers de extração.")
+    parser.add_argument('--repeticoes', type=int, default=200)
+    args = parser.parse_args()
+
+    casos = {
+        'lexml_busca.html': (lexml_original, {
+            'bs4': lambda html: extracao._lexml_bs4(html, LEXML_BASE_URL),
+            'lxml': lambda html: extracao._lexml_lxml(html, LEXML_BASE_URL),
+        }),
+        'bnp_busca.html': (bnp_original, {
+            'bs4': lambda html: extracao._bnp_bs4(html, BNP_BASE_URL),
+            'lxml': lambda html: extracao._bnp_lxml(html, BNP_BASE_URL),
+        }),
+    }
+    divergencias = 0
+    for arquivo, (original, parsers) in casos.items():
+        with open(os.path.join(DIRETORIO_HTML, arquivo), encoding='utf-8') as f:
+            html = f.read()
+        referencia, tempo_original = _medir(original, html, args.repeticoes)
+        print(f"{arquivo}: original {tempo_original * 1000:.2f} ms/página")
+        for nome, funcao in parsers.items():
+            if nome == 'lxml' and not extracao.lxml:
+                print(f"  {nome}: lxml não instalado, ignorado")
+                continue
+            resultado, tempo = _medir(funcao, html, args.repeticoes)
+            igual = resultado == referencia
+            divergencias += not igual
+            print(f"  {nome}: {tempo * 1000:.2f} ms/página ({tempo_original / tempo:.1f}x) saída {'idêntica' if igual else 'DIVERGENTE'}")
+    raise SystemExit(1 if divergencias else 0)
+
+if __name__ == '__main__':
+    main()
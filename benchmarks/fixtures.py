@@ -0,0 +1,113 @@
+# benchmarks/fixtures.py - Geradores de páginas HTML sintéticas no formato das fontes reais
+
+import os
+import random
+import argparse
+import itertools
+
+ASSUNTOS = ["Adicional de Periculosidade", "Dano Moral", "Responsabilidade Civil", "Tributário", "Previdenciário",
+            "Servidor Público", "Contratos Bancários", "Direito do Consumidor", "Execução Fiscal", "Improbidade"]
+CLASSES = ["RECURSO CÍVEL", "APELAÇÃO CÍVEL", "AGRAVO DE INSTRUMENTO", "RECURSO ESPECIAL", "HABEAS CORPUS"]
+AUTORIDADES = ["Superior Tribunal de Justiça", "Supremo Tribunal Federal", "Tribunal de Justiça de Santa Catarina",
+               "Tribunal Regional Federal da 4ª Região"]
+
+def _ementa(rng, palavras=60):
+    vocabulario = " ".join(ASSUNTOS + CLASSES).upper().split()
+    return " ".join(rng.choice(vocabulario) for _ in range(palavras)) + "."
+
+def doc_hit_lexml(rng, n):
+    ano = rng.randint(2015, 2024)
+    urn = f"urn:lex:br:superior.tribunal.justica;turma:{ano}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d};{n}"
+    return f"""
+<div class="docHit">
+  <table>
+    <tr><td class="col1">Título</td><td class="col2"><a href="/urn/{urn}">{rng.choice(CLASSES)} Nº {n}</a></td></tr>
+    <tr><td class="col1">URN</td><td class="col2">{urn}</td></tr>
+    <tr><td class="col1">Autoridade</td><td class="col2">{rng.choice(AUTORIDADES)}</td></tr>
+    <tr><td class="col1">Data</td><td class="col2">{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{ano}</td></tr>
+    <tr><td class="col1">Ementa</td><td class="col2">{_ementa(rng)}</td></tr>
+  </table>
+</div>"""
+
+def pagina_lexml(start_doc, total, por_pagina=20, semente=0):
+    """Página de resultados do LexML começando em `start_doc` (base 1) de um universo de `total` documentos."""
+    rng = random.Random(semente * 1_000_003 + start_doc)
+    fim = min(start_doc + por_pagina - 1, total)
+    hits = "".join(doc_hit_lexml(rng, n) for n in range(start_doc, fim + 1))
+    proxima = '<a href="#">Próxima &gt;</a>' if fim < total else ''
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>LexML</title></head>
+<body><div id="resultados">{hits}</div><div class="paginacao">{proxima}</div></body></html>"""
+
+def card_bnp(rng, n):
+    ano = rng.randint(2015, 2024)
+    numero = f"{rng.randint(1000000, 9999999)}-{rng.randint(10, 99)}.{ano}.8.24.{rng.randint(1, 9999):04d}"
+    return f"""
+<app-card-precedente-item>
+  <div class="card">
+    <h5 class="card-title">Tema {n} - {rng.choice(ASSUNTOS)}</h5>
+    <a class="card-title-link" href="/precedentes/{n}">Ver precedente</a>
+    <dl><dt>Órgão Julgador:</dt><dd>{rng.choice(AUTORIDADES)}</dd></dl>
+    <dl><dt>Ramo do Direito:</dt><dd>{rng.choice(ASSUNTOS)}</dd></dl>
+    <dl><dt>Número Único:</dt><dd>{numero}</dd></dl>
+    <dl><dt>Assuntos:</dt><dd>{rng.choice(ASSUNTOS)}, {rng.choice(ASSUNTOS)}</dd></dl>
+    <dl><dt>Data de Julgamento:</dt><dd>{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{ano}</dd></dl>
+    <p class="card-text">{_ementa(rng)}</p>
+  </div>
+</app-card-precedente-item>"""
+
+def pagina_bnp(quantidade=20, semente=0):
+    """Página de resultados do Pangea BNP já renderizada (como em driver.page_source)."""
+    rng = random.Random(semente)
+    cards = "".join(card_bnp(rng, n) for n in range(1, quantidade + 1))
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Pangea BNP</title></head>
+<body><app-root><app-lista-precedentes>{cards}</app-lista-precedentes></app-root></body></html>"""
+
+RELATORES = ["Maria dos Prazeres Beleza", "Nuno Gonçalves", "Fernando Baptista", "Ana Paula Boularot", "Júlio Gomes"]
+MEIOS_PROCESSUAIS = ["REVISTA", "RECURSO PENAL", "HABEAS CORPUS", "AGRAVO", "RECURSO DE REVISÃO"]
+
+def pagina_csm(ecli, semente=0):
+    """Página de decisão do portal de jurisprudência do CSM para o ECLI dado."""
+    rng = random.Random(f"{semente}:{ecli}")
+    partes = ecli.split(':')
+    ano, numero = partes[3], partes[4]
+    processo = numero.replace('.', '/', 1)
+    descritores = [("Processo", processo), ("Relator", rng.choice(RELATORES)),
+                   ("Descritores", f"{rng.choice(ASSUNTOS).upper()}; {rng.choice(ASSUNTOS).upper()}"),
+                   ("Data do Acordão", f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{ano}"),
+                   ("Meio Processual", rng.choice(MEIOS_PROCESSUAIS)), ("Decisão", rng.choice(["NEGADA A REVISTA", "CONCEDIDA A REVISTA"]))]
+    blocos = "".join(f'<div class="descriptor"><span class="content-title">{rotulo}:</span><div class="content">{valor}</div></div>'
+                     for rotulo, valor in descritores)
+    paragrafos = "".join(f"<p>{_ementa(rng, 120)}</p>" for _ in range(rng.randint(3, 8)))
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{ecli}</title></head>
+<body>
+<h1 id="ecli-title">{ecli}</h1>
+<div id="descriptors">{blocos}</div>
+<div id="summary"><h3 class="main-title">Sumário</h3><p>{_ementa(rng)}</p><p>{_ementa(rng, 40)}</p></div>
+<div id="integral-text"><h3 class="main-title">Decisão Texto Integral</h3>{paragrafos}</div>
+</body></html>"""
+
+def escrever_paginas_csm(diretorio, eclis, taxa_ausentes=0.0, semente=0):
+    """Grava uma página por ECLI no formato lido por coletores.ecli.BuscadorDiretorio; uma fração pode ficar ausente."""
+    os.makedirs(diretorio, exist_ok=True)
+    rng = random.Random(semente)
+    gravadas = 0
+    for ecli in eclis:
+        if taxa_ausentes and rng.random() < taxa_ausentes: continue
+        with open(os.path.join(diretorio, ecli.replace(':', '_') + '.html'), 'w', encoding='utf-8') as arquivo:
+            arquivo.write(pagina_csm(ecli, semente))
+        gravadas += 1
+    return gravadas
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera um diretório de páginas do CSM para `flask importar-eclis --origem DIR`.")
+    parser.add_argument('diretorio')
+    parser.add_argument('--eclis', default='eclis.txt')
+    parser.add_argument('--quantidade', type=int, default=1000)
+    parser.add_argument('--ausentes', type=float, default=0.02, help='Fração de ECLIs sem página (contam como não encontrados).')
+    args = parser.parse_args()
+    from coletores.ecli import ler_eclis
+    gravadas = escrever_paginas_csm(args.diretorio, itertools.islice(ler_eclis(args.eclis), args.quantidade), args.ausentes)
+    print(f"{gravadas} páginas gravadas em {args.diretorio}")
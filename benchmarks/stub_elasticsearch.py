@@ -0,0 +1,141 @@
+# benchmarks/stub_elasticsearch.py - Servidor HTTP local que imita as respostas do Elasticsearch usadas pela busca
+#
+# Responde ao ping, à existência do índice, a _search (hits sintéticos, facetas e sugestões) e a _pit, com uma
+# latência configurável. Serve para medir a aplicação (requisições/s, latência) sem depender de um cluster real.
+#
+# Uso: python -m benchmarks.stub_elasticsearch [--porta 9299] [--latencia 0.005] [--documentos 1000]
+
+import json
+import time
+import random
+import argparse
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from benchmarks.fixtures import ASSUNTOS, CLASSES, AUTORIDADES, _ementa
+
+CABECALHOS_ES = {"X-Elastic-Product": "Elasticsearch", "Content-Type": "application/vnd.elasticsearch+json;compatible-with=8"}
+
+def documentos_sinteticos(quantidade, semente=0):
+    rng = random.Random(semente)
+    return [{
+        "id": f"stub-{n}", "titulo": f"{rng.choice(CLASSES)} n. {n}", "link": f"https://exemplo.invalid/doc/{n}",
+        "tipo_documento": "jurisprudencia", "fonte": "LexML", "autoridade": rng.choice(AUTORIDADES),
+        "classe": rng.choice(CLASSES), "assuntos": rng.choice(ASSUNTOS),
+        "data_julgamento": f"{rng.randint(2000, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "ementa": _ementa(rng), "texto_decisao": _ementa(rng, 2000)
+    } for n in range(quantidade)]
+
+def _hit(documento, corpo):
+    fonte = corpo.get("_source")
+    if isinstance(fonte, dict):
+        excluidos = set(fonte.get("excludes", []))
+        incluidos = fonte.get("includes")
+        source = {k: v for k, v in documento.items() if k not in excluidos and (not incluidos or k in incluidos)}
+    else:
+        source = documento
+    hit = {"_index": "jurisprudencia_v1", "_id": documento["id"], "_score": 1.0, "_source": source, "sort": [1.0, documento["id"]]}
+    if "highlight" in corpo: hit["highlight"] = {"ementa": [documento["ementa"][:200]]}
+    return hit
+
+def _agregacoes(corpo, documentos):
+    aggs = {}
+    for nome, definicao in corpo.get("aggs", {}).items():
+        interna = definicao.get("aggs", {}).get("valores", {})
+        if "top_hits" in interna:
+            valores = {"hits": {"hits": [{"_source": {"titulo": d["titulo"]}} for d in documentos[:interna["top_hits"]["size"]]]}}
+        elif "histogram" in interna:
+            valores = {"buckets": [{"key": float(ano), "doc_count": 10} for ano in range(2015, 2025)]}
+        else:
+            campo = interna.get("terms", {}).get("field", nome).split('.')[0]
+            contagem = {}
+            for documento in documentos:
+                valor = documento.get(campo)
+                if valor: contagem[valor] = contagem.get(valor, 0) + 1
+            valores = {"buckets": [{"key": k, "doc_count": v} for k, v in sorted(contagem.items(), key=lambda i: -i[1])[:10]]}
+        aggs[nome] = {"doc_count": len(documentos), "valores": valores}
+    return aggs
+
+def _criar_handler(documentos, latencia):
+    class StubElasticsearchHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        contador = 0
+
+        def _responder(self, status, corpo=None):
+            dados = json.dumps(corpo).encode('utf-8') if corpo is not None else b''
+            self.send_response(status)
+            for nome, valor in CABECALHOS_ES.items():
+                self.send_header(nome, valor)
+            self.send_header('Content-Length', str(len(dados)))
+            self.end_headers()
+            if self.command != 'HEAD': self.wfile.write(dados)
+
+        def _corpo(self):
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(tamanho) or b'{}') if tamanho else {}
+
+        def do_HEAD(self):
+            self._responder(200)
+
+        def do_GET(self):
+            caminho = urlsplit(self.path).path
+            if caminho == '/':
+                return self._responder(200, {"name": "stub", "cluster_name": "stub", "version": {"number": "8.4.2"}, "tagline": "You Know, for Search"})
+            if caminho.startswith('/_cluster/health'):
+                return self._responder(200, {"status": "green"})
+            return self._responder(200, {})
+
+        def do_POST(self):
+            caminho = urlsplit(self.path).path
+            corpo = self._corpo()
+            StubElasticsearchHandler.contador += 1
+            if latencia: time.sleep(latencia)
+            if caminho.endswith('/_pit'):
+                return self._responder(200, {"id": "stub-pit"})
+            if caminho.endswith('/_search'):
+                inicio = corpo.get("from", 0) % max(len(documentos), 1)
+                pagina = documentos[inicio:inicio + corpo.get("size", 10)]
+                resposta = {"took": int(latencia * 1000), "timed_out": False, "hits": {"hits": [_hit(d, corpo) for d in pagina]}}
+                if corpo.get("track_total_hits") is not False: resposta["hits"]["total"] = {"value": len(documentos), "relation": "eq"}
+                if "aggs" in corpo: resposta["aggregations"] = _agregacoes(corpo, documentos)
+                if "pit" in corpo: resposta["pit_id"] = corpo["pit"]["id"]
+                return self._responder(200, resposta)
+            return self._responder(200, {"acknowledged": True})
+
+        do_PUT = do_POST
+
+        def log_message(self, *args):
+            pass
+    return StubElasticsearchHandler
+
+@contextmanager
+def servidor_stub_elasticsearch(documentos=1000, latencia=0.005, porta=0):
+    """Sobe o stub numa porta (livre, por padrão) e devolve a URL para usar como ES_URL."""
+    handler = _criar_handler(documentos_sinteticos(documentos), latencia)
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), handler)
+    servidor.daemon_threads = True
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_address[1]}", handler
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub do Elasticsearch para testes de carga da aplicação.")
+    parser.add_argument('--porta', type=int, default=9299)
+    parser.add_argument('--latencia', type=float, default=0.005, help="latência simulada por busca (s)")
+    parser.add_argument('--documentos', type=int, default=1000)
+    args = parser.parse_args()
+    with servidor_stub_elasticsearch(args.documentos, args.latencia, args.porta) as (url, _):
+        print(f"Stub do Elasticsearch em {url} (Ctrl+C para encerrar)")
+        try:
+            while True: time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/stub_lexml.py - Servidor HTTP local que imita a busca do LexML, para medir a vazão do harvest
+#
+# Uso: python -m benchmarks.stub_lexml [--total 2000] [--latencia 0.2] [--workers 1 4 8] [--taxa 50]
+
+import os
+import argparse
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from benchmarks.fixtures import pagina_lexml
+
+# As páginas sintéticas não vão para o armazém real (data/paginas), de onde o reprocessar-paginas as indexaria.
+os.environ.setdefault('PAGINAS_ARMAZENAR', '0')
+
+def _criar_handler(total, latencia, taxa_erro):
+    class StubLexmlHandler(BaseHTTPRequestHandler):
+        contador = 0
+
+        def do_GET(self):
+            consulta = parse_qs(urlsplit(self.path).query)
+            start_doc = int(consulta.get('startDoc', ['1'])[0])
+            time.sleep(latencia)
+            StubLexmlHandler.contador += 1
+            if taxa_erro and random.random() < taxa_erro:
+                self.send_response(random.choice((429, 503)))
+                self.send_header('Retry-After', '0')
+                self.end_headers()
+                return
+            corpo = pagina_lexml(start_doc, total).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+    return StubLexmlHandler
+
+@contextmanager
+def servidor_stub_lexml(total=2000, latencia=0.2, taxa_erro=0.0):
+    """Sobe o stub numa porta livre e devolve a URL base para usar como `base_url` do harvest."""
+    handler = _criar_handler(total, latencia, taxa_erro)
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_address[1]}", handler
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+def main():
+    from coletores.lexml_scraper import harvest_lexml, RESULTADOS_POR_PAGINA
+    parser = argparse.ArgumentParser(description="Benchmark de vazão do harvest do LexML contra um servidor stub local.")
+    parser.add_argument('--total', type=int, default=2000, help="documentos disponíveis no stub")
+    parser.add_argument('--latencia', type=float, default=0.2, help="latência simulada por página (s)")
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help="fração de respostas 429/503")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--taxa', type=float, default=50, help="requisições por segundo por host")
+    args = parser.parse_args()
+    paginas = -(-args.total // RESULTADOS_POR_PAGINA)
+    with servidor_stub_lexml(args.total, args.latencia, args.taxa_erro) as (base_url, _):
+        for workers in args.workers:
+            inicio = time.perf_counter()
+            documentos = harvest_lexml("dano moral", max_paginas=paginas, workers=workers,
+                                       requisicoes_por_segundo=args.taxa, base_url=base_url)
+            segundos = time.perf_counter() - inicio
+            print(f"workers={workers}: {len(documentos)} documentos, {paginas} páginas em {segundos:.2f}s "
+                  f"({paginas / segundos:.1f} páginas/s, {len(documentos) / segundos:.1f} docs/s)")
+
+if __name__ == '__main__':
+    main()
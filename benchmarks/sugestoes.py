@@ -0,0 +1,47 @@
+# benchmarks/sugestoes.py - Latência do autocompletar (/sugestoes) simulando a digitação das consultas de consultas.txt
+#
+# Cada consulta é "digitada" letra a letra contra a rota /sugestoes (cliente de teste do Flask, ES real), primeiro com
+# o cache de prefixos vazio e depois de novo com ele quente. O índice precisa ter os subcampos .sugestao
+# (flask reconstruir-indice em índices criados antes deles). A meta é p99 abaixo de 20ms por tecla.
+#
+# Uso: ES_URL=http://localhost:9200 python -m benchmarks.sugestoes [--tipo jurisprudencia] [--consultas benchmarks/consultas.txt]
+
+import os
+import time
+import argparse
+
+from elasticsearch import Elasticsearch
+
+import app as aplicacao
+from sugestoes import SUGESTOES_PREFIXO_MINIMO
+from benchmarks.analisador import CONSULTAS_PATH, percentil
+
+def digitar(cliente, consultas, tipo):
+    latencias, vazias = [], 0
+    for consulta in consultas:
+        for fim in range(SUGESTOES_PREFIXO_MINIMO, len(consulta) + 1):
+            inicio = time.perf_counter()
+            resposta = cliente.get('/sugestoes', query_string={'q': consulta[:fim], 'type': tipo})
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if not resposta.get_json()['sugestoes']: vazias += 1
+    return latencias, vazias
+
+def main():
+    parser = argparse.ArgumentParser(description='Mede p50/p99 do autocompletar por tecla, com o cache de prefixos frio e quente.')
+    parser.add_argument('--es', default=os.environ.get('ES_URL', 'http://localhost:9200'))
+    parser.add_argument('--tipo', default='jurisprudencia')
+    parser.add_argument('--consultas', default=CONSULTAS_PATH)
+    args = parser.parse_args()
+
+    aplicacao.es = Elasticsearch(args.es, request_timeout=30)
+    aplicacao.cache_busca.invalidar()
+    with open(args.consultas, encoding='utf-8') as arquivo:
+        consultas = [linha.strip() for linha in arquivo if linha.strip()]
+    cliente = aplicacao.app.test_client()
+    for rotulo in ('cache frio', 'cache quente'):
+        latencias, vazias = digitar(cliente, consultas, args.tipo)
+        print(f"{rotulo}: {len(latencias)} teclas | p50 {percentil(latencias, 50):.2f}ms p95 {percentil(latencias, 95):.2f}ms "
+              f"p99 {percentil(latencias, 99):.2f}ms máx {max(latencias):.2f}ms | {vazias} sem sugestões")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+# benchmarks/suite.py - Suíte offline dos caminhos quentes, com resultado em JSON comparado a uma linha de base
+#
+# Mede, sem rede e sem cluster (Elasticsearch em memória de benchmarks/es_local.py):
+#   datas       normalização de data_julgamento (datas.normalizar_data, que substituiu o extract_year)
+#   extracao    parsers do LexML, do BNP e do CSM sobre as páginas salvas em benchmarks/html
+#   consulta    montagem da consulta e leitura da resposta em buscar(), a página (home) e /api/search
+#   paginacao   get_pagination_range
+#   importacao  leitura + normalização do arquivo JSON e importação completa (duplicatas e _bulk) do corpus sintético
+#
+# O corpus (benchmarks/corpus.py) é gerado em data/benchmarks na primeira execução de cada tamanho. Métricas
+# terminadas em _ms são "menor é melhor" e em _por_segundo "maior é melhor"; uma piora acima de --tolerancia em
+# relação à linha de base (benchmarks/baseline.json, mesmo tamanho de corpus) é listada como regressão e a saída é 1.
+#
+# Uso: python -m benchmarks.suite [--tamanho 10k|100k|1m] [--apenas datas extracao ...] [--saida arquivo.json]
+#                                 [--baseline benchmarks/baseline.json] [--salvar-baseline] [--tolerancia 0.15]
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import itertools
+import subprocess
+import statistics
+
+# Antes de importar a aplicação: sem cache de busca (cada chamada monta a consulta) e sem gravar páginas.
+os.environ.setdefault('CACHE_BUSCA_TTL', '0')
+os.environ.setdefault('PAGINAS_ARMAZENAR', '0')
+
+import app as aplicacao
+from datas import normalizar_data
+from coletores import extracao
+from coletores.arquivo_json import ler_registros
+from benchmarks.analisador import CONSULTAS_PATH, percentil
+from benchmarks.corpus import obter_corpus, tamanho
+from benchmarks.es_local import ClusterLocal
+from benchmarks.extracao import DIRETORIO_HTML, LEXML_BASE_URL, BNP_BASE_URL
+from benchmarks.stub_elasticsearch import documentos_sinteticos
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+RESULTADOS_DIR = os.path.join(os.path.dirname(__file__), 'resultados')
+CSM_ECLI = 'ECLI:PT:STJ:2021:1234.19.0T8LSB.L1.S1'
+# Documentos guardados pelo Elasticsearch em memória na importação (os demais só são contados).
+IMPORTACAO_MAX_DOCUMENTOS = 20_000
+
+def _cronometrar(funcao, repeticoes, aquecimento=3):
+    for _ in range(aquecimento): funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+def _latencias(tempos):
+    return {"p50_ms": round(statistics.median(tempos) * 1000, 3), "p99_ms": round(percentil(tempos, 99) * 1000, 3)}
+
+def _consultas():
+    with open(CONSULTAS_PATH, encoding='utf-8') as arquivo:
+        return [linha.strip() for linha in arquivo if linha.strip()]
+
+def bench_datas(corpus, repeticoes):
+    valores = [r.get('data_julgamento') for r in itertools.islice(ler_registros(corpus), 50_000)]
+    valores += ["12 de março de 2024", "03/10/2019", "março de 2020", "2018", "data inválida"] * 200
+    rodadas = max(1, repeticoes // 20)
+    inicio = time.perf_counter()
+    for _ in range(rodadas):
+        # Cache vazio a cada rodada: mede o parsing, não só os acertos do lru_cache.
+        normalizar_data.cache_clear()
+        for valor in valores: normalizar_data(valor)
+    segundos = time.perf_counter() - inicio
+    return {"datas_distintas": len(set(valores)), "datas_por_segundo": round(len(valores) * rodadas / segundos)}
+
+def bench_extracao(corpus, repeticoes):
+    paginas = {
+        'lexml': ('lexml_busca.html', lambda html: extracao.extrair_lexml(html, LEXML_BASE_URL)),
+        'bnp': ('bnp_busca.html', lambda html: extracao.extrair_bnp(html, BNP_BASE_URL)),
+        'csm': ('csm_decisao.html', lambda html: extracao.extrair_csm(html, CSM_ECLI, f"https://jurisprudencia.csm.org.pt/ecli/{CSM_ECLI}/")),
+    }
+    resultado = {"parser": "lxml" if extracao.lxml else "bs4"}
+    for fonte, (arquivo, funcao) in paginas.items():
+        with open(os.path.join(DIRETORIO_HTML, arquivo), encoding='utf-8') as f:
+            html = f.read()
+        resultado[f"{fonte}_ms"] = round(statistics.median(_cronometrar(lambda: funcao(html), repeticoes)) * 1000, 3)
+    return resultado
+
+def _com_es_local(documentos):
+    cluster = ClusterLocal()
+    aplicacao.es = cluster.cliente()
+    aplicacao.create_index_if_not_exists()
+    from indexacao import indexar_em_lote
+    indexar_em_lote(aplicacao.es, documentos, aplicacao.INDEX_NAME, rotulo='benchmark')
+    return cluster
+
+def bench_consulta(corpus, repeticoes):
+    _com_es_local(documentos_sinteticos(1000))
+    rng = random.Random(0)
+    consultas = _consultas()
+    resultado = {}
+    buscar = lambda: aplicacao.buscar(rng.choice(consultas), 'jurisprudencia', rng.randint(1, 5), 'relevance', '', '', False)
+    resultado.update({f"buscar_{k}": v for k, v in _latencias(_cronometrar(buscar, repeticoes)).items()})
+    with aplicacao.app.test_client() as cliente:
+        pagina = lambda: cliente.get(f"/?q={rng.choice(consultas)}&page={rng.randint(1, 5)}")
+        api = lambda: cliente.get(f"/api/search?q={rng.choice(consultas)}&page={rng.randint(1, 5)}")
+        resultado.update({f"pagina_{k}": v for k, v in _latencias(_cronometrar(pagina, repeticoes)).items()})
+        resultado.update({f"api_{k}": v for k, v in _latencias(_cronometrar(api, repeticoes)).items()})
+    return resultado
+
+def bench_paginacao(corpus, repeticoes):
+    casos = [(pagina, total) for total in (1, 5, 7, 50, 1000) for pagina in range(1, min(total, 60) + 1)]
+    inicio = time.perf_counter()
+    for _ in range(repeticoes * 10):
+        for pagina, total in casos: aplicacao.get_pagination_range(pagina, total)
+    return {"chamadas_por_segundo": round(len(casos) * repeticoes * 10 / (time.perf_counter() - inicio))}
+
+def bench_importacao(corpus, repeticoes):
+    inicio = time.perf_counter()
+    lidos = sum(1 for _ in aplicacao._documentos_coletados(aplicacao._documentos_do_json(ler_registros(corpus))))
+    leitura = time.perf_counter() - inicio
+    cluster = ClusterLocal(max_documentos=IMPORTACAO_MAX_DOCUMENTOS)
+    aplicacao.es = cluster.cliente()
+    inicio = time.perf_counter()
+    relatorio = aplicacao.importar_arquivo_json(corpus)
+    total = time.perf_counter() - inicio
+    return {
+        "documentos": lidos, "leitura_docs_por_segundo": round(lidos / leitura),
+        "indexados": relatorio['indexados'], "duplicatas": relatorio.get('duplicatas', 0),
+        "importacao_docs_por_segundo": round(lidos / total), "requisicoes_es": cluster.requisicoes,
+    }
+
+BENCHMARKS = {
+    "datas": bench_datas, "extracao": bench_extracao, "consulta": bench_consulta,
+    "paginacao": bench_paginacao, "importacao": bench_importacao,
+}
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def executar(tamanho_corpus, nomes, repeticoes):
+    corpus = obter_corpus(tamanho_corpus)
+    resultados = {}
+    for nome in nomes:
+        inicio = time.perf_counter()
+        print(f"[{nome}] ...", file=sys.stderr)
+        resultados[nome] = BENCHMARKS[nome](corpus, repeticoes)
+        print(f"[{nome}] {time.perf_counter() - inicio:.1f}s {resultados[nome]}", file=sys.stderr)
+    return {
+        "data": time.strftime('%Y-%m-%dT%H:%M:%S'), "commit": _commit(), "tamanho": tamanho_corpus, "repeticoes": repeticoes,
+        "ambiente": {"python": platform.python_version(), "plataforma": platform.platform(), "cpus": os.cpu_count()},
+        "resultados": resultados,
+    }
+
+def _sentido(metrica):
+    if metrica.endswith('_ms'): return -1
+    if metrica.endswith('_por_segundo'): return 1
+    return 0
+
+def comparar(atual, base, tolerancia):
+    """Linhas (grupo, métrica, base, atual, variação, regressão) para as métricas presentes nos dois resultados."""
+    linhas = []
+    for grupo, metricas in atual["resultados"].items():
+        for metrica, valor in metricas.items():
+            anterior = base["resultados"].get(grupo, {}).get(metrica)
+            sentido = _sentido(metrica)
+            if not sentido or not isinstance(anterior, (int, float)) or not anterior: continue
+            variacao = (valor - anterior) / anterior
+            linhas.append((grupo, metrica, anterior, valor, variacao, variacao * sentido < -tolerancia))
+    return linhas
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks offline (corpus sintético e Elasticsearch em memória).")
+    parser.add_argument('--tamanho', type=tamanho, default=10_000, help="Tamanho do corpus: número de decisões ou 10k, 100k, 1m.")
+    parser.add_argument('--apenas', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--repeticoes', type=int, default=200)
+    parser.add_argument('--saida', default=None, help="Arquivo JSON do resultado (padrão: benchmarks/resultados/<data>.json).")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--salvar-baseline', action='store_true', help="Grava este resultado como a nova linha de base.")
+    parser.add_argument('--tolerancia', type=float, default=0.15, help="Piora relativa tolerada antes de apontar regressão.")
+    args = parser.parse_args()
+
+    resultado = executar(args.tamanho, args.apenas, args.repeticoes)
+    saida = args.saida or os.path.join(RESULTADOS_DIR, f"{resultado['data'].replace(':', '')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+    print(f"Resultado em {saida}")
+    if args.salvar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        print(f"Linha de base atualizada: {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("Sem linha de base para comparar (use --salvar-baseline).")
+        return
+    with open(args.baseline, encoding='utf-8') as arquivo:
+        base = json.load(arquivo)
+    if base.get("tamanho") != resultado["tamanho"]:
+        print(f"A linha de base é de um corpus de {base.get('tamanho')} decisões; a comparação da importação não é direta.")
+    linhas = comparar(resultado, base, args.tolerancia)
+    print(f"Comparação com {args.baseline} (commit {base.get('commit')}, {base.get('data')}):")
+    for grupo, metrica, anterior, valor, variacao, regressao in linhas:
+        print(f"  {grupo:10} {metrica:28} {anterior:>12} -> {valor:>12}  {variacao:+7.1%}{'  REGRESSÃO' if regressao else ''}")
+    regressoes = sum(1 for linha in linhas if linha[-1])
+    if regressoes:
+        print(f"{regressoes} métricas pioraram mais de {args.tolerancia:.0%}.")
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+# busca_federada.py - Busca simultânea no índice local e nos coletores ao vivo, com prazo por fonte
+#
+# Cada fonte roda numa thread de um pool compartilhado; os resultados são entregues na ordem em que as fontes
+# respondem, então o índice local aparece de imediato e os coletores chegam depois. Uma fonte que estoura o
+# prazo é reportada como 'timeout' mas continua rodando: o que ela coletar ainda é indexado em segundo plano.
+# O índice local tem um pool próprio, para não esperar na fila atrás de coletas lentas. As coletas ao vivo são
+# compartilhadas: a mesma consulta a um coletor já em andamento não é disparada de novo, e no máximo
+# FEDERADA_MAX_COLETAS ficam em andamento no processo (além disso a fonte responde 'ocupado'). Uma coleta ainda na
+# fila é cancelada quando todos os clientes que a esperavam desconectam.
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from metricas import Histograma
+
+FEDERADA_WORKERS = int(os.environ.get('FEDERADA_WORKERS', 4))
+FEDERADA_WORKERS_INDICE = int(os.environ.get('FEDERADA_WORKERS_INDICE', 4))
+# Coletas ao vivo distintas (coletor, consulta) em andamento ou na fila, no processo.
+FEDERADA_MAX_COLETAS = int(os.environ.get('FEDERADA_MAX_COLETAS', FEDERADA_WORKERS * 2))
+FEDERADA_TIMEOUT_INDICE = float(os.environ.get('FEDERADA_TIMEOUT_INDICE', 2))
+FEDERADA_TIMEOUT_LEXML = float(os.environ.get('FEDERADA_TIMEOUT_LEXML', 20))
+FEDERADA_TIMEOUT_BNP = float(os.environ.get('FEDERADA_TIMEOUT_BNP', 45))
+# Prazo dos demais coletores do registro; FEDERADA_TIMEOUT_<NOME> define o de um coletor específico.
+FEDERADA_TIMEOUT_COLETOR = float(os.environ.get('FEDERADA_TIMEOUT_COLETOR', 30))
+# Quantos documentos cada coletor traz numa busca federada (uma página de resultados).
+FEDERADA_MAX_DOCUMENTOS = int(os.environ.get('FEDERADA_MAX_DOCUMENTOS', 20))
+
+FEDERADA_FONTE_SEGUNDOS = Histograma(
+    'iurisadv_federada_fonte_segundos', 'Tempo até cada fonte da busca federada responder, por fonte e estado (ok, timeout, erro).',
+    ('fonte', 'estado')
+)
+
+_executores = {}
+_executores_lock = threading.Lock()
+
+def _executor_compartilhado(nome, workers):
+    with _executores_lock:
+        if nome not in _executores:
+            _executores[nome] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=nome)
+        return _executores[nome]
+
+def executor_federado():
+    return _executor_compartilhado('federada', FEDERADA_WORKERS)
+
+def executor_indice():
+    """Pool das fontes locais (o índice): consultas curtas, que não disputam threads com as coletas ao vivo."""
+    return _executor_compartilhado('federada-indice', FEDERADA_WORKERS_INDICE)
+
+def executor_indexacao():
+    """Uma thread só: as indexações em segundo plano entram em fila, sem disputar o _bulk entre si."""
+    return _executor_compartilhado('federada-indexacao', 1)
+
+def timeout_da_fonte(nome):
+    padrao = {'indice': FEDERADA_TIMEOUT_INDICE, 'lexml': FEDERADA_TIMEOUT_LEXML, 'bnp': FEDERADA_TIMEOUT_BNP}.get(nome, FEDERADA_TIMEOUT_COLETOR)
+    return float(os.environ.get(f'FEDERADA_TIMEOUT_{nome.upper()}', padrao))
+
+class Fonte:
+    """
+    Uma fonte da busca federada: `buscar()` devolve a lista de documentos; `ao_coletar(documentos)`, se houver,
+    roda em segundo plano (executor_indexacao) com os documentos, mesmo que cheguem depois do prazo.
+    Fontes `locais` rodam em executor_indice; as demais são coletas ao vivo, compartilhadas por `chave` (a consulta).
+    """
+    def __init__(self, nome, buscar, timeout, ao_coletar=None, local=False, chave=None):
+        self.nome, self.buscar, self.timeout, self.ao_coletar = nome, buscar, timeout, ao_coletar
+        self.local, self.chave = local, chave
+
+# (fonte, chave) -> [futuro, buscas esperando por ele]
+_coletas = {}
+_coletas_lock = threading.Lock()
+
+def _submeter_coleta(executor, fonte):
+    """O futuro da coleta (nova ou já em andamento para a mesma consulta), ou None se o limite de coletas foi atingido."""
+    chave = (fonte.nome, fonte.chave)
+    with _coletas_lock:
+        entrada = _coletas.get(chave)
+        if entrada is not None and not entrada[0].done():
+            entrada[1] += 1
+            return entrada[0]
+        for antiga in [c for c, (f, _) in _coletas.items() if f.done()]: del _coletas[antiga]
+        if len(_coletas) >= FEDERADA_MAX_COLETAS: return None
+        futuro = executor.submit(fonte.buscar)
+        _coletas[chave] = [futuro, 1]
+    futuro.add_done_callback(lambda f: _encerrar_coleta(chave, f))
+    if fonte.ao_coletar: futuro.add_done_callback(_ao_terminar(fonte))
+    return futuro
+
+def _encerrar_coleta(chave, futuro):
+    with _coletas_lock:
+        if _coletas.get(chave, [None])[0] is futuro: del _coletas[chave]
+
+def _desistir_da_coleta(fonte, futuro, cancelar):
+    """Uma busca deixou de esperar pela coleta; com `cancelar` (cliente desconectado), a coleta sem mais interessados sai da fila."""
+    chave = (fonte.nome, fonte.chave)
+    with _coletas_lock:
+        entrada = _coletas.get(chave)
+        if entrada is None or entrada[0] is not futuro: return
+        entrada[1] -= 1
+        if entrada[1] > 0 or not cancelar: return
+        # Sai do registro antes de cancelar: uma nova busca pela mesma consulta não recebe o futuro cancelado.
+        del _coletas[chave]
+    # Fora do lock: cancel() chama os callbacks do futuro (_encerrar_coleta) na mesma thread.
+    if not futuro.cancel() and not futuro.done():
+        # Já começou: continua registrada, para ser compartilhada até terminar.
+        with _coletas_lock:
+            _coletas.setdefault(chave, [futuro, 0])
+
+def _processar_coletados(fonte, documentos):
+    try:
+        fonte.ao_coletar(documentos)
+    except Exception as e:
+        print(f"Erro ao processar os documentos coletados de {fonte.nome}: {e}")
+
+def _ao_terminar(fonte):
+    def callback(futuro):
+        if futuro.cancelled() or futuro.exception() is not None: return
+        documentos = futuro.result()
+        # Cópias: o processamento (normalização de datas etc.) não pode alterar os documentos que ainda vão ser enviados ao cliente.
+        if documentos: executor_indexacao().submit(_processar_coletados, fonte, [dict(doc) for doc in documentos])
+    return callback
+
+def buscar_federado(fontes, executor=None):
+    """
+    Dispara todas as fontes e gera um evento por fonte, na ordem em que respondem:
+    {'fonte', 'estado': 'ok' | 'timeout' | 'erro' | 'ocupado', 'documentos', 'segundos'[, 'erro']}.
+    """
+    executor = executor or executor_federado()
+    inicio = time.monotonic()
+    pendentes = {}
+    try:
+        for fonte in fontes:
+            if fonte.local:
+                futuro = executor_indice().submit(fonte.buscar)
+                if fonte.ao_coletar: futuro.add_done_callback(_ao_terminar(fonte))
+            else:
+                futuro = _submeter_coleta(executor, fonte)
+                if futuro is None:
+                    FEDERADA_FONTE_SEGUNDOS.observar(0.0, fonte=fonte.nome, estado='ocupado')
+                    yield {"fonte": fonte.nome, "estado": "ocupado", "documentos": [], "segundos": 0.0}
+                    continue
+            pendentes[futuro] = fonte
+        yield from _aguardar(pendentes, inicio)
+    finally:
+        # Cliente desconectado (o gerador foi fechado): libera as coletas que ainda esperava.
+        for futuro, fonte in pendentes.items():
+            if not fonte.local: _desistir_da_coleta(fonte, futuro, cancelar=True)
+
+def _aguardar(pendentes, inicio):
+    while pendentes:
+        agora = time.monotonic()
+        proximo_prazo = min(inicio + fonte.timeout for fonte in pendentes.values())
+        prontos, _ = wait(pendentes, timeout=max(proximo_prazo - agora, 0), return_when=FIRST_COMPLETED)
+        decorrido = time.monotonic() - inicio
+        for futuro in prontos:
+            fonte = pendentes.pop(futuro)
+            if not fonte.local: _desistir_da_coleta(fonte, futuro, cancelar=False)
+            try:
+                evento = {"fonte": fonte.nome, "estado": "ok", "documentos": futuro.result() or []}
+            except Exception as e:
+                print(f"Erro na busca federada em {fonte.nome}: {e}")
+                evento = {"fonte": fonte.nome, "estado": "erro", "documentos": [], "erro": str(e)}
+            evento["segundos"] = round(decorrido, 3)
+            FEDERADA_FONTE_SEGUNDOS.observar(decorrido, fonte=fonte.nome, estado=evento["estado"])
+            yield evento
+        for futuro, fonte in list(pendentes.items()):
+            if decorrido >= fonte.timeout:
+                del pendentes[futuro]
+                if not fonte.local: _desistir_da_coleta(fonte, futuro, cancelar=False)
+                FEDERADA_FONTE_SEGUNDOS.observar(decorrido, fonte=fonte.nome, estado='timeout')
+                yield {"fonte": fonte.nome, "estado": "timeout", "documentos": [], "segundos": round(decorrido, 3)}
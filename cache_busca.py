@@ -0,0 +1,69 @@
+# cache_busca.py - Cache LRU/TTL de resultados de busca, invalidado por contador de geração
+#
+# Cada entrada guarda a geração em que foi criada; toda importação/refresh do índice incrementa a geração,
+# o que invalida de uma vez todas as entradas anteriores sem precisar percorrê-las.
+# O TTL limita por quanto tempo um processo pode servir resultados de uma importação feita por outro processo.
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+CACHE_BUSCA_ITENS = int(os.environ.get('CACHE_BUSCA_ITENS', 1024))
+CACHE_BUSCA_TTL = float(os.environ.get('CACHE_BUSCA_TTL', 60))
+
+def chave_busca(query, search_type, page, sort_order, year_min, year_max, selecao=(), limite_contagem=None, pagina_inicial=False):
+    """Normaliza os parâmetros da busca para que variações triviais (caixa, espaços) caiam na mesma entrada."""
+    return (' '.join(query.lower().split()), search_type, page, sort_order, year_min.strip(), year_max.strip(), selecao,
+            limite_contagem, pagina_inicial)
+
+def chave_facetas(query, search_type, year_min, year_max, selecao=()):
+    """As contagens das facetas não dependem da página nem da ordenação: uma entrada serve a toda a paginação."""
+    return ('facetas', ' '.join(query.lower().split()), search_type, year_min.strip(), year_max.strip(), selecao)
+
+class CacheBusca:
+    def __init__(self, max_itens=CACHE_BUSCA_ITENS, ttl=CACHE_BUSCA_TTL):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.geracao = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.metricas = {"acertos": 0, "falhas": 0, "expirados": 0, "invalidados": 0, "removidos_lru": 0}
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.metricas["falhas"] += 1
+                return None
+            geracao, expira, valor = item
+            if geracao != self.geracao or expira < time.monotonic():
+                del self._itens[chave]
+                self.metricas["invalidados" if geracao != self.geracao else "expirados"] += 1
+                self.metricas["falhas"] += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.metricas["acertos"] += 1
+            return valor
+
+    def guardar(self, chave, valor, geracao=None):
+        """`geracao` deve ser a lida antes da consulta ao ES, para não guardar um resultado anterior a uma invalidação."""
+        with self._lock:
+            if geracao is not None and geracao != self.geracao: return
+            self._itens[chave] = (self.geracao, time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.metricas["removidos_lru"] += 1
+
+    def invalidar(self):
+        with self._lock:
+            self.geracao += 1
+
+    def resumo(self):
+        with self._lock:
+            consultas = self.metricas["acertos"] + self.metricas["falhas"]
+            return {
+                **self.metricas, "itens": len(self._itens), "geracao": self.geracao,
+                "taxa_de_acerto": round(self.metricas["acertos"] / consultas, 4) if consultas else 0.0
+            }
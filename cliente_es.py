@@ -0,0 +1,52 @@
+# cliente_es.py - Cliente do Elasticsearch configurável por ambiente e espera pelo cluster na inicialização
+#
+# Cada processo (worker do gunicorn) cria o seu cliente depois do fork: o pool de conexões do urllib3 não pode ser
+# compartilhado entre processos. O pool deve ter pelo menos tantas conexões quanto as threads do worker.
+
+import os
+import time
+import random
+
+from elasticsearch import Elasticsearch
+
+ES_URL = os.environ.get('ES_URL', 'http://elasticsearch:9200')
+ES_POOL_CONEXOES = int(os.environ.get('ES_POOL_CONEXOES', 10))
+ES_TIMEOUT = float(os.environ.get('ES_TIMEOUT', 10))
+ES_TENTATIVAS = int(os.environ.get('ES_TENTATIVAS', 3))
+ES_RETRY_EM_TIMEOUT = os.environ.get('ES_RETRY_EM_TIMEOUT', '1') == '1'
+ES_COMPRIMIR = os.environ.get('ES_COMPRIMIR', '0') == '1'
+# Espera pelo cluster na inicialização: backoff exponencial com jitter, até ES_ESPERA_MAXIMA segundos no total.
+ES_ESPERA_MAXIMA = float(os.environ.get('ES_ESPERA_MAXIMA', 120))
+
+def criar_cliente(url=None, conexoes=None, timeout=None, tentativas=None):
+    return Elasticsearch(
+        url or ES_URL,
+        connections_per_node=conexoes or ES_POOL_CONEXOES,
+        request_timeout=timeout or ES_TIMEOUT,
+        max_retries=ES_TENTATIVAS if tentativas is None else tentativas,
+        retry_on_timeout=ES_RETRY_EM_TIMEOUT,
+        http_compress=ES_COMPRIMIR,
+    )
+
+def aguardar_elasticsearch(es, espera_maxima=None, espera_inicial=0.5, espera_teto=10):
+    """Tenta es.ping() com backoff exponencial (0.5s, 1s, 2s... até `espera_teto`). Retorna True quando o cluster responde."""
+    espera_maxima = ES_ESPERA_MAXIMA if espera_maxima is None else espera_maxima
+    limite = time.monotonic() + espera_maxima
+    espera, tentativa = espera_inicial, 0
+    while True:
+        tentativa += 1
+        try:
+            if es.ping():
+                print(f"Conectado ao Elasticsearch com sucesso (tentativa {tentativa}).")
+                return True
+            erro = "sem resposta"
+        except Exception as e:
+            erro = e
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            print(f"Não foi possível conectar ao Elasticsearch em {espera_maxima:.0f}s ({erro}). A aplicação pode não funcionar.")
+            return False
+        pausa = min(espera, espera_teto, restante) * random.uniform(0.8, 1.2)
+        print(f"Tentativa {tentativa} - Elasticsearch indisponível ({erro}); nova tentativa em {pausa:.1f}s.")
+        time.sleep(pausa)
+        espera *= 2
@@ -0,0 +1,77 @@
+# coletores/arquivo_json.py - Leitura em streaming de arquivos JSON de jurisprudência
+
+import gzip
+import json
+
+TAMANHO_BLOCO = 64 * 1024
+_ESPACOS = ' \t\r\n'
+
+def abrir_arquivo(caminho):
+    """Abre o arquivo em modo texto, descompactando gzip automaticamente (pelos bytes mágicos)."""
+    with open(caminho, 'rb') as f:
+        compactado = f.read(2) == b'\x1f\x8b'
+    if compactado:
+        return gzip.open(caminho, 'rt', encoding='utf-8-sig')
+    return open(caminho, 'r', encoding='utf-8-sig')
+
+def _pular(buffer, pos, caracteres):
+    while pos < len(buffer) and buffer[pos] in caracteres:
+        pos += 1
+    return pos
+
+def _registros_do_array(f, buffer, tamanho_bloco):
+    """Decodifica um elemento por vez de um array JSON de nível superior, lendo o arquivo em blocos."""
+    decoder = json.JSONDecoder()
+    pos = 1  # pula o '[' inicial
+    fim_do_arquivo = False
+    while True:
+        pos = _pular(buffer, pos, _ESPACOS + ',')
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        if pos < len(buffer):
+            try:
+                registro, pos = decoder.raw_decode(buffer, pos)
+                yield registro
+                if pos > tamanho_bloco:
+                    buffer, pos = buffer[pos:], 0
+                continue
+            except json.JSONDecodeError:
+                if fim_do_arquivo: raise
+        elif fim_do_arquivo:
+            raise ValueError("Array JSON não foi fechado antes do fim do arquivo.")
+        bloco = f.read(tamanho_bloco)
+        fim_do_arquivo = not bloco
+        buffer, pos = buffer[pos:] + bloco, 0
+
+def _registros_ndjson(f, buffer):
+    """Um objeto JSON por linha (NDJSON/JSONL); linhas em branco são ignoradas."""
+    resto = f.readline()
+    for linha in _linhas(buffer + resto, f):
+        linha = linha.strip()
+        if linha:
+            yield json.loads(linha)
+
+def _linhas(inicio, f):
+    # Só '\n' separa registros: str.splitlines() também quebraria em U+0085, U+2028 e U+2029,
+    # que podem aparecer sem escape dentro de strings JSON. O último pedaço (linha parcial, se houver) é mantido.
+    yield from inicio.split('\n')
+    yield from f
+
+def ler_registros(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera os registros de um arquivo JSON sem carregá-lo inteiro na memória.
+    Aceita um array JSON de nível superior ou NDJSON/JSONL, opcionalmente compactados com gzip.
+    """
+    with abrir_arquivo(caminho) as f:
+        buffer = ''
+        while True:
+            bloco = f.read(tamanho_bloco)
+            if not bloco: return
+            buffer += bloco
+            inicio = _pular(buffer, 0, _ESPACOS)
+            if inicio < len(buffer): break
+        buffer = buffer[inicio:]
+        if buffer[0] == '[':
+            yield from _registros_do_array(f, buffer, tamanho_bloco)
+        else:
+            yield from _registros_ndjson(f, buffer)
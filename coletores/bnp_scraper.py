@@ -1,34 +1,30 @@
 # coletores/bnp_scraper.py - Módulo para o scraper do Pangea BNP com Selenium em Python
 
-import time
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from urllib.parse import quote
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 import traceback
 
-def scrape_bnp(termo_de_busca):
-    """
-    Controla um navegador headless para buscar e extrair precedentes do Pangea BNP.
-    """
-    print("\n--- INICIANDO SCRAPER PANGEA BNP (Python/Selenium) ---")
-    
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/5.37.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+from coletores.extracao import extrair_bnp
+from coletores.navegadores import pool_padrao
+from coletores.paginas import guardar_pagina
+from coletores.registro import Coletor
+from metricas import COLETA_ETAPA_SEGUNDOS
 
-    driver = None
-    try:
-        # O chromedriver está no PATH do sistema, o Selenium o encontrará.
-        driver = webdriver.Chrome(options=chrome_options)
-        documentos = []
-        url = f"https://pangeabnp.pdpj.jus.br/precedentes?q={termo_de_busca}"
-        print(f"Acessando: {url}")
+BNP_BASE_URL = "https://pangeabnp.pdpj.jus.br"
+
+def parse_pagina_bnp(page_source):
+    """Extrai os precedentes de uma página de resultados já renderizada."""
+    documentos = extrair_bnp(page_source, BNP_BASE_URL)
+    print(f"Encontrados {len(documentos)} resultados na página.")
+    return documentos
+
+def buscar_na_sessao(driver, termo_de_busca):
+    """Executa uma busca num navegador já aberto e devolve os precedentes encontrados."""
+    url = f"{BNP_BASE_URL}/precedentes?q={quote(termo_de_busca)}"
+    print(f"Acessando: {url}")
+    with COLETA_ETAPA_SEGUNDOS.cronometrar(fonte='bnp', etapa='fetch'):
         driver.get(url)
 
         print("Aguardando o carregamento dinâmico dos resultados...")
@@ -36,55 +32,52 @@ def scrape_bnp(termo_de_busca):
         WebDriverWait(driver, 30).until(
             EC.presence_of_element_located((By.TAG_NAME, "app-card-precedente-item"))
         )
-        print("Página carregada, iniciando extração.")
-
         page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
+    guardar_pagina('bnp', url, page_source, base_url=BNP_BASE_URL)
+    print("Página carregada, iniciando extração.")
+    with COLETA_ETAPA_SEGUNDOS.cronometrar(fonte='bnp', etapa='parse'):
+        return parse_pagina_bnp(page_source)
+
+def scrape_bnp_varios(termos_de_busca, pool=None):
+    """
+    Executa várias buscas em sequência no mesmo navegador emprestado do pool.
+    Retorna um dicionário termo -> lista de documentos (lista vazia se a busca falhar).
+    """
+    print("\n--- INICIANDO SCRAPER PANGEA BNP (Python/Selenium) ---")
+    resultados = {}
+    try:
+        with (pool or pool_padrao()).emprestar() as driver:
+            for termo in termos_de_busca:
+                try:
+                    resultados[termo] = buscar_na_sessao(driver, termo)
+                except Exception as e:
+                    print(f"Erro na busca do BNP por '{termo}': {e}")
+                    resultados[termo] = []
+    except Exception as e:
+        print(f"ERRO CRÍTICO no scraper do BNP: {e}")
+        traceback.print_exc()
+    print(f"--- SCRAPER BNP FINALIZADO --- Total coletado: {sum(len(docs) for docs in resultados.values())}")
+    return resultados
 
-        resultados = soup.find_all('app-card-precedente-item')
-        print(f"Encontrados {len(resultados)} resultados na página.")
+def scrape_bnp(termo_de_busca, pool=None):
+    """
+    Busca e extrai precedentes do Pangea BNP usando um navegador headless do pool.
+    """
+    return scrape_bnp_varios([termo_de_busca], pool).get(termo_de_busca, [])
 
-        for item in resultados:
-            try:
-                titulo_tag = item.find('h5', class_='card-title')
-                link_tag = item.find('a', class_='card-title-link')
-                if not (titulo_tag and link_tag): continue
+class ColetorBNP(Coletor):
+    """Precedentes do Pangea BNP (registro 'bnp'), com navegadores headless do pool; vários termos usam a mesma sessão."""
 
-                titulo = titulo_tag.get_text(strip=True)
-                link = link_tag['href']
+    def buscar(self, termo, max_documentos=None):
+        documentos = scrape_bnp(termo)
+        return documentos[:max_documentos] if max_documentos else documentos
 
-                detalhes = {
-                    dl.find('dt').get_text(strip=True): dl.find('dd').get_text(strip=True)
-                    for dl in item.find_all('dl') if dl.find('dt') and dl.find('dd')
-                }
-                
-                ementa_tag = item.find('p', class_='card-text')
-                ementa = ementa_tag.get_text(strip=True) if ementa_tag else ''
-                original_date_str = detalhes.get('Data de Julgamento:', '')
-                numero_unico = detalhes.get('Número Único:', '')
-                doc_id = f"BNP-{numero_unico}" if numero_unico else f"BNP-{hash(titulo)}"
+    def coletar(self, termos, relatorio=None):
+        if len(termos) == 1: return scrape_bnp(termos[0])
+        return [doc for docs in scrape_bnp_varios(termos).values() for doc in docs]
 
-                documento = {
-                    "tipo_documento": "precedente", "id": doc_id, "titulo": titulo,
-                    "link": f"https://pangeabnp.pdpj.jus.br{link}", "fonte": "Pangea BNP",
-                    "data_julgamento": original_date_str,
-                    "orgaoJulgador": detalhes.get('Órgão Julgador:', ''),
-                    "ramoDireito": detalhes.get('Ramo do Direito:', ''),
-                    "numeroUnico": numero_unico, "assuntos": detalhes.get('Assuntos:', ''), "ementa": ementa
-                }
-                documentos.append(documento)
-            except Exception as e:
-                print(f"Erro ao processar um item individual do BNP: {e}")
-        
-        print(f"--- SCRAPER BNP FINALIZADO --- Total coletado: {len(documentos)}")
-        return documentos
-    
-    except Exception as e:
-        print(f"ERRO CRÍTICO no scraper do BNP: {e}")
-        traceback.print_exc()
-        return []
-    finally:
-        if driver:
-            driver.quit()
-            print("Navegador Selenium finalizado.")
+    def extrair(self, html, url, contexto):
+        return extrair_bnp(html, contexto.get('base_url') or BNP_BASE_URL)
 
+    def aquecer(self):
+        pool_padrao().aquecer()
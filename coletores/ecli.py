@@ -0,0 +1,273 @@
+# coletores/ecli.py - Coleta em lote de decisões a partir de uma lista de ECLIs (ex.: eclis.txt)
+#
+# A lista é lida em streaming; as páginas são buscadas com paralelismo limitado (janela fixa de requisições em voo)
+# e cada ECLI concluído é gravado num checkpoint SQLite, de modo que uma coleta interrompida recomeça de onde parou.
+# O buscador é plugável: o portal do CSM em produção ou um diretório local de páginas salvas.
+
+import os
+import re
+import time
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from coletores.extracao import extrair_csm
+from coletores.rede import criar_sessao
+from coletores.paginas import guardar_pagina
+from coletores.registro import Coletor
+from metricas import COLETA_ETAPA_SEGUNDOS
+
+CSM_BASE_URL = os.environ.get('CSM_BASE_URL', 'https://jurisprudencia.csm.org.pt')
+# O portal já serviu certificado inválido (os indexadores em Node desligam a verificação); CSM_VERIFICAR_TLS=0 faz o mesmo.
+CSM_VERIFICAR_TLS = os.environ.get('CSM_VERIFICAR_TLS', '1') != '0'
+ECLI_WORKERS = int(os.environ.get('ECLI_WORKERS', 8))
+ECLI_REQUISICOES_POR_SEGUNDO = float(os.environ.get('ECLI_REQUISICOES_POR_SEGUNDO', 5))
+ECLI_CHECKPOINT_PATH = os.environ.get('ECLI_CHECKPOINT_PATH', os.path.join('data', 'ecli_checkpoint.sqlite3'))
+# Intervalo entre as linhas de progresso impressas durante a coleta.
+ECLI_RELATORIO_SEGUNDOS = float(os.environ.get('ECLI_RELATORIO_SEGUNDOS', 10))
+
+INDEXADO, NAO_ENCONTRADO, ERRO = 'indexado', 'nao_encontrado', 'erro'
+
+# Como o de util/ecli.js, mas sem o quantificador aninhado (backtracking) e aceitando minúsculas no número,
+# que aparecem em ECLIs reais do STJ (ex.: ...:05B3951ver.ac.rd.o.T.R.B5).
+_RE_ECLI = re.compile(r'^ECLI:[A-Z]{2}:[A-Z]+:\d{4}:[A-Za-z0-9.]+$')
+
+def ler_eclis(caminho, relatorio=None):
+    """Gera os ECLIs válidos do arquivo (um por linha), sem repetições. Linhas inválidas são contadas em relatorio['invalidos']."""
+    vistos = set()
+    invalidos = 0
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            ecli = linha.strip()
+            if not ecli or ecli in vistos: continue
+            if not _RE_ECLI.match(ecli):
+                invalidos += 1
+                if relatorio is not None: relatorio['invalidos'] = invalidos
+                continue
+            vistos.add(ecli)
+            yield ecli
+
+class BuscadorCSM:
+    """Busca a página de cada ECLI no portal de jurisprudência do CSM."""
+
+    def __init__(self, base_url=None, workers=None, requisicoes_por_segundo=None):
+        self.base_url = (base_url or CSM_BASE_URL).rstrip('/')
+        self.sessao = criar_sessao(pool_size=workers or ECLI_WORKERS, taxa=requisicoes_por_segundo or ECLI_REQUISICOES_POR_SEGUNDO)
+
+    def url(self, ecli):
+        return f"{self.base_url}/ecli/{ecli}/"
+
+    def __call__(self, ecli):
+        """Retorna (url, html), com html None se o ECLI não existe na fonte."""
+        url = self.url(ecli)
+        response = self.sessao.get(url, timeout=30, verify=CSM_VERIFICAR_TLS)
+        if response.status_code == 404: return url, None
+        response.raise_for_status()
+        guardar_pagina('csm', url, response.text, ecli=ecli)
+        return url, response.text
+
+class BuscadorDiretorio:
+    """Lê as páginas de um diretório local (<ECLI com ':' trocado por '_'>.html), no lugar da fonte remota."""
+
+    def __init__(self, diretorio, base_url=None):
+        self.diretorio = diretorio
+        self.base_url = (base_url or CSM_BASE_URL).rstrip('/')
+
+    def caminho(self, ecli):
+        return os.path.join(self.diretorio, ecli.replace(':', '_') + '.html')
+
+    def __call__(self, ecli):
+        url = f"{self.base_url}/ecli/{ecli}/"
+        try:
+            with open(self.caminho(ecli), encoding='utf-8') as arquivo:
+                return url, arquivo.read()
+        except FileNotFoundError:
+            return url, None
+
+def criar_buscador(origem=None, workers=None, requisicoes_por_segundo=None):
+    """Um diretório existente vira BuscadorDiretorio; qualquer outro valor é a URL base do portal."""
+    if origem and os.path.isdir(origem):
+        return BuscadorDiretorio(origem)
+    return BuscadorCSM(origem, workers, requisicoes_por_segundo)
+
+class ColetorCSM(Coletor):
+    """
+    Decisões do portal do CSM (registro 'csm'), uma por ECLI. A importação em massa, retomável, fica em ColetaECLI;
+    aqui cada termo é um ECLI, buscado diretamente na fonte.
+    """
+    def __init__(self, origem=None):
+        self._origem = origem
+        self._buscador = None
+
+    def _buscar_ecli(self, ecli):
+        if self._buscador is None: self._buscador = criar_buscador(self._origem)
+        url, html = self._buscador(ecli)
+        return self.extrair(html, url, {"ecli": ecli}) if html else []
+
+    def buscar(self, termo, max_documentos=None):
+        return self._buscar_ecli(termo.strip()) if _RE_ECLI.match(termo.strip()) else []
+
+    def _coletar_ecli(self, ecli):
+        try:
+            return self._buscar_ecli(ecli)
+        except Exception as e:
+            print(f"Erro ao coletar o ECLI {ecli}: {e}")
+            return []
+
+    def coletar(self, termos, relatorio=None, workers=None):
+        eclis = [t.strip() for t in termos if _RE_ECLI.match(t.strip())]
+        return [doc for _, docs in _em_paralelo(eclis, self._coletar_ecli, workers or ECLI_WORKERS) for doc in docs]
+
+    def extrair(self, html, url, contexto):
+        documento = extrair_csm(html, contexto['ecli'], url)
+        return [documento] if documento else []
+
+class CheckpointECLI:
+    """Estado de cada ECLI já processado (indexado, não encontrado ou com erro), persistido em SQLite."""
+
+    def __init__(self, caminho=ECLI_CHECKPOINT_PATH):
+        diretorio = os.path.dirname(caminho)
+        if diretorio: os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS eclis (ecli TEXT PRIMARY KEY, estado TEXT NOT NULL, "
+                "tentativas INTEGER NOT NULL DEFAULT 1, erro TEXT, atualizado REAL NOT NULL)"
+            )
+
+    def concluidos(self, repetir_erros=True):
+        estados = (INDEXADO, NAO_ENCONTRADO) if repetir_erros else (INDEXADO, NAO_ENCONTRADO, ERRO)
+        with self._lock:
+            linhas = self._conn.execute(f"SELECT ecli FROM eclis WHERE estado IN ({','.join('?' * len(estados))})", estados)
+            return {linha[0] for linha in linhas}
+
+    def pendentes(self, eclis, repetir_erros=True):
+        concluidos = self.concluidos(repetir_erros)
+        return (ecli for ecli in eclis if ecli not in concluidos)
+
+    def marcar(self, registros):
+        """Grava uma lista de (ecli, estado, erro)."""
+        if not registros: return
+        agora = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO eclis (ecli, estado, erro, atualizado) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(ecli) DO UPDATE SET estado = excluded.estado, erro = excluded.erro, "
+                "atualizado = excluded.atualizado, tentativas = tentativas + 1",
+                [(ecli, estado, erro, agora) for ecli, estado, erro in registros]
+            )
+
+    def resumo(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT estado, COUNT(*) FROM eclis GROUP BY estado").fetchall())
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+def _em_paralelo(itens, funcao, workers, janela=None):
+    """Aplica `funcao` com no máximo `janela` itens em voo, devolvendo (item, resultado) na ordem de entrada."""
+    janela = janela or workers * 4
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        em_voo = deque()
+        for item in itens:
+            em_voo.append((item, executor.submit(funcao, item)))
+            if len(em_voo) >= janela:
+                item_pronto, futuro = em_voo.popleft()
+                yield item_pronto, futuro.result()
+        while em_voo:
+            item_pronto, futuro = em_voo.popleft()
+            yield item_pronto, futuro.result()
+
+class ColetaECLI:
+    """
+    Uma passagem de coleta: `documentos(eclis)` gera os documentos para a indexação em lote; `ao_confirmar(ok, id)`,
+    passado a indexar_em_lote, registra o resultado de cada documento pelo _id, e `ao_indexar(relatorio)` (ao_progredir)
+    grava no checkpoint os ECLIs já confirmados pelo _bulk.
+    """
+
+    def __init__(self, buscador, checkpoint, workers=None, ao_progredir=None):
+        self.buscador = buscador
+        self.checkpoint = checkpoint
+        self.workers = workers or ECLI_WORKERS
+        self.ao_progredir = ao_progredir
+        self.relatorio = {"processados": 0, "indexados": 0, "nao_encontrados": 0, "erros_coleta": 0, "erros_indexacao": 0,
+                          "segundos": 0.0, "eclis_por_segundo": 0.0, "ultimos_erros": []}
+        # _id do documento enviado -> ECLI, até o _bulk responder por ele.
+        self._enviados = {}
+        self._a_marcar = []
+        self._inicio = time.perf_counter()
+        self._ultimo_relatorio = self._inicio
+
+    def _coletar(self, ecli):
+        try:
+            with COLETA_ETAPA_SEGUNDOS.cronometrar(fonte='csm', etapa='fetch'):
+                url, html = self.buscador(ecli)
+            if html is None: return NAO_ENCONTRADO, None
+            with COLETA_ETAPA_SEGUNDOS.cronometrar(fonte='csm', etapa='parse'):
+                documento = extrair_csm(html, ecli, url)
+            return (INDEXADO, documento) if documento else (NAO_ENCONTRADO, None)
+        except Exception as e:
+            return ERRO, str(e)
+
+    def documentos(self, eclis):
+        for ecli, (estado, resultado) in _em_paralelo(eclis, self._coletar, self.workers):
+            self.relatorio["processados"] += 1
+            if estado == INDEXADO:
+                self._enviados[resultado['id']] = ecli
+                yield resultado
+            elif estado == NAO_ENCONTRADO:
+                self.relatorio["nao_encontrados"] += 1
+                self._a_marcar.append((ecli, NAO_ENCONTRADO, None))
+            else:
+                self.relatorio["erros_coleta"] += 1
+                self._a_marcar.append((ecli, ERRO, resultado))
+                self._registrar_erro(ecli, resultado)
+            if len(self._a_marcar) >= 500: self.salvar()
+            self._reportar()
+
+    def ao_confirmar(self, ok, doc_id):
+        """Resultado do _bulk para um documento, identificado pelo _id (as respostas não vêm na ordem de envio)."""
+        ecli = self._enviados.pop(doc_id, None)
+        if ecli is None: return
+        if ok:
+            self.relatorio["indexados"] += 1
+            self._a_marcar.append((ecli, INDEXADO, None))
+        else:
+            self.relatorio["erros_indexacao"] += 1
+            self._a_marcar.append((ecli, ERRO, 'falha na indexação'))
+            self._registrar_erro(ecli, 'falha na indexação')
+
+    def ao_indexar(self, relatorio_indexacao=None):
+        """Grava no checkpoint os ECLIs confirmados até aqui."""
+        self.salvar()
+
+    def salvar(self):
+        self.checkpoint.marcar(self._a_marcar)
+        self._a_marcar = []
+
+    def finalizar(self):
+        # Os ECLIs ainda em self._enviados não tiveram resposta do _bulk: ficam fora do checkpoint e são refeitos depois.
+        self.salvar()
+        self._reportar(forcar=True)
+        return self.relatorio
+
+    def _registrar_erro(self, ecli, erro):
+        ultimos = self.relatorio["ultimos_erros"]
+        ultimos.append({"ecli": ecli, "erro": erro})
+        if len(ultimos) > 20: del ultimos[0]
+
+    def _reportar(self, forcar=False):
+        agora = time.perf_counter()
+        if not forcar and agora - self._ultimo_relatorio < ECLI_RELATORIO_SEGUNDOS: return
+        self._ultimo_relatorio = agora
+        r = self.relatorio
+        r["segundos"] = agora - self._inicio
+        r["eclis_por_segundo"] = r["processados"] / r["segundos"] if r["segundos"] > 0 else 0.0
+        print(f"ECLI: {r['processados']} processados ({r['indexados']} indexados, {r['nao_encontrados']} não encontrados, "
+              f"{r['erros_coleta']} erros de coleta, {r['erros_indexacao']} erros de indexação) - "
+              f"{r['eclis_por_segundo']:.1f} ECLIs/s em {r['segundos']:.0f}s")
+        if self.ao_progredir: self.ao_progredir(r)
@@ -0,0 +1,252 @@
+# coletores/extracao.py - Extração rápida das páginas do LexML, do Pangea BNP e do portal de jurisprudência do CSM
+#
+# Usa lxml (árvore em C + XPath pré-compilado) quando disponível e cai para o BeautifulSoup caso contrário.
+# Nos dois casos cada item é percorrido uma única vez, montando um mapa rótulo -> valor,
+# em vez de uma busca com lambda por campo que recalcula o texto de cada <td>.
+
+import os
+
+from duplicatas import hash_estavel
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+PARSER = os.environ.get('COLETORES_PARSER', 'lxml' if lxml else 'bs4')
+ROTULOS_LEXML = ('Título', 'URN', 'Data', 'Autoridade', 'Ementa')
+
+def _classe(nome):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {nome} ')"
+
+if lxml:
+    _XP_DOC_HIT = etree.XPath(f"//div[{_classe('docHit')}]")
+    _XP_PROXIMA = etree.XPath("//a[contains(string(.), 'Próxima')]")
+    _XP_CARD_BNP = etree.XPath("//app-card-precedente-item")
+    _XP_TITULO_BNP = etree.XPath(f".//h5[{_classe('card-title')}]")
+    _XP_LINK_BNP = etree.XPath(f".//a[{_classe('card-title-link')}]")
+    _XP_EMENTA_BNP = etree.XPath(f".//p[{_classe('card-text')}]")
+
+def _texto_strip(elemento):
+    """Equivalente ao get_text(strip=True) do BeautifulSoup: cada trecho aparado, vazios descartados."""
+    return ''.join(s.strip() for s in elemento.itertext() if s.strip())
+
+def _escolher(pares, rotulo):
+    for texto_rotulo, valor in pares:
+        if rotulo in texto_rotulo:
+            return valor
+    return None
+
+def _documento_lexml(doc_id, titulo, href, data, autoridade, ementa, base_url):
+    return {
+        "tipo_documento": "jurisprudencia",
+        "id": doc_id,
+        "titulo": titulo,
+        "ementa": ementa,
+        "data_julgamento": data,
+        "autoridade": autoridade,
+        "link": f"{base_url}{href}",
+        "fonte": "LexML"
+    }
+
+def _lexml_lxml(html, base_url):
+    try:
+        raiz = lxml.html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return [], False
+    documentos = []
+    for item in _XP_DOC_HIT(raiz):
+        try:
+            # Um único passe: cada <td> seguido de outro <td> é um par rótulo -> valor.
+            pares = []
+            for td in item.iter('td'):
+                valor = td.getnext()
+                while valor is not None and valor.tag != 'td':
+                    valor = valor.getnext()
+                if valor is not None:
+                    pares.append((td.text_content(), valor))
+            campos = {rotulo: _escolher(pares, rotulo) for rotulo in ROTULOS_LEXML}
+            if campos['Título'] is None or campos['URN'] is None: continue
+            doc_id = campos['URN'].text_content().strip()
+            link = next(campos['Título'].iter('a'), None)
+            if not (doc_id and link is not None) or link.get('href') is None: continue
+            texto = {r: (campos[r].text_content().strip() if campos[r] is not None else '') for r in ('Data', 'Autoridade', 'Ementa')}
+            documentos.append(_documento_lexml(
+                doc_id, link.text_content().strip(), link.get('href'),
+                texto['Data'], texto['Autoridade'], texto['Ementa'], base_url
+            ))
+        except Exception as e:
+            print(f"Erro ao processar item do LexML: {e}")
+    return documentos, bool(_XP_PROXIMA(raiz))
+
+def _lexml_bs4(html, base_url):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    documentos = []
+    for item in soup.find_all('div', class_='docHit'):
+        try:
+            pares = []
+            for td in item.find_all('td'):
+                valor = td.find_next_sibling('td')
+                if valor is not None:
+                    pares.append((td.text, valor))
+            campos = {rotulo: _escolher(pares, rotulo) for rotulo in ROTULOS_LEXML}
+            if campos['Título'] is None or campos['URN'] is None: continue
+            doc_id = campos['URN'].text.strip()
+            link = campos['Título'].find('a')
+            if not (doc_id and link) or not link.has_attr('href'): continue
+            texto = {r: (campos[r].text.strip() if campos[r] is not None else '') for r in ('Data', 'Autoridade', 'Ementa')}
+            documentos.append(_documento_lexml(
+                doc_id, link.text.strip(), link['href'],
+                texto['Data'], texto['Autoridade'], texto['Ementa'], base_url
+            ))
+        except Exception as e:
+            print(f"Erro ao processar item do LexML: {e}")
+    proxima = soup.find('a', string=lambda text: text and 'Próxima' in text.strip())
+    return documentos, proxima is not None
+
+def extrair_lexml(html, base_url):
+    """Documentos de uma página de resultados do LexML. Retorna (documentos, tem_proxima_pagina)."""
+    if PARSER == 'lxml' and lxml:
+        return _lexml_lxml(html, base_url)
+    return _lexml_bs4(html, base_url)
+
+def _documento_bnp(titulo, link, detalhes, ementa, base_url):
+    numero_unico = detalhes.get('Número Único:', '')
+    return {
+        "tipo_documento": "precedente", "id": f"BNP-{numero_unico}" if numero_unico else f"BNP-{hash_estavel(titulo)}", "titulo": titulo,
+        "link": f"{base_url}{link}", "fonte": "Pangea BNP",
+        "data_julgamento": detalhes.get('Data de Julgamento:', ''),
+        "orgaoJulgador": detalhes.get('Órgão Julgador:', ''),
+        "ramoDireito": detalhes.get('Ramo do Direito:', ''),
+        "numeroUnico": numero_unico, "assuntos": detalhes.get('Assuntos:', ''), "ementa": ementa
+    }
+
+def _bnp_lxml(html, base_url):
+    try:
+        raiz = lxml.html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return []
+    documentos = []
+    for item in _XP_CARD_BNP(raiz):
+        try:
+            titulo_tag = next(iter(_XP_TITULO_BNP(item)), None)
+            link_tag = next(iter(_XP_LINK_BNP(item)), None)
+            if titulo_tag is None or link_tag is None or link_tag.get('href') is None: continue
+            detalhes = {}
+            for dl in item.iter('dl'):
+                dt, dd = next(dl.iter('dt'), None), next(dl.iter('dd'), None)
+                if dt is not None and dd is not None:
+                    detalhes[_texto_strip(dt)] = _texto_strip(dd)
+            ementa_tag = next(iter(_XP_EMENTA_BNP(item)), None)
+            ementa = _texto_strip(ementa_tag) if ementa_tag is not None else ''
+            documentos.append(_documento_bnp(_texto_strip(titulo_tag), link_tag.get('href'), detalhes, ementa, base_url))
+        except Exception as e:
+            print(f"Erro ao processar um item individual do BNP: {e}")
+    return documentos
+
+def _bnp_bs4(html, base_url):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    documentos = []
+    for item in soup.find_all('app-card-precedente-item'):
+        try:
+            titulo_tag = item.find('h5', class_='card-title')
+            link_tag = item.find('a', class_='card-title-link')
+            if not (titulo_tag and link_tag) or not link_tag.has_attr('href'): continue
+            detalhes = {}
+            for dl in item.find_all('dl'):
+                dt, dd = dl.find('dt'), dl.find('dd')
+                if dt and dd:
+                    detalhes[dt.get_text(strip=True)] = dd.get_text(strip=True)
+            ementa_tag = item.find('p', class_='card-text')
+            ementa = ementa_tag.get_text(strip=True) if ementa_tag else ''
+            documentos.append(_documento_bnp(titulo_tag.get_text(strip=True), link_tag['href'], detalhes, ementa, base_url))
+        except Exception as e:
+            print(f"Erro ao processar um item individual do BNP: {e}")
+    return documentos
+
+def extrair_bnp(html, base_url):
+    """Precedentes de uma página de resultados do Pangea BNP já renderizada."""
+    if PARSER == 'lxml' and lxml:
+        return _bnp_lxml(html, base_url)
+    return _bnp_bs4(html, base_url)
+
+# Páginas de decisão do portal de jurisprudência do CSM (uma por ECLI).
+TRIBUNAIS_ECLI = {
+    'STJ': 'Supremo Tribunal de Justiça', 'TRL': 'Tribunal da Relação de Lisboa', 'TRP': 'Tribunal da Relação do Porto',
+    'TRC': 'Tribunal da Relação de Coimbra', 'TRE': 'Tribunal da Relação de Évora', 'TRG': 'Tribunal da Relação de Guimarães'
+}
+SECOES_CSM = ('ecli-title', 'summary', 'parcial-text', 'integral-text')
+
+if lxml:
+    _XP_TITULOS_CSM = etree.XPath(f"//*[@id='descriptors']//*[{_classe('content-title')}]")
+    _XP_CONTEUDO_CSM = etree.XPath(f"..//*[{_classe('content')}]")
+    _XP_MAIN_TITLE = etree.XPath(f".//*[{_classe('main-title')}]")
+    _XP_SECOES_CSM = {secao: etree.XPath(f"//*[@id='{secao}']") for secao in SECOES_CSM}
+
+def _rotulo_csm(texto):
+    return ' '.join(texto.replace(':', '').split())
+
+def _documento_csm(ecli, url, descritores, secoes):
+    tribunal = ecli.split(':')[2] if ecli.count(':') >= 4 else ''
+    processo = descritores.get('Processo', '')
+    return {
+        "tipo_documento": "jurisprudencia", "id": ecli, "ecli": ecli, "numero_processo": processo,
+        "titulo": f"Acórdão {tribunal} - Processo {processo}" if processo else ecli,
+        "autoridade": descritores.get('Relator', ''), "orgaoJulgador": TRIBUNAIS_ECLI.get(tribunal, tribunal),
+        "data_julgamento": descritores.get('Data do Acordão') or descritores.get('Data do Acórdão', ''),
+        "classe": descritores.get('Meio Processual', ''), "assuntos": descritores.get('Descritores', ''),
+        "decisao": descritores.get('Decisão', ''), "ementa": secoes.get('summary', ''),
+        "texto_decisao": secoes.get('integral-text') or secoes.get('parcial-text', ''),
+        "link": url, "fonte": "Jurisprudência CSM"
+    }
+
+def _texto_em_linhas(elemento):
+    return '\n'.join(s.strip() for s in elemento.itertext() if s.strip())
+
+def _csm_lxml(html, ecli, url):
+    try:
+        raiz = lxml.html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+    descritores = {}
+    for titulo in _XP_TITULOS_CSM(raiz):
+        conteudo = next(iter(_XP_CONTEUDO_CSM(titulo)), None)
+        if conteudo is not None:
+            descritores[_rotulo_csm(titulo.text_content())] = _texto_em_linhas(conteudo)
+    secoes = {}
+    for secao, xpath in _XP_SECOES_CSM.items():
+        elemento = next(iter(xpath(raiz)), None)
+        if elemento is None: continue
+        for titulo in _XP_MAIN_TITLE(elemento):
+            titulo.drop_tree()
+        secoes[secao] = _texto_em_linhas(elemento)
+    if not descritores and 'ecli-title' not in secoes: return None
+    return _documento_csm(ecli, url, descritores, secoes)
+
+def _csm_bs4(html, ecli, url):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    descritores = {}
+    bloco = soup.find(id='descriptors')
+    for titulo in (bloco.find_all(class_='content-title') if bloco else []):
+        conteudo = titulo.parent.find(class_='content')
+        if conteudo is not None:
+            descritores[_rotulo_csm(titulo.get_text())] = conteudo.get_text('\n', strip=True)
+    secoes = {}
+    for secao in SECOES_CSM:
+        elemento = soup.find(id=secao)
+        if elemento is None: continue
+        for titulo in elemento.find_all(class_='main-title'):
+            titulo.decompose()
+        secoes[secao] = elemento.get_text('\n', strip=True)
+    if not descritores and 'ecli-title' not in secoes: return None
+    return _documento_csm(ecli, url, descritores, secoes)
+
+def extrair_csm(html, ecli, url):
+    """Documento de uma página de decisão do portal do CSM, ou None se a página não contém uma decisão."""
+    if PARSER == 'lxml' and lxml:
+        return _csm_lxml(html, ecli, url)
+    return _csm_bs4(html, ecli, url)
@@ -1,83 +1,119 @@
 # coletores/lexml_scraper.py - Módulo para o scraper do LexML
 
-import requests
-from bs4 import BeautifulSoup
-import time
+import os
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
 import traceback
 
-def scrape_lexml(termo_de_busca):
+from coletores.extracao import extrair_lexml
+from coletores.rede import criar_sessao
+from coletores.paginas import guardar_pagina
+from coletores.registro import Coletor
+from metricas import COLETA_ETAPA_SEGUNDOS
+
+LEXML_BASE_URL = os.environ.get('LEXML_BASE_URL', 'https://www.lexml.gov.br')
+RESULTADOS_POR_PAGINA = 20
+# Configuração padrão do modo de coleta em massa (harvest).
+LEXML_MAX_PAGINAS = int(os.environ.get('LEXML_MAX_PAGINAS', 50))
+LEXML_WORKERS = int(os.environ.get('LEXML_WORKERS', 4))
+LEXML_REQUISICOES_POR_SEGUNDO = float(os.environ.get('LEXML_REQUISICOES_POR_SEGUNDO', 2))
+LEXML_ANO_INICIAL = int(os.environ.get('LEXML_ANO_INICIAL', 2015))
+
+def url_busca_lexml(termo_de_busca, start_doc, ano_inicial, ano_final, base_url=None):
+    keyword_com_data = f"{termo_de_busca};;year={ano_inicial};year-max={ano_final}"
+    return f"{base_url or LEXML_BASE_URL}/busca/search?keyword={quote(keyword_com_data, safe=';=')}&f1-tipoDocumento=Jurisprudência&startDoc={start_doc}"
+
+def parse_pagina_lexml(html, base_url=None):
+    """Extrai os documentos de uma página de resultados. Retorna (documentos, tem_proxima_pagina)."""
+    return extrair_lexml(html, base_url or LEXML_BASE_URL)
+
+def harvest_lexml(termo_de_busca, max_paginas=None, ano_inicial=None, ano_final=None, workers=None,
+                  requisicoes_por_segundo=None, base_url=None, sessao=None, relatorio=None):
     """
-    Raspa dados de jurisprudência do LexML.
-    Esta lógica foi resgatada do seu app_py_fixed.py original e funcional.
+    Coleta em massa: busca os offsets `startDoc` em paralelo, em ondas de `workers` páginas,
+    com uma Session com pool de conexões, retry com backoff em 429/5xx e limite de taxa por host (compartilhado
+    com as demais coletas do processo; uma `sessao` passada pelo chamador traz o seu próprio limite).
+    Para na primeira página vazia ou sem link "Próxima".
+    Se `relatorio` (dict) for passado, recebe 'completo': True quando todos os resultados foram percorridos.
     """
-    print("\n--- INICIANDO SCRAPER LEXML (Python) ---")
-    documentos = []
-    try:
-        total_coletado = 0
-        ano_inicial, ano_atual = 2015, datetime.now().year
-        keyword_com_data = f"{termo_de_busca};;year={ano_inicial};year-max={ano_atual}"
-        start_doc = 1
-        max_documentos = 20 # Limite para uma busca rápida
-        continuar = True
+    relatorio = relatorio if relatorio is not None else {}
+    relatorio['completo'] = False
+    max_paginas = max_paginas or LEXML_MAX_PAGINAS
+    ano_inicial = ano_inicial or LEXML_ANO_INICIAL
+    ano_final = ano_final or datetime.now().year
+    workers = workers or LEXML_WORKERS
+    sessao = sessao or criar_sessao(pool_size=workers, taxa=requisicoes_por_segundo or LEXML_REQUISICOES_POR_SEGUNDO)
 
-        while continuar and total_coletado < max_documentos:
-            url = f"https://www.lexml.gov.br/busca/search?keyword={keyword_com_data}&f1-tipoDocumento=Jurisprudência&startDoc={start_doc}"
+    def buscar_pagina(pagina):
+        url = url_busca_lexml(termo_de_busca, 1 + pagina * RESULTADOS_POR_PAGINA, ano_inicial, ano_final, base_url)
+        try:
             print(f"Buscando em: {url}")
-            
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}, timeout=30)
-            print(f"Status da resposta: {response.status_code}")
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            resultados = soup.find_all('div', class_='docHit')
-            print(f"Encontrados {len(resultados)} resultados nesta página.")
-            
-            if not resultados:
-                break
+            with COLETA_ETAPA_SEGUNDOS.cronometrar(fonte='lexml', etapa='fetch'):
+                response = sessao.get(url, timeout=30)
+                response.raise_for_status()
+            guardar_pagina('lexml', url, response.text, base_url=base_url or LEXML_BASE_URL)
+            with COLETA_ETAPA_SEGUNDOS.cronometrar(fonte='lexml', etapa='parse'):
+                return parse_pagina_lexml(response.text, base_url)
+        except Exception as e:
+            # Uma página com falha encerra a coleta, mas mantém o que já foi obtido.
+            print(f"Erro ao buscar página do LexML ({url}): {e}")
+            return None, False
 
-            for item in resultados:
-                try:
-                    titulo_tag = item.find(lambda t: t.name == 'td' and 'Título' in t.text)
-                    urn_tag = item.find(lambda t: t.name == 'td' and 'URN' in t.text)
-                    if not (titulo_tag and urn_tag): continue
-                    
-                    doc_id = urn_tag.find_next_sibling('td').text.strip()
-                    titulo_link_tag = titulo_tag.find_next_sibling('td').find('a')
-                    if not (doc_id and titulo_link_tag): continue
-                    
-                    data_tag = item.find(lambda t: t.name == 'td' and 'Data' in t.text)
-                    autoridade_tag = item.find(lambda t: t.name == 'td' and 'Autoridade' in t.text)
-                    ementa_tag = item.find(lambda t: t.name == 'td' and 'Ementa' in t.text)
-                    
-                    original_date_str = data_tag.find_next_sibling('td').text.strip() if data_tag else ''
-                    
-                    documento = {
-                        "tipo_documento": "jurisprudencia",
-                        "id": doc_id,
-                        "titulo": titulo_link_tag.text.strip(),
-                        "ementa": ementa_tag.find_next_sibling('td').text.strip() if ementa_tag else '',
-                        "data_julgamento": original_date_str,
-                        "autoridade": autoridade_tag.find_next_sibling('td').text.strip() if autoridade_tag else '',
-                        "link": f"https://www.lexml.gov.br{titulo_link_tag['href']}",
-                        "fonte": "LexML"
-                    }
-                    documentos.append(documento)
-                    total_coletado += 1
-                except Exception as e:
-                    print(f"Erro ao processar item do LexML: {e}")
+    documentos = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pagina = 0
+        while pagina < max_paginas:
+            onda = range(pagina, min(pagina + workers, max_paginas))
+            # executor.map devolve na ordem dos offsets, então a ordem dos resultados é preservada.
+            for documentos_pagina, tem_proxima in executor.map(buscar_pagina, onda):
+                if documentos_pagina is None:
+                    return documentos
+                documentos.extend(documentos_pagina)
+                if not documentos_pagina or not tem_proxima:
+                    relatorio['completo'] = True
+                    return documentos
+            pagina += len(onda)
+    return documentos
 
-            link_proxima = soup.find('a', string=lambda text: text and 'Próxima' in text.strip())
-            if link_proxima and total_coletado < max_documentos:
-                start_doc += 20
-                time.sleep(1)
-            else:
-                continuar = False
-        
-        print(f"--- SCRAPER LEXML FINALIZADO --- Total coletado: {total_coletado}")
+def scrape_lexml(termo_de_busca, max_documentos=20, ano_inicial=None, ano_final=None, max_paginas=None, relatorio=None):
+    """
+    Raspa dados de jurisprudência do LexML.
+    Por padrão faz uma busca rápida (max_documentos); com max_paginas usa o modo de coleta em massa.
+    """
+    print("\n--- INICIANDO SCRAPER LEXML (Python) ---")
+    try:
+        if max_paginas is None:
+            max_paginas = -(-max_documentos // RESULTADOS_POR_PAGINA)
+        else:
+            max_documentos = None
+        documentos = harvest_lexml(termo_de_busca, max_paginas=max_paginas, ano_inicial=ano_inicial, ano_final=ano_final, relatorio=relatorio)
+        if max_documentos is not None and len(documentos) > max_documentos:
+            if relatorio is not None: relatorio['completo'] = False
+            documentos = documentos[:max_documentos]
+        print(f"--- SCRAPER LEXML FINALIZADO --- Total coletado: {len(documentos)}")
         return documentos
     except Exception as e:
         print(f"Erro GERAL durante importação do LexML: {e}")
         traceback.print_exc()
         return []
 
+class ColetorLexML(Coletor):
+    """Jurisprudência do LexML (registro 'lexml'): busca rápida de uma página ou coleta em massa por janela de anos."""
+
+    def buscar(self, termo, max_documentos=None):
+        return scrape_lexml(termo, max_documentos=max_documentos or RESULTADOS_POR_PAGINA)
+
+    def coletar(self, termos, relatorio=None, max_paginas=None, ano_inicial=None, ano_final=None):
+        """`relatorio` recebe 'completo_por_termo' ({termo: completo}) e 'completo' (todos os termos percorridos)."""
+        relatorio = relatorio if relatorio is not None else {}
+        documentos, completos = [], {}
+        for termo in termos:
+            coleta = {}
+            documentos.extend(scrape_lexml(termo, max_paginas=max_paginas, ano_inicial=ano_inicial, ano_final=ano_final, relatorio=coleta))
+            completos[termo] = coleta.get('completo', False)
+        relatorio.update(completo_por_termo=completos, completo=all(completos.values()))
+        return documentos
+
+    def extrair(self, html, url, contexto):
+        return parse_pagina_lexml(html, contexto.get('base_url'))[0]
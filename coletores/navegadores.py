@@ -0,0 +1,258 @@
+# coletores/navegadores.py - Pool limitado de navegadores headless (Selenium) reutilizáveis
+
+import os
+import atexit
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem limite entre processos
+    fcntl = None
+
+BNP_POOL_TAMANHO = int(os.environ.get('BNP_POOL_TAMANHO', 2))
+BNP_POOL_MAX_USOS = int(os.environ.get('BNP_POOL_MAX_USOS', 50))
+BNP_POOL_TIMEOUT = float(os.environ.get('BNP_POOL_TIMEOUT', 120))
+# Limite de navegadores somando todos os processos da máquina (os workers do gunicorn têm um pool cada); 0 = sem limite
+# global, só o BNP_POOL_TAMANHO de cada pool. Navegadores ociosos há mais de BNP_POOL_OCIOSO segundos são fechados para
+# liberar a vaga para outro processo.
+BNP_NAVEGADORES_MAX = int(os.environ.get('BNP_NAVEGADORES_MAX', 0))
+BNP_NAVEGADORES_VAGAS_PATH = os.environ.get('BNP_NAVEGADORES_VAGAS_PATH', os.path.join('data', 'navegadores'))
+BNP_POOL_OCIOSO = float(os.environ.get('BNP_POOL_OCIOSO', 300))
+USER_AGENT_CHROME = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/5.37.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+def criar_chrome():
+    """Inicia um Chrome headless. O chromedriver está no PATH do sistema, o Selenium o encontrará."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument(f"user-agent={USER_AGENT_CHROME}")
+    return webdriver.Chrome(options=chrome_options)
+
+class VagasGlobais:
+    """
+    `total` vagas compartilhadas entre processos: cada vaga é um arquivo em `diretorio`, travado com flock enquanto um
+    navegador a ocupa. O kernel solta a trava se o processo morrer, então uma vaga nunca fica presa.
+    """
+
+    def __init__(self, total, diretorio=BNP_NAVEGADORES_VAGAS_PATH):
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminhos = [os.path.join(diretorio, f"vaga-{i}.lock") for i in range(total)]
+
+    def ocupar(self):
+        """Trava uma vaga livre e devolve o descritor, ou None se todas estiverem ocupadas."""
+        for caminho in self.caminhos:
+            fd = os.open(caminho, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    @staticmethod
+    def liberar(fd):
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+def vagas_padrao():
+    """As vagas globais configuradas em BNP_NAVEGADORES_MAX, ou None sem limite entre processos."""
+    if BNP_NAVEGADORES_MAX <= 0 or fcntl is None: return None
+    return VagasGlobais(BNP_NAVEGADORES_MAX)
+
+class PoolNavegadores:
+    """
+    Mantém até `tamanho` navegadores abertos e os empresta um por vez.
+    Cada navegador passa por um health check ao ser emprestado e é reciclado após `max_usos` empréstimos.
+    `_vivos` conta os navegadores abertos ou em criação (emprestados, livres e os do aquecimento): nenhum caminho
+    cria um navegador sem antes reservar uma vaga nessa contagem.
+    Com `vagas_globais`, cada navegador também ocupa uma das vagas compartilhadas com os outros processos, e os ociosos
+    há mais de `ocioso` segundos são fechados para devolvê-las.
+    """
+
+    def __init__(self, tamanho=BNP_POOL_TAMANHO, max_usos=BNP_POOL_MAX_USOS, fabrica=criar_chrome,
+                 vagas_globais=None, ocioso=BNP_POOL_OCIOSO):
+        self.tamanho = tamanho
+        self.max_usos = max_usos
+        self.fabrica = fabrica
+        self.vagas_globais = vagas_globais
+        self.ocioso = ocioso
+        self._livres = queue.LifoQueue()  # LIFO: reaproveita o navegador mais "quente"
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self._usos = {}
+        self._devolvidos = {}  # id(driver) -> momento em que voltou ao pool
+        self._globais = {}  # id(driver) -> descritor da vaga global
+        self._vivos = 0
+        self._lock = threading.Lock()
+        self._fechado = False
+        if vagas_globais is not None:
+            threading.Thread(target=self._recolher_ociosos, daemon=True, name='navegadores-ociosos').start()
+
+    def _reservar(self):
+        """Reserva uma vaga local e, se houver, uma global; devolve o descritor da global (ou True) ou None."""
+        with self._lock:
+            if self._vivos >= self.tamanho: return None
+            self._vivos += 1
+        if self.vagas_globais is None: return True
+        fd = self.vagas_globais.ocupar()
+        if fd is None:
+            with self._lock:
+                self._vivos -= 1
+        return fd
+
+    def _criar(self, reserva):
+        """Cria um navegador na vaga reservada com _reservar."""
+        inicio = time.perf_counter()
+        try:
+            driver = self.fabrica()
+        except BaseException:
+            self._liberar(reserva)
+            raise
+        with self._lock:
+            self._usos[id(driver)] = 0
+            if reserva is not True: self._globais[id(driver)] = reserva
+        print(f"Navegador iniciado em {time.perf_counter() - inicio:.1f}s.")
+        return driver
+
+    def _liberar(self, reserva):
+        with self._lock:
+            self._vivos -= 1
+        if reserva is not True and reserva is not None:
+            self.vagas_globais.liberar(reserva)
+
+    def _descartar(self, driver):
+        with self._lock:
+            self._usos.pop(id(driver), None)
+            self._devolvidos.pop(id(driver), None)
+            reserva = self._globais.pop(id(driver), True)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Erro ao finalizar navegador: {e}")
+        finally:
+            self._liberar(reserva)
+
+    @staticmethod
+    def saudavel(driver):
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _obter(self, timeout):
+        limite = time.monotonic() + timeout
+        while True:
+            try:
+                driver = self._livres.get_nowait()
+            except queue.Empty:
+                reserva = self._reservar()
+                if reserva is not None: return self._criar(reserva)
+                # Todas as vagas estão ocupadas por navegadores ainda em aquecimento (ou sendo devolvidos), ou as vagas
+                # globais estão com outros processos: espera um navegador livre, tentando a reserva de novo a cada 0,5s.
+                restante = limite - time.monotonic()
+                if restante <= 0: raise TimeoutError(f"Nenhum navegador livre no pool após {timeout}s.")
+                try:
+                    driver = self._livres.get(timeout=min(restante, 0.5))
+                except queue.Empty:
+                    continue
+            if self.saudavel(driver):
+                return driver
+            print("Navegador do pool não respondeu ao health check; substituindo.")
+            self._descartar(driver)
+
+    def _devolver(self, driver):
+        with self._lock:
+            self._usos[id(driver)] = usos = self._usos.get(id(driver), 0) + 1
+        if self._fechado or usos >= self.max_usos or not self.saudavel(driver):
+            self._descartar(driver)
+            return
+        try:
+            driver.get("about:blank")
+            driver.delete_all_cookies()
+        except Exception:
+            self._descartar(driver)
+            return
+        with self._lock:
+            self._devolvidos[id(driver)] = time.monotonic()
+        self._livres.put(driver)
+
+    def _recolher_ociosos(self):
+        """Fecha os navegadores livres há mais de `ocioso` segundos, devolvendo as vagas globais que ocupam."""
+        while not self._fechado:
+            time.sleep(min(30.0, self.ocioso))
+            manter = []
+            while True:
+                try:
+                    driver = self._livres.get_nowait()
+                except queue.Empty:
+                    break
+                with self._lock:
+                    devolvido = self._devolvidos.get(id(driver), time.monotonic())
+                if time.monotonic() - devolvido > self.ocioso:
+                    self._descartar(driver)
+                else:
+                    manter.append(driver)
+            for driver in reversed(manter):  # preserva a ordem LIFO
+                self._livres.put(driver)
+
+    @contextmanager
+    def emprestar(self, timeout=BNP_POOL_TIMEOUT):
+        """Empresta um navegador; espera até `timeout` segundos se todos estiverem em uso."""
+        if self._fechado:
+            raise RuntimeError("O pool de navegadores foi fechado.")
+        if not self._vagas.acquire(timeout=timeout):
+            raise TimeoutError(f"Nenhum navegador livre no pool após {timeout}s.")
+        driver = None
+        try:
+            driver = self._obter(timeout)
+            yield driver
+        finally:
+            if driver is not None:
+                self._devolver(driver)
+            self._vagas.release()
+
+    def aquecer(self, quantidade=None):
+        """
+        Inicia navegadores antecipadamente para que a primeira busca não pague o custo de startup. Cada um ocupa uma
+        vaga do pool enquanto é criado, então aquecimento e empréstimos simultâneos nunca passam de `tamanho`.
+        """
+        quantidade = min(quantidade or self.tamanho, self.tamanho)
+        while self._livres.qsize() < quantidade:
+            if not self._vagas.acquire(blocking=False): return  # todos emprestados: nada a aquecer
+            try:
+                reserva = self._reservar()
+                if reserva is None: return
+                driver = self._criar(reserva)
+                with self._lock:
+                    self._devolvidos[id(driver)] = time.monotonic()
+                self._livres.put(driver)
+            finally:
+                self._vagas.release()
+
+    def fechar(self):
+        self._fechado = True
+        while True:
+            try:
+                self._descartar(self._livres.get_nowait())
+            except queue.Empty:
+                break
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def pool_padrao():
+    """Pool compartilhado pelo processo, criado no primeiro uso e fechado na saída."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PoolNavegadores(vagas_globais=vagas_padrao())
+            atexit.register(_pool.fechar)
+        return _pool
@@ -0,0 +1,185 @@
+# coletores/paginas.py - Armazém das páginas brutas coletadas e reprocessamento offline dos parsers
+#
+# Cada página buscada (LexML, Pangea BNP, CSM) é gravada comprimida (zstd se o pacote zstandard estiver
+# instalado, gzip caso contrário) num arquivo nomeado pelo SHA-256 do conteúdo: páginas idênticas ocupam um
+# único arquivo. Um índice SQLite registra cada busca (fonte, URL, momento, hash e o contexto que o parser precisa).
+# O reprocessamento roda o `extrair` do coletor de cada fonte (coletores/registro.py) sobre a última versão de cada
+# URL num pool de processos, sem acessar as fontes.
+
+import os
+import gzip
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from coletores.registro import obter_coletor
+
+PAGINAS_PATH = os.environ.get('PAGINAS_PATH', os.path.join('data', 'paginas'))
+# PAGINAS_ARMAZENAR=0 desliga a gravação das páginas pelos coletores.
+PAGINAS_ARMAZENAR = os.environ.get('PAGINAS_ARMAZENAR', '1') == '1'
+PAGINAS_COMPRESSAO = os.environ.get('PAGINAS_COMPRESSAO', 'zstd' if zstandard else 'gzip')
+PAGINAS_WORKERS = int(os.environ.get('PAGINAS_WORKERS', os.cpu_count() or 2))
+PAGINAS_LOTE = int(os.environ.get('PAGINAS_LOTE', 200))
+
+EXTENSOES = {'zstd': '.zst', 'gzip': '.gz'}
+
+def _comprimir(dados, compressao):
+    if compressao == 'zstd': return zstandard.ZstdCompressor(level=10).compress(dados)
+    return gzip.compress(dados, compresslevel=6)
+
+def _descomprimir(dados, compressao):
+    if compressao == 'zstd':
+        if zstandard is None: raise RuntimeError("Página comprimida com zstd, mas o pacote zstandard não está instalado.")
+        return zstandard.ZstdDecompressor().decompress(dados)
+    return gzip.decompress(dados)
+
+def caminho_objeto(diretorio, hash_pagina, compressao):
+    return os.path.join(diretorio, 'objetos', hash_pagina[:2], hash_pagina + EXTENSOES[compressao])
+
+def ler_objeto(diretorio, hash_pagina, compressao):
+    with open(caminho_objeto(diretorio, hash_pagina, compressao), 'rb') as arquivo:
+        return _descomprimir(arquivo.read(), compressao).decode('utf-8')
+
+class ArmazemPaginas:
+    def __init__(self, diretorio=PAGINAS_PATH, compressao=PAGINAS_COMPRESSAO):
+        if compressao not in EXTENSOES: raise ValueError(f"Compressão desconhecida: {compressao}")
+        if compressao == 'zstd' and zstandard is None: compressao = 'gzip'
+        self.diretorio, self.compressao = diretorio, compressao
+        os.makedirs(os.path.join(diretorio, 'objetos'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(diretorio, 'indice.sqlite3'), check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS paginas (fonte TEXT NOT NULL, url TEXT NOT NULL, buscada REAL NOT NULL, "
+                "hash TEXT NOT NULL, compressao TEXT NOT NULL, tamanho INTEGER NOT NULL, contexto TEXT NOT NULL DEFAULT '{}', "
+                "PRIMARY KEY (fonte, url, buscada))"
+            )
+
+    def guardar(self, fonte, url, conteudo, contexto=None, buscada=None):
+        """Grava a página (uma vez por conteúdo distinto) e registra a busca. Retorna o hash do conteúdo."""
+        dados = conteudo.encode('utf-8')
+        hash_pagina = hashlib.sha256(dados).hexdigest()
+        caminho = caminho_objeto(self.diretorio, hash_pagina, self.compressao)
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporario, 'wb') as arquivo:
+                arquivo.write(_comprimir(dados, self.compressao))
+            os.replace(temporario, caminho)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO paginas (fonte, url, buscada, hash, compressao, tamanho, contexto) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (fonte, url, buscada or time.time(), hash_pagina, self.compressao, len(dados),
+                 json.dumps(contexto or {}, ensure_ascii=False, sort_keys=True))
+            )
+        return hash_pagina
+
+    def ler(self, hash_pagina):
+        with self._lock:
+            linha = self._conn.execute("SELECT compressao FROM paginas WHERE hash = ? LIMIT 1", (hash_pagina,)).fetchone()
+        if linha is None: return None
+        return ler_objeto(self.diretorio, hash_pagina, linha[0])
+
+    def ultimas(self, fontes=None):
+        """(fonte, url, hash, compressao, contexto) da busca mais recente de cada URL, na ordem em que foram buscadas."""
+        filtro, parametros = '', ()
+        if fontes:
+            filtro = f"WHERE fonte IN ({','.join('?' * len(fontes))})"
+            parametros = tuple(fontes)
+        with self._lock:
+            # Com MAX() no SQLite, as demais colunas vêm da mesma linha do máximo (a busca mais recente).
+            linhas = self._conn.execute(
+                f"SELECT fonte, url, hash, compressao, contexto, MAX(buscada) AS ultima FROM paginas {filtro} "
+                f"GROUP BY fonte, url ORDER BY ultima", parametros
+            ).fetchall()
+        return [(fonte, url, hash_pagina, compressao, json.loads(contexto)) for fonte, url, hash_pagina, compressao, contexto, _ in linhas]
+
+    def resumo(self):
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT fonte, COUNT(*), COUNT(DISTINCT url), COUNT(DISTINCT hash), SUM(tamanho) FROM paginas GROUP BY fonte"
+            ).fetchall()
+        return {fonte: {"buscas": buscas, "urls": urls, "conteudos": conteudos, "bytes_originais": tamanho}
+                for fonte, buscas, urls, conteudos, tamanho in linhas}
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+_armazem = None
+_armazem_lock = threading.Lock()
+
+def armazem_padrao():
+    global _armazem
+    with _armazem_lock:
+        if _armazem is None:
+            _armazem = ArmazemPaginas()
+        return _armazem
+
+def guardar_pagina(fonte, url, conteudo, **contexto):
+    """Chamado pelos coletores após cada busca; uma falha no armazém não interrompe a coleta."""
+    if not PAGINAS_ARMAZENAR or not conteudo: return None
+    try:
+        return armazem_padrao().guardar(fonte, url, conteudo, contexto)
+    except Exception as e:
+        print(f"Erro ao armazenar a página {url}: {e}")
+        return None
+
+def _reprocessar_lote(diretorio, lote):
+    """
+    Executado num processo do pool: lê, descomprime e extrai cada página com o `extrair` do coletor registrado
+    com o nome da fonte. Retorna (documentos, falhas).
+    """
+    documentos, falhas = [], []
+    for fonte, url, hash_pagina, compressao, contexto in lote:
+        try:
+            coletor = obter_coletor(fonte)
+        except KeyError:
+            falhas.append({"url": url, "fonte": fonte, "erro": f"Nenhum coletor registrado com o nome '{fonte}'."})
+            continue
+        try:
+            documentos.extend(coletor.extrair(ler_objeto(diretorio, hash_pagina, compressao), url, contexto))
+        except Exception as e:
+            falhas.append({"url": url, "fonte": fonte, "erro": str(e)})
+    return documentos, falhas
+
+def reprocessar(armazem=None, fontes=None, workers=None, tamanho_lote=None, relatorio=None):
+    """
+    Gera os documentos extraídos da última versão de cada página armazenada, com os parsers atuais.
+    Os lotes são distribuídos entre `workers` processos; `relatorio` (dict) recebe paginas, documentos e falhas.
+    """
+    armazem = armazem or armazem_padrao()
+    relatorio = relatorio if relatorio is not None else {}
+    relatorio.update(paginas=0, documentos=0, falhas=[])
+    paginas = armazem.ultimas(fontes)
+    tamanho_lote = tamanho_lote or PAGINAS_LOTE
+    lotes = [paginas[i:i + tamanho_lote] for i in range(0, len(paginas), tamanho_lote)]
+    workers = workers or PAGINAS_WORKERS
+    print(f"Reprocessando {len(paginas)} páginas em {len(lotes)} lotes com {workers} processos.")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # No máximo 2 lotes por processo em voo: os documentos extraídos não se acumulam à frente da indexação.
+        # Os lotes saem na ordem de envio: uma URL buscada mais tarde sobrescreve a anterior na indexação.
+        em_voo = deque()
+        for lote in lotes:
+            em_voo.append((lote, executor.submit(_reprocessar_lote, armazem.diretorio, lote)))
+            if len(em_voo) >= workers * 2:
+                yield from _resultado_do_lote(relatorio, *em_voo.popleft())
+        while em_voo:
+            yield from _resultado_do_lote(relatorio, *em_voo.popleft())
+
+def _resultado_do_lote(relatorio, lote, futuro):
+    documentos, falhas = futuro.result()
+    relatorio['paginas'] += len(lote)
+    relatorio['documentos'] += len(documentos)
+    relatorio['falhas'].extend(falhas)
+    return documentos
@@ -0,0 +1,122 @@
+# coletores/rede.py - Sessões HTTP com pool de conexões, retry e limite de taxa por host
+#
+# O limite de taxa vale para o processo inteiro: LIMITADOR guarda um TokenBucket por host, compartilhado por todas as
+# sessões e coletas simultâneas (duas importações do LexML ao mesmo tempo dividem o mesmo limite). As repetições
+# (429, 5xx, falhas de conexão) são feitas pelo AdaptadorLimitado e também passam pelo limitador.
+
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
+STATUS_PARA_RETRY = (429, 500, 502, 503, 504)
+METODOS_PARA_RETRY = ('GET', 'HEAD')
+# Espera máxima entre tentativas, como o BACKOFF_MAX do urllib3.
+ESPERA_MAXIMA = 120.0
+
+class TokenBucket:
+    """Limitador de taxa: permite `taxa` requisições por segundo, com rajadas de até `capacidade`."""
+
+    def __init__(self, taxa, capacidade=None):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade or max(1.0, self.taxa))
+        self.tokens = self.capacidade
+        self.atualizado = time.monotonic()
+        self.lock = threading.Lock()
+
+    def ajustar(self, taxa):
+        """Reduz a taxa, se `taxa` for menor: entre coletas com limites diferentes para o mesmo host, vale o mais restrito."""
+        with self.lock:
+            if taxa < self.taxa:
+                self.taxa = float(taxa)
+                self.capacidade = min(self.capacidade, max(1.0, self.taxa))
+                self.tokens = min(self.tokens, self.capacidade)
+
+    def adquirir(self):
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.taxa)
+                self.atualizado = agora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                espera = (1 - self.tokens) / self.taxa
+            time.sleep(espera)
+
+class LimitadorPorHost:
+    """Um TokenBucket por host, criado sob demanda com a taxa do primeiro pedido (ajustada depois para a menor pedida)."""
+
+    def __init__(self, capacidade=None):
+        self.capacidade = capacidade
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def aguardar(self, url, taxa):
+        host = urlsplit(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(taxa, self.capacidade)
+        bucket.ajustar(taxa)
+        bucket.adquirir()
+
+# Compartilhado por todas as sessões do processo.
+LIMITADOR = LimitadorPorHost()
+
+def _espera(tentativa, backoff, retry_after=None):
+    """Segundos até a próxima tentativa: o Retry-After da resposta (segundos ou data HTTP) ou backoff exponencial."""
+    if retry_after:
+        try:
+            return min(ESPERA_MAXIMA, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                return min(ESPERA_MAXIMA, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    return min(ESPERA_MAXIMA, backoff * (2 ** tentativa))
+
+class AdaptadorLimitado(HTTPAdapter):
+    """
+    HTTPAdapter que faz as repetições ele mesmo (em vez do Retry do urllib3), para que cada tentativa passe pelo
+    limitador do host. Repete GET/HEAD em 429/5xx e em falhas de conexão ou timeout, com backoff exponencial.
+    """
+
+    def __init__(self, taxa=None, tentativas=5, backoff=1.0, limitador=None, **kwargs):
+        super().__init__(max_retries=0, **kwargs)
+        self.taxa, self.tentativas, self.backoff = taxa, tentativas, backoff
+        self.limitador = limitador or LIMITADOR
+
+    def send(self, request, **kwargs):
+        repetir = request.method in METODOS_PARA_RETRY
+        tentativa = 0
+        while True:
+            if self.taxa: self.limitador.aguardar(request.url, self.taxa)
+            try:
+                resposta = super().send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not repetir or tentativa >= self.tentativas: raise
+                time.sleep(_espera(tentativa, self.backoff))
+                tentativa += 1
+                continue
+            if not repetir or resposta.status_code not in STATUS_PARA_RETRY or tentativa >= self.tentativas:
+                return resposta
+            espera = _espera(tentativa, self.backoff, resposta.headers.get('Retry-After'))
+            resposta.close()
+            time.sleep(espera)
+            tentativa += 1
+
+def criar_sessao(pool_size=10, tentativas=5, backoff=1.0, taxa=None):
+    """
+    Session com pool de conexões e retry com backoff exponencial em 429 e 5xx (respeitando Retry-After).
+    Com `taxa`, toda requisição e toda repetição aguardam o limite de `taxa` requisições por segundo do host.
+    """
+    adapter = AdaptadorLimitado(taxa, tentativas, backoff, pool_connections=pool_size, pool_maxsize=pool_size)
+    sessao = requests.Session()
+    sessao.mount('http://', adapter)
+    sessao.mount('https://', adapter)
+    sessao.headers['User-Agent'] = USER_AGENT
+    return sessao
@@ -0,0 +1,140 @@
+# coletores/registro.py - Registro dos coletores: descrições leves, coletor importado só no primeiro uso
+#
+# Cada fonte externa é descrita por uma DescricaoColetor (nome, rótulo, tipo de documento, parâmetros da rota de
+# importação) e implementada por uma subclasse de Coletor no seu próprio módulo. O registro só guarda o caminho
+# "modulo:Classe": selenium, requests e os parsers (lxml/BeautifulSoup) são carregados na primeira chamada a
+# obter_coletor, então um worker que só atende buscas não os importa.
+#
+# Além dos coletores embutidos, descrições vêm de entry points do grupo `iurisadv.coletores` (pacotes instalados)
+# e da variável COLETORES ("modulo:DESCRICAO,..."); COLETORES_DESATIVADOS ("bnp,csm") remove coletores pelo nome.
+
+import os
+import threading
+import importlib
+
+GRUPO_ENTRY_POINTS = 'iurisadv.coletores'
+COLETORES = os.environ.get('COLETORES', '')
+COLETORES_DESATIVADOS = {nome.strip() for nome in os.environ.get('COLETORES_DESATIVADOS', '').split(',') if nome.strip()}
+
+class Coletor:
+    """
+    Interface comum dos coletores. `buscar` é a busca ao vivo (uma página, usada pela busca federada), `coletar` a
+    coleta em massa de uma importação e `extrair` o parser de uma página já baixada (html, url, contexto).
+    """
+    def buscar(self, termo, max_documentos=None):
+        raise NotImplementedError
+
+    def coletar(self, termos, relatorio=None, **opcoes):
+        raise NotImplementedError
+
+    def extrair(self, html, url, contexto):
+        raise NotImplementedError
+
+    def aquecer(self):
+        """Prepara recursos caros (navegadores, sessões) antes da primeira busca. Opcional."""
+
+class DescricaoColetor:
+    """
+    O que a aplicação precisa saber de um coletor sem importá-lo. `parametros` são os parâmetros opcionais da rota
+    /importar-<nome> ((nome, int ou bool), bool = '1'); `incremental` indica que a coleta aceita `ano_inicial` e
+    informa relatorio['completo'] (todos os termos percorridos até o fim), para a recoleta partir do último ano já
+    coletado. A aplicação chama `coletar` de um coletor incremental um termo por vez, com a marca de cada termo.
+    """
+    def __init__(self, nome, alvo, rotulo, tipo_documento, chamada=None, parametros=(), varios_termos=False,
+                 incremental=False, rota=True, federado=True):
+        self.nome, self.alvo, self.rotulo, self.tipo_documento = nome, alvo, rotulo, tipo_documento
+        self.chamada = chamada or f"Buscar e importar do {rotulo}"
+        self.parametros, self.varios_termos, self.incremental = tuple(parametros), varios_termos, incremental
+        self.rota, self.federado = rota, federado
+
+EMBUTIDOS = (
+    DescricaoColetor(
+        'lexml', 'coletores.lexml_scraper:ColetorLexML', 'LexML', 'jurisprudencia', "Buscar e importar Jurisprudência do LexML",
+        parametros=(('max_paginas', int), ('ano_inicial', int), ('ano_final', int), ('completo', bool)), incremental=True
+    ),
+    DescricaoColetor(
+        'bnp', 'coletores.bnp_scraper:ColetorBNP', 'Pangea BNP', 'precedente', "Buscar e importar Precedentes do Pangea BNP",
+        varios_termos=True
+    ),
+    # O CSM é coletado por lista de ECLIs (flask importar-eclis), com checkpoint próprio: sem rota nem busca federada.
+    DescricaoColetor('csm', 'coletores.ecli:ColetorCSM', 'CSM', 'jurisprudencia', rota=False, federado=False),
+)
+
+def _carregar_objeto(alvo):
+    modulo, _, atributo = alvo.partition(':')
+    objeto = importlib.import_module(modulo)
+    for parte in atributo.split('.') if atributo else ():
+        objeto = getattr(objeto, parte)
+    return objeto
+
+def _descricoes_de_entry_points():
+    try:
+        from importlib.metadata import entry_points
+        pontos = entry_points()
+        pontos = pontos.select(group=GRUPO_ENTRY_POINTS) if hasattr(pontos, 'select') else pontos.get(GRUPO_ENTRY_POINTS, ())
+    except Exception as e:
+        print(f"Não foi possível listar os entry points de coletores: {e}")
+        return []
+    descricoes = []
+    for ponto in pontos:
+        try:
+            descricoes.append(ponto.load())
+        except Exception as e:
+            print(f"Coletor '{ponto.name}' (entry point) ignorado: {e}")
+    return descricoes
+
+def _descricoes_configuradas(configuracao):
+    descricoes = []
+    for alvo in (a.strip() for a in configuracao.split(',')):
+        if not alvo: continue
+        try:
+            descricoes.append(_carregar_objeto(alvo))
+        except Exception as e:
+            print(f"Coletor '{alvo}' (COLETORES) ignorado: {e}")
+    return descricoes
+
+class RegistroColetores:
+    def __init__(self, descricoes=()):
+        self._descricoes = {}
+        self._coletores = {}
+        self._lock = threading.Lock()
+        for descricao in descricoes: self.registrar(descricao)
+
+    def registrar(self, descricao):
+        """Uma descrição com o nome de outra já registrada a substitui (plugins podem trocar um coletor embutido)."""
+        if descricao.nome in COLETORES_DESATIVADOS: return
+        self._descricoes[descricao.nome] = descricao
+        self._coletores.pop(descricao.nome, None)
+
+    def descricoes(self):
+        return list(self._descricoes.values())
+
+    def descricao(self, nome):
+        return self._descricoes[nome]
+
+    def obter(self, nome):
+        """O coletor, importado e instanciado na primeira chamada (KeyError se o nome não está registrado)."""
+        coletor = self._coletores.get(nome)
+        if coletor is not None: return coletor
+        with self._lock:
+            if nome not in self._coletores:
+                self._coletores[nome] = _carregar_objeto(self._descricoes[nome].alvo)()
+            return self._coletores[nome]
+
+    def carregados(self):
+        return sorted(self._coletores)
+
+_registro = None
+_registro_lock = threading.Lock()
+
+def registro_coletores():
+    global _registro
+    with _registro_lock:
+        if _registro is None:
+            _registro = RegistroColetores(EMBUTIDOS)
+            for descricao in _descricoes_de_entry_points() + _descricoes_configuradas(COLETORES):
+                _registro.registrar(descricao)
+        return _registro
+
+def obter_coletor(nome):
+    return registro_coletores().obter(nome)
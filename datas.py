@@ -0,0 +1,100 @@
+# datas.py - Normalização das datas de julgamento (dd/mm/aaaa, ISO e datas por extenso em português)
+#
+# As expressões são compiladas uma vez e o resultado é memorizado por texto: num lote grande as mesmas datas se
+# repetem muito (várias decisões por sessão). Falhas são contadas, não impressas, e aparecem no relatório e em /metrics.
+
+import re
+from datetime import date
+from functools import lru_cache
+
+from metricas import Contador
+
+ANO_MINIMO, ANO_MAXIMO = 1800, 2100
+TAMANHO_LOTE = 500
+
+MESES = {
+    'janeiro': 1, 'fevereiro': 2, 'março': 3, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6, 'julho': 7,
+    'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12,
+    'jan': 1, 'fev': 2, 'mar': 3, 'abr': 4, 'mai': 5, 'jun': 6, 'jul': 7, 'ago': 8, 'set': 9, 'out': 10, 'nov': 11, 'dez': 12
+}
+
+_RE_ISO = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})')
+_RE_DMA = re.compile(r'\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\b')
+_RE_EXTENSO = re.compile(r'\b(\d{1,2})[ºo°]?\s+de\s+([a-zç]+)\.?\s+de\s+(\d{4})\b', re.IGNORECASE)
+_RE_MES_ANO = re.compile(r'\b([a-zç]+)\.?\s+de\s+(\d{4})\b', re.IGNORECASE)
+_RE_ANO = re.compile(r'^(\d{4})$')
+
+DATAS_NORMALIZADAS_TOTAL = Contador(
+    'iurisadv_datas_normalizadas_total', 'Datas de julgamento normalizadas: data completa, apenas o ano, ou falha.', ('resultado',)
+)
+
+def _ano_valido(ano):
+    return ano if ANO_MINIMO < ano < ANO_MAXIMO else None
+
+def _data(ano, mes, dia):
+    if not _ano_valido(ano): return None
+    try:
+        return date(ano, mes, dia).isoformat()
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=8192)
+def normalizar_data(texto):
+    """Retorna (data ISO ou None, ano ou None) para o texto de uma data."""
+    if not texto: return None, None
+    texto = texto.strip()
+    m = _RE_ISO.match(texto)
+    if m:
+        iso = _data(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        if iso: return iso, int(m.group(1))
+    m = _RE_DMA.search(texto)
+    if m:
+        iso = _data(int(m.group(3)), int(m.group(2)), int(m.group(1)))
+        if iso: return iso, int(m.group(3))
+    m = _RE_EXTENSO.search(texto)
+    if m and m.group(2).lower() in MESES:
+        iso = _data(int(m.group(3)), MESES[m.group(2).lower()], int(m.group(1)))
+        if iso: return iso, int(m.group(3))
+    m = _RE_MES_ANO.search(texto)
+    if m and m.group(1).lower() in MESES: return None, _ano_valido(int(m.group(2)))
+    m = _RE_ANO.match(texto)
+    if m: return None, _ano_valido(int(m.group(1)))
+    return None, None
+
+def normalizar_lote(documentos, campo='data_julgamento', relatorio=None):
+    """
+    Normaliza, no próprio lote, a data de cada documento: o texto original vai para `<campo>_texto`,
+    `<campo>` recebe a data ISO (ou None) e `ano_julgamento` o ano. Retorna {'datas_completas', 'apenas_ano', 'falhas'}.
+    """
+    contagem = {"datas_completas": 0, "apenas_ano": 0, "falhas": 0}
+    for doc in documentos:
+        # Documentos já normalizados (ex.: reprocessados) mantêm o texto original.
+        texto = doc[f"{campo}_texto"] if f"{campo}_texto" in doc else doc.get(campo)
+        if texto is not None and not isinstance(texto, str): texto = str(texto)
+        iso, ano = normalizar_data(texto)
+        doc[f"{campo}_texto"] = texto
+        doc[campo] = iso
+        doc['ano_julgamento'] = ano
+        if iso: contagem["datas_completas"] += 1
+        elif ano: contagem["apenas_ano"] += 1
+        elif texto and texto.strip(): contagem["falhas"] += 1
+    DATAS_NORMALIZADAS_TOTAL.incrementar(contagem["datas_completas"], resultado='completa')
+    DATAS_NORMALIZADAS_TOTAL.incrementar(contagem["apenas_ano"], resultado='ano')
+    DATAS_NORMALIZADAS_TOTAL.incrementar(contagem["falhas"], resultado='falha')
+    if relatorio is not None:
+        for chave, valor in contagem.items():
+            relatorio[chave] = relatorio.get(chave, 0) + valor
+    return contagem
+
+def normalizar_documentos(documentos, tamanho_lote=TAMANHO_LOTE, relatorio=None):
+    """Gera os documentos com as datas normalizadas, processando-os em lotes de `tamanho_lote`."""
+    lote = []
+    for doc in documentos:
+        lote.append(doc)
+        if len(lote) >= tamanho_lote:
+            normalizar_lote(lote, relatorio=relatorio)
+            yield from lote
+            lote = []
+    if lote:
+        normalizar_lote(lote, relatorio=relatorio)
+        yield from lote
@@ -0,0 +1,238 @@
+# duplicatas.py - Ids estáveis e agrupamento de quase-duplicatas (MinHash/LSH sobre a ementa) na ingestão
+#
+# A mesma decisão chega por várias fontes (LexML, arquivo JSON do TJSC, CSM) com ids diferentes. Antes de indexar,
+# os documentos passam por um agrupador em memória, que junta uma mesma decisão: pelo número CNJ do processo (quando
+# aparece no id, no título ou no número único) com a mesma data de julgamento, ou pela similaridade da ementa (Jaccard
+# estimado por MinHash, candidatos via LSH em bandas). O número do processo sozinho não basta: um processo tem várias
+# decisões (acórdão, embargos, agravo interno), todas com o mesmo número. Só o documento canônico de cada grupo é indexado, com os links das demais fontes em
+# `outras_fontes`. O agrupamento vale para uma execução de importação (o índice LSH não é persistido) e só junta
+# documentos do mesmo tipo_documento, para não mudar o que a busca por tipo encontra.
+#
+# A assinatura é um MinHash de uma permutação só (one permutation hashing): cada shingle é hasheado uma vez e o hash
+# escolhe um de PERMUTACOES compartimentos, que guarda o menor valor visto; compartimentos vazios copiam o vizinho
+# não vazio à direita (densificação por rotação). Custa um hash por shingle, em vez de PERMUTACOES. O estado do
+# agrupador guarda no máximo DUPLICATAS_MAX_CANONICOS canônicos: os mais antigos são esquecidos (um documento
+# repetido depois disso é indexado de novo, sem agrupar), o que limita a memória de importações grandes.
+
+import os
+import re
+import zlib
+import hashlib
+import unicodedata
+from array import array
+
+from datas import normalizar_data
+from metricas import Contador
+
+# DUPLICATAS=0 desliga o agrupamento (os ids estáveis continuam valendo).
+DUPLICATAS_ATIVO = os.environ.get('DUPLICATAS', '1') == '1'
+# Similaridade (Jaccard estimado das ementas) a partir da qual dois documentos são a mesma decisão.
+DUPLICATAS_LIMIAR = float(os.environ.get('DUPLICATAS_LIMIAR', 0.8))
+DUPLICATAS_LOTE = int(os.environ.get('DUPLICATAS_LOTE', 1000))
+# Ementas mais curtas que isso (em palavras) não são comparadas: textos padronizados curtos geram falsos positivos.
+DUPLICATAS_MINIMO_PALAVRAS = int(os.environ.get('DUPLICATAS_MINIMO_PALAVRAS', 20))
+# Canônicos lembrados pelo agrupador (~1 KB cada, com a assinatura e os baldes do LSH); 0 = sem limite.
+DUPLICATAS_MAX_CANONICOS = int(os.environ.get('DUPLICATAS_MAX_CANONICOS', 100_000))
+# 64 compartimentos em 8 bandas de 8 linhas: pares com Jaccard acima de ~0,77 quase sempre viram candidatos.
+PERMUTACOES, BANDAS = 64, 8
+LINHAS = PERMUTACOES // BANDAS
+TAMANHO_SHINGLE = 3
+# Os 6 bits baixos do hash escolhem o compartimento; os 58 restantes são o valor comparado.
+_BITS_COMPARTIMENTO = PERMUTACOES.bit_length() - 1
+_VAZIO = 1 << (64 - _BITS_COMPARTIMENTO)
+
+_RE_CNJ = re.compile(r'\b(\d{7})-?(\d{2})\.?(\d{4})\.?(\d)\.?(\d{2})\.?(\d{4})\b')
+_RE_PALAVRA = re.compile(r'\w+')
+
+DUPLICATAS_TOTAL = Contador(
+    'iurisadv_duplicatas_total', 'Documentos agrupados a um canônico na ingestão, pelo critério usado (processo ou ementa).', ('criterio',)
+)
+
+def normalizar_texto(texto):
+    """Minúsculas, sem acentos e com espaços colapsados."""
+    texto = unicodedata.normalize('NFKD', str(texto or '').lower())
+    return ' '.join(''.join(c for c in texto if not unicodedata.combining(c)).split())
+
+def hash_estavel(*partes, tamanho=20):
+    """Hash hexadecimal do conteúdo normalizado: o mesmo em qualquer processo (ao contrário de hash())."""
+    conteudo = '\x1f'.join(normalizar_texto(parte) for parte in partes)
+    return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()[:tamanho]
+
+def id_estavel(documento):
+    """Id derivado do conteúdo para documentos que não trazem um: fonte, título, data e ementa."""
+    return f"{documento.get('fonte') or 'doc'}-{hash_estavel(documento.get('titulo'), documento.get('data_julgamento'), documento.get('ementa'))}"
+
+def numero_cnj(*textos):
+    """Número CNJ do processo (só dígitos) encontrado no primeiro texto que o contenha, ou None."""
+    for texto in textos:
+        if not texto: continue
+        m = _RE_CNJ.search(str(texto))
+        if m: return ''.join(m.groups())
+    return None
+
+def assinatura(texto):
+    """MinHash (PERMUTACOES valores de 32 bits) dos shingles de palavras do texto, ou None se o texto é curto demais."""
+    palavras = _RE_PALAVRA.findall(normalizar_texto(texto))
+    if len(palavras) < DUPLICATAS_MINIMO_PALAVRAS: return None
+    shingles = {' '.join(palavras[i:i + TAMANHO_SHINGLE]) for i in range(len(palavras) - TAMANHO_SHINGLE + 1)}
+    minimos = [_VAZIO] * PERMUTACOES
+    mascara = PERMUTACOES - 1
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        compartimento, valor = h & mascara, h >> _BITS_COMPARTIMENTO
+        if valor < minimos[compartimento]: minimos[compartimento] = valor
+    # Densificação: um compartimento vazio recebe o valor do próximo não vazio à direita (circular), deslocado pela
+    # distância, para não coincidir por acaso com o compartimento de onde veio. Há ao menos um shingle, logo um não vazio.
+    fonte = next(i for i in range(PERMUTACOES - 1, -1, -1) if minimos[i] != _VAZIO)
+    densos = [0] * PERMUTACOES
+    for i in range(PERMUTACOES - 1, -1, -1):
+        if minimos[i] != _VAZIO: fonte = i
+        distancia = (fonte - i) % PERMUTACOES
+        densos[i] = (minimos[fonte] + distancia * _VAZIO) & 0xFFFFFFFFFFFFFFFF
+    # Guardados em 32 bits (metade da memória): só a igualdade importa, e uma colisão acidental é desprezível.
+    return array('I', ((v ^ (v >> 32)) & 0xFFFFFFFF for v in densos))
+
+def similaridade(assinatura_a, assinatura_b):
+    return sum(1 for x, y in zip(assinatura_a, assinatura_b) if x == y) / PERMUTACOES
+
+def _bandas(sig):
+    # Uma chave inteira por banda (índice da banda nos bits altos): ocupa menos que uma tupla em _baldes.
+    return [(i << 32) | zlib.crc32(sig[i * LINHAS:(i + 1) * LINHAS].tobytes()) for i in range(BANDAS)]
+
+def _data_da_decisao(documento):
+    """Data de julgamento completa (ISO) do documento, ou None; só o ano não identifica a decisão."""
+    texto = documento.get('data_julgamento')
+    return normalizar_data(str(texto))[0] if texto else None
+
+def _vinculo(documento):
+    return {"id": documento['id'], "fonte": documento.get('fonte'), "link": documento.get('link')}
+
+def _prioridade(documento):
+    """Canônico preferido: o que traz o texto integral, depois a ementa mais longa; o id desempata."""
+    return (0 if documento.get('texto_decisao') else 1, -len(documento.get('ementa') or ''), str(documento['id']))
+
+class AgrupadorDuplicatas:
+    """
+    Índice LSH em memória para uma execução de importação. `agrupar(documentos)` gera só os canônicos.
+    Duplicatas de um canônico já enviado num lote anterior ficam em `vinculos_tardios` ({id canônico: [vínculos]}),
+    para serem acrescentadas ao documento indexado no final (indexacao.acrescentar_outras_fontes).
+    Lembra no máximo `max_canonicos` canônicos; `_tipos` está em ordem de registro e dá os mais antigos a esquecer.
+    """
+    def __init__(self, limiar=None, tamanho_lote=None, max_canonicos=None):
+        self.limiar = DUPLICATAS_LIMIAR if limiar is None else limiar
+        self.tamanho_lote = tamanho_lote or DUPLICATAS_LOTE
+        self.max_canonicos = DUPLICATAS_MAX_CANONICOS if max_canonicos is None else max_canonicos
+        self._baldes = {}
+        self._assinaturas = {}
+        self._por_processo = {}
+        self._processos = {}  # id canônico -> (chave em _por_processo, data de julgamento)
+        self._tipos = {}
+        self.vinculos_tardios = {}
+        self.relatorio = {"documentos": 0, "canonicos": 0, "duplicatas_processo": 0, "duplicatas_ementa": 0}
+
+    def _candidato(self, documento, cnj, sig):
+        tipo = documento.get('tipo_documento')
+        if cnj:
+            # Entre as decisões já vistas do mesmo processo, só é a mesma a de mesma data ou de ementa semelhante.
+            data = _data_da_decisao(documento)
+            for canonico in self._por_processo.get((tipo, cnj), ()):
+                if canonico == documento['id']: continue
+                if data and data == self._processos[canonico][1]: return canonico, 'processo'
+                outra = self._assinaturas.get(canonico)
+                if sig is not None and outra is not None and similaridade(sig, outra) >= self.limiar: return canonico, 'processo'
+        if sig is None: return None, None
+        vistos = set()
+        for banda in _bandas(sig):
+            balde = self._baldes.get(banda, ())
+            for canonico in (balde if isinstance(balde, (list, tuple)) else (balde,)):
+                if canonico in vistos or canonico == documento['id'] or self._tipos.get(canonico) != tipo: continue
+                vistos.add(canonico)
+                if similaridade(sig, self._assinaturas[canonico]) >= self.limiar: return canonico, 'ementa'
+        return None, None
+
+    def _registrar(self, documento, cnj, sig):
+        if self.max_canonicos and len(self._tipos) >= self.max_canonicos: self._esquecer(next(iter(self._tipos)))
+        self._tipos[documento['id']] = documento.get('tipo_documento')
+        if cnj:
+            chave = (documento.get('tipo_documento'), cnj)
+            self._por_processo.setdefault(chave, []).append(documento['id'])
+            self._processos[documento['id']] = (chave, _data_da_decisao(documento))
+        if sig is not None:
+            self._assinaturas[documento['id']] = sig
+            for banda in _bandas(sig):
+                # A maioria dos baldes tem um documento só: guardado direto, sem lista.
+                balde = self._baldes.get(banda)
+                if balde is None: self._baldes[banda] = documento['id']
+                elif isinstance(balde, list): balde.append(documento['id'])
+                else: self._baldes[banda] = [balde, documento['id']]
+
+    def _esquecer(self, canonico):
+        del self._tipos[canonico]
+        processo = self._processos.pop(canonico, None)
+        if processo is not None:
+            decisoes = self._por_processo[processo[0]]
+            decisoes.remove(canonico)
+            if not decisoes: del self._por_processo[processo[0]]
+        sig = self._assinaturas.pop(canonico, None)
+        if sig is None: return
+        for banda in _bandas(sig):
+            balde = self._baldes[banda]
+            if not isinstance(balde, list):
+                del self._baldes[banda]
+                continue
+            balde.remove(canonico)
+            if len(balde) == 1: self._baldes[banda] = balde[0]
+
+    def _processar_lote(self, lote):
+        # No lote, os documentos mais completos são registrados primeiro e viram os canônicos.
+        lote.sort(key=_prioridade)
+        canonicos, emitidos = {}, []
+        for documento in lote:
+            if not documento.get('id'): documento['id'] = id_estavel(documento)
+            if documento['id'] in self._tipos:
+                # Já é canônico de um lote anterior (o mesmo documento de novo): é reenviado sem reagrupar.
+                emitidos.append(documento)
+                continue
+            cnj = numero_cnj(documento.get('numeroUnico'), documento.get('id'), documento.get('titulo'))
+            sig = assinatura(documento.get('ementa'))
+            canonico, criterio = self._candidato(documento, cnj, sig)
+            if canonico is None:
+                self._registrar(documento, cnj, sig)
+                canonicos[documento['id']] = documento
+                emitidos.append(documento)
+                continue
+            self.relatorio[f"duplicatas_{criterio}"] += 1
+            DUPLICATAS_TOTAL.incrementar(criterio=criterio)
+            if canonico in canonicos:
+                canonicos[canonico].setdefault('outras_fontes', []).append(_vinculo(documento))
+            else:
+                self.vinculos_tardios.setdefault(canonico, []).append(_vinculo(documento))
+        self.relatorio["canonicos"] += len(emitidos)
+        return emitidos
+
+    def agrupar(self, documentos):
+        lote = []
+        for documento in documentos:
+            self.relatorio["documentos"] += 1
+            lote.append(documento)
+            if len(lote) >= self.tamanho_lote:
+                yield from self._processar_lote(_sem_ids_repetidos(lote))
+                lote = []
+        if lote: yield from self._processar_lote(_sem_ids_repetidos(lote))
+
+def _sem_ids_repetidos(lote):
+    # Um mesmo id repetido na entrada é o mesmo documento: a última versão prevalece, como no índice.
+    por_id, sem_id = {}, []
+    for documento in lote:
+        if documento.get('id'): por_id[documento['id']] = documento
+        else: sem_id.append(documento)
+    return list(por_id.values()) + sem_id
+
+def agrupar_duplicatas(documentos, agrupador=None):
+    """Etapa de ingestão: gera os documentos canônicos (ou todos, se DUPLICATAS=0)."""
+    if not DUPLICATAS_ATIVO:
+        for documento in documentos:
+            if not documento.get('id'): documento['id'] = id_estavel(documento)
+            yield documento
+        return
+    yield from (agrupador or AgrupadorDuplicatas()).agrupar(documentos)
@@ -0,0 +1,66 @@
+# facetas.py - Facetas da busca (agregações na mesma consulta) e filtros pelos valores selecionados
+#
+# As facetas são "disjuntivas": a seleção vai no post_filter, e cada agregação é filtrada pelas seleções das
+# outras facetas, não pela sua. Assim a contagem de uma faceta mostra as alternativas ao valor escolhido.
+# Os filtros são cláusulas `terms` em contexto de filtro, que o Elasticsearch guarda no filter cache.
+
+import os
+
+# (parâmetro na URL, campo no índice, rótulo)
+FACETAS = (
+    ("fonte", "fonte", "Fonte"),
+    ("classe", "classe", "Classe"),
+    ("orgao", "orgaoJulgador", "Órgão Julgador"),
+    ("ramo", "ramoDireito", "Ramo do Direito"),
+    ("autoridade", "autoridade.keyword", "Autoridade"),
+)
+FACETA_ANOS = "ano"
+FACETAS_TAMANHO = int(os.environ.get('FACETAS_TAMANHO', 10))
+
+def selecao_da_requisicao(args):
+    """Valores selecionados por faceta, a partir dos parâmetros repetidos da URL (?fonte=a&fonte=b)."""
+    selecao = {}
+    for parametro, _, _ in FACETAS:
+        valores = sorted({v.strip() for v in args.getlist(parametro) if v.strip()})
+        if valores: selecao[parametro] = tuple(valores)
+    return selecao
+
+def chave_selecao(selecao):
+    return tuple(sorted(selecao.items()))
+
+def filtros_da_selecao(selecao, exceto=None):
+    campos = {parametro: campo for parametro, campo, _ in FACETAS}
+    return [{"terms": {campos[parametro]: list(valores)}} for parametro, valores in sorted(selecao.items()) if parametro != exceto]
+
+def agregacoes(selecao):
+    aggs = {
+        parametro: {
+            "filter": {"bool": {"filter": filtros_da_selecao(selecao, exceto=parametro)}},
+            "aggs": {"valores": {"terms": {"field": campo, "size": FACETAS_TAMANHO}}}
+        }
+        for parametro, campo, _ in FACETAS
+    }
+    aggs[FACETA_ANOS] = {
+        "filter": {"bool": {"filter": filtros_da_selecao(selecao)}},
+        "aggs": {"valores": {"histogram": {"field": "ano_julgamento", "interval": 1, "min_doc_count": 1}}}
+    }
+    return aggs
+
+def ler_agregacoes(aggs):
+    """{parâmetro: [(valor, contagem), ...]}; os anos em ordem decrescente."""
+    facetas = {}
+    for parametro, _, _ in FACETAS:
+        baldes = aggs.get(parametro, {}).get("valores", {}).get("buckets", [])
+        facetas[parametro] = [(b["key"], b["doc_count"]) for b in baldes if b["key"] != ""]
+    baldes = aggs.get(FACETA_ANOS, {}).get("valores", {}).get("buckets", [])
+    facetas[FACETA_ANOS] = [(int(b["key"]), b["doc_count"]) for b in reversed(baldes)]
+    return facetas
+
+def alternar(selecao, parametro, valor):
+    """Seleção com `valor` adicionado à faceta, ou removido se já estava selecionado."""
+    valores = set(selecao.get(parametro, ()))
+    valores ^= {valor}
+    nova = dict(selecao)
+    if valores: nova[parametro] = tuple(sorted(valores))
+    else: nova.pop(parametro, None)
+    return nova
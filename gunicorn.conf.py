@@ -0,0 +1,50 @@
+# gunicorn.conf.py - Servidor de produção: gunicorn -c gunicorn.conf.py app:app
+#
+# Workers gthread: cada processo atende GUNICORN_THREADS requisições ao mesmo tempo, o que cobre a espera de rede
+# no Elasticsearch e os streams da busca federada. O mestre não importa a aplicação: cada worker cria o seu cliente do
+# Elasticsearch depois do fork (post_fork) e o primeiro a obter a trava cria o índice, se preciso.
+#
+# O que é por processo e como fica entre os workers:
+# - tarefas (tarefas.py): as threads de importação vivem no worker; ao sair (worker_exit), ele espera um pouco e
+#   devolve à fila as que não terminaram. Por isso os workers não são reciclados por padrão (GUNICORN_MAX_REQUESTS=0).
+# - /metrics (metricas.py): cada worker grava as suas métricas em METRICAS_DIR e a rota devolve a soma de todos.
+# - navegadores (coletores/navegadores.py): cada worker tem o seu pool, mas BNP_NAVEGADORES_MAX limita o total de
+#   Chromes da máquina (por padrão, o BNP_POOL_TAMANHO de um pool só).
+
+import os
+import tempfile
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 3000)}"
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+# Reciclagem periódica dos workers (contra vazamentos de memória em parsers e drivers), com jitter para não reiniciarem
+# juntos. Desligada por padrão: um worker reciclado interrompe as importações em andamento (que voltam para a fila).
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-') or None
+errorlog = '-'
+
+# O pool de conexões de cada worker acompanha o número de threads, se não foi definido explicitamente.
+os.environ.setdefault('ES_POOL_CONEXOES', str(max(threads * 2, 10)))
+os.environ.setdefault('METRICAS_DIR', os.path.join(tempfile.gettempdir(), f"iurisadv-metricas-{bind.rsplit(':', 1)[-1]}"))
+os.environ.setdefault('BNP_NAVEGADORES_MAX', os.environ.get('BNP_POOL_TAMANHO', '2'))
+
+def on_starting(server):
+    # Descarta as métricas de uma execução anterior; os workers recriam os seus arquivos.
+    diretorio = os.environ['METRICAS_DIR']
+    os.makedirs(diretorio, exist_ok=True)
+    for nome in os.listdir(diretorio):
+        if nome.endswith('.json') or nome.endswith('.tmp'): os.remove(os.path.join(diretorio, nome))
+
+def post_fork(server, worker):
+    from app import iniciar_worker
+    iniciar_worker()
+
+def worker_exit(server, worker):
+    from app import encerrar_worker
+    encerrar_worker()
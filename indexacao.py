@@ -0,0 +1,155 @@
+# indexacao.py - Estágio compartilhado de indexação em lote no Elasticsearch
+
+import os
+import time
+import threading
+import itertools
+from contextlib import contextmanager
+from elasticsearch import helpers
+
+from metricas import INDEXACAO_LOTE_SEGUNDOS, INDEXACAO_DOCUMENTOS_TOTAL, registrar_vazao
+
+# Tamanho dos lotes enviados ao _bulk: por número de documentos e por bytes.
+BULK_CHUNK_SIZE = int(os.environ.get('BULK_CHUNK_SIZE', 500))
+BULK_MAX_BYTES = int(os.environ.get('BULK_MAX_BYTES', 10 * 1024 * 1024))
+# Com mais de uma thread usa parallel_bulk; com uma, streaming_bulk (que sabe repetir lotes rejeitados com 429).
+BULK_THREADS = int(os.environ.get('BULK_THREADS', 1))
+BULK_MAX_RETRIES = int(os.environ.get('BULK_MAX_RETRIES', 3))
+# Quantos erros individuais guardar no relatório (o total é sempre contado).
+MAX_ERROS_NO_RELATORIO = 100
+
+# Cargas simultâneas no mesmo índice compartilham o refresh desligado:
+# a primeira desliga, a última restaura o valor original.
+_cargas_lock = threading.Lock()
+_cargas_ativas = {}
+
+def _refresh_interval_atual(es, index):
+    settings = es.indices.get_settings(index=index, name='index.refresh_interval')
+    for info in settings.values():
+        return info.get('settings', {}).get('index', {}).get('refresh_interval')
+    return None
+
+@contextmanager
+def refresh_desligado(es, index):
+    """Desliga o refresh_interval do índice durante a carga e restaura o valor anterior ao final."""
+    with _cargas_lock:
+        ativa = _cargas_ativas.get(index)
+        if ativa is None:
+            anterior = _refresh_interval_atual(es, index)
+            es.indices.put_settings(index=index, settings={"index": {"refresh_interval": "-1"}})
+            ativa = _cargas_ativas[index] = {"anterior": anterior, "contador": 0}
+        ativa["contador"] += 1
+    try:
+        yield
+    finally:
+        with _cargas_lock:
+            ativa["contador"] -= 1
+            if ativa["contador"] == 0:
+                del _cargas_ativas[index]
+                # None restaura o padrão do Elasticsearch (1s).
+                es.indices.put_settings(index=index, settings={"index": {"refresh_interval": ativa["anterior"]}})
+                es.indices.refresh(index=index)
+
+class _ClienteCronometrado:
+    """Repassa tudo ao cliente, medindo a latência de cada requisição _bulk (os helpers chamam client.options().bulk)."""
+
+    def __init__(self, es, rotulo):
+        self._es, self._rotulo = es, rotulo
+
+    def options(self, **kwargs):
+        return _ClienteCronometrado(self._es.options(**kwargs), self._rotulo)
+
+    def bulk(self, *args, **kwargs):
+        with INDEXACAO_LOTE_SEGUNDOS.cronometrar(rotulo=self._rotulo):
+            return self._es.bulk(*args, **kwargs)
+
+    def __getattr__(self, nome):
+        return getattr(self._es, nome)
+
+def _acoes(documentos, index):
+    for doc in documentos:
+        yield {"_index": index, "_id": doc['id'], "_source": doc}
+
+def indexar_em_lote(es, documentos, index, chunk_size=None, max_chunk_bytes=None, threads=None, rotulo='documentos', ao_progredir=None,
+                    ao_confirmar=None):
+    """
+    Indexa um iterável de documentos (cada um com a chave 'id') usando a API _bulk.
+    Retorna um relatório com totais, erros por documento e a vazão em docs/s.
+    `ao_progredir(relatorio)`, se informado, é chamado a cada lote processado e ao final, com os totais já atualizados.
+    `ao_confirmar(ok, id)` é chamado para cada documento respondido pelo _bulk. As respostas não chegam na ordem de
+    envio (os itens repetidos após um 429 voltam depois dos demais), por isso o documento é identificado pelo _id.
+    """
+    chunk_size = chunk_size or BULK_CHUNK_SIZE
+    max_chunk_bytes = max_chunk_bytes or BULK_MAX_BYTES
+    threads = threads or BULK_THREADS
+    relatorio = {"indexados": 0, "total_erros": 0, "erros": [], "ids_com_erro": [], "segundos": 0.0, "docs_por_segundo": 0.0}
+    documentos = iter(documentos)
+    primeiro = next(documentos, None)
+    if primeiro is None:
+        # Nada a indexar: não toca nas configurações do índice.
+        print(f"Indexação em lote de {rotulo}: nenhum documento a indexar.")
+        return relatorio
+    inicio = time.perf_counter()
+    with refresh_desligado(es, index):
+        acoes = _acoes(itertools.chain([primeiro], documentos), index)
+        cliente = _ClienteCronometrado(es, rotulo)
+        opcoes = {"chunk_size": chunk_size, "max_chunk_bytes": max_chunk_bytes, "raise_on_error": False, "raise_on_exception": False}
+        if threads > 1:
+            resultados = helpers.parallel_bulk(cliente, acoes, thread_count=threads, **opcoes)
+        else:
+            resultados = helpers.streaming_bulk(cliente, acoes, max_retries=BULK_MAX_RETRIES, **opcoes)
+        for ok, item in resultados:
+            (_, info), = item.items()
+            if ao_confirmar: ao_confirmar(ok, info.get('_id'))
+            if ok:
+                relatorio["indexados"] += 1
+            else:
+                relatorio["total_erros"] += 1
+                erro = {"id": info.get('_id'), "status": info.get('status'), "erro": info.get('error') or str(info.get('exception', ''))}
+                relatorio["ids_com_erro"].append(erro["id"])
+                if len(relatorio["erros"]) < MAX_ERROS_NO_RELATORIO:
+                    relatorio["erros"].append(erro)
+                print(f"Erro ao indexar documento {erro['id']}: {erro['status']} {erro['erro']}")
+            # Depois de contar o item: a cada lote completo o relatório já inclui o lote inteiro.
+            if ao_progredir and (relatorio["indexados"] + relatorio["total_erros"]) % chunk_size == 0:
+                ao_progredir(relatorio)
+        if ao_progredir and (relatorio["indexados"] + relatorio["total_erros"]) % chunk_size:
+            ao_progredir(relatorio)
+    relatorio["segundos"] = time.perf_counter() - inicio
+    if relatorio["segundos"] > 0:
+        relatorio["docs_por_segundo"] = relatorio["indexados"] / relatorio["segundos"]
+    INDEXACAO_DOCUMENTOS_TOTAL.incrementar(relatorio["indexados"], rotulo=rotulo, resultado='ok')
+    INDEXACAO_DOCUMENTOS_TOTAL.incrementar(relatorio["total_erros"], rotulo=rotulo, resultado='erro')
+    registrar_vazao(rotulo, relatorio["docs_por_segundo"])
+    print(f"Indexação em lote de {rotulo}: {relatorio['indexados']} indexados, {relatorio['total_erros']} erros "
+          f"em {relatorio['segundos']:.2f}s ({relatorio['docs_por_segundo']:.1f} docs/s)")
+    return relatorio
+
+# Acrescenta cada vínculo a outras_fontes se o id ainda não estiver lá (a mesma importação repetida não duplica).
+_SCRIPT_OUTRAS_FONTES = """
+if (ctx._source.outras_fontes == null) { ctx._source.outras_fontes = []; }
+for (f in params.fontes) {
+  boolean existe = false;
+  for (o in ctx._source.outras_fontes) { if (o.id == f.id) { existe = true; break; } }
+  if (!existe) { ctx._source.outras_fontes.add(f); }
+}
+"""
+
+def acrescentar_outras_fontes(es, index, vinculos, chunk_size=None):
+    """
+    Acrescenta, com updates em lote, as duplicatas encontradas depois que o canônico já tinha sido indexado
+    ({id canônico: [{"id", "fonte", "link"}]}, ver duplicatas.AgrupadorDuplicatas). Retorna quantos documentos mudaram.
+    """
+    if not vinculos: return 0
+    acoes = (
+        {"_op_type": "update", "_index": index, "_id": canonico, "script": {"source": _SCRIPT_OUTRAS_FONTES, "params": {"fontes": fontes}}}
+        for canonico, fontes in vinculos.items()
+    )
+    atualizados = 0
+    for ok, item in helpers.streaming_bulk(es, acoes, chunk_size=chunk_size or BULK_CHUNK_SIZE, raise_on_error=False, max_retries=BULK_MAX_RETRIES):
+        if ok:
+            atualizados += 1
+        else:
+            info = item.get('update', item)
+            print(f"Erro ao acrescentar outras fontes a {info.get('_id')}: {info.get('status')} {info.get('error')}")
+    return atualizados
@@ -0,0 +1,113 @@
+# indices.py - Índices versionados (<alias>_v{n}) atrás de um alias, com reconstrução e troca atômica
+#
+# A busca e as importações usam sempre o alias. Uma mudança de mapeamento cria a próxima versão física com
+# configurações de carga (sem réplicas, refresh desligado), copia os documentos da versão atual, restaura as
+# configurações de produção e só então move o alias, numa única chamada a _aliases: a busca não fica fora do ar.
+
+import os
+import re
+import time
+from elasticsearch import helpers
+
+# Shards e réplicas por ambiente (em produção com mais de um nó, ES_REPLICAS=1 ou mais).
+ES_SHARDS = int(os.environ.get('ES_SHARDS', 1))
+ES_REPLICAS = int(os.environ.get('ES_REPLICAS', 0))
+# Quantas versões anteriores manter após a troca, para poder voltar atrás.
+INDICES_VERSOES_MANTIDAS = int(os.environ.get('INDICES_VERSOES_MANTIDAS', 1))
+
+def nome_versao(alias, versao):
+    return f"{alias}_v{versao}"
+
+def configuracoes_producao():
+    return {"number_of_shards": ES_SHARDS, "number_of_replicas": ES_REPLICAS}
+
+def versoes(es, alias):
+    """Números das versões físicas existentes do alias, em ordem crescente."""
+    padrao = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+    nomes = es.indices.get(index=f"{alias}_v*", allow_no_indices=True, expand_wildcards='open,closed')
+    return sorted(int(m.group(1)) for m in map(padrao.match, nomes) if m)
+
+def indices_do_alias(es, alias):
+    """Índices físicos atrás do alias; vazio se o alias não existe."""
+    if not es.indices.exists_alias(name=alias): return []
+    return sorted(es.indices.get_alias(name=alias))
+
+def identificador_do_indice(es, nome):
+    """
+    UUID do índice físico atrás de `nome` (alias ou índice). Muda quando o índice é reconstruído numa nova versão
+    ou apagado e recriado com o mesmo nome; sem UUID nas configurações, vale o nome do índice físico.
+    """
+    configuracoes = es.indices.get_settings(index=nome, name='index.uuid')
+    for indice, info in sorted(configuracoes.items(), reverse=True):
+        return info.get('settings', {}).get('index', {}).get('uuid') or indice
+    return nome
+
+def e_indice_concreto(es, nome):
+    """True se `nome` é um índice físico (layout antigo, sem alias), e não um alias."""
+    return es.indices.exists(index=nome) and not es.indices.exists_alias(name=nome)
+
+def criar_versao(es, alias, corpo):
+    """Cria a próxima versão física com configurações de carga e retorna seu nome."""
+    existentes = versoes(es, alias)
+    indice = nome_versao(alias, (existentes[-1] if existentes else 0) + 1)
+    corpo = dict(corpo)
+    configuracoes = dict(corpo.get("settings", {}).get("index", {}))
+    configuracoes.update(number_of_shards=ES_SHARDS, number_of_replicas=0, refresh_interval="-1")
+    corpo["settings"] = {**corpo.get("settings", {}), "index": configuracoes}
+    es.indices.create(index=indice, body=corpo)
+    print(f"Índice '{indice}' criado para carga ({ES_SHARDS} shards, sem réplicas, refresh desligado).")
+    return indice
+
+def finalizar_versao(es, indice):
+    """
+    Restaura réplicas e refresh de produção numa versão recém-carregada e espera ela ficar disponível.
+    Levanta RuntimeError se o cluster não chega ao estado esperado no prazo: o alias não deve ser movido para ela.
+    """
+    es.indices.put_settings(index=indice, settings={"index": {"number_of_replicas": ES_REPLICAS, "refresh_interval": None}})
+    es.indices.refresh(index=indice)
+    esperado = 'green' if ES_REPLICAS == 0 else 'yellow'
+    saude = es.cluster.health(index=indice, wait_for_status=esperado, timeout='120s')
+    if saude.get('timed_out'):
+        raise RuntimeError(f"'{indice}' não ficou {esperado} em 120s (status {saude.get('status')}); o alias não foi trocado.")
+
+def reindexar_no_servidor(es, origem, destino, intervalo=5):
+    """Cópia feita pelo próprio Elasticsearch (_reindex em fatias), acompanhada até o fim."""
+    tarefa = es.reindex(source={"index": origem}, dest={"index": destino}, slices='auto', wait_for_completion=False, refresh=False)
+    while True:
+        status = es.tasks.get(task_id=tarefa['task'])
+        progresso = status['task']['status']
+        print(f"Reindexação {origem} -> {destino}: {progresso.get('created', 0) + progresso.get('updated', 0)}/{progresso.get('total', 0)}")
+        if status.get('completed'):
+            resposta = status.get('response', {})
+            if resposta.get('failures'): raise RuntimeError(f"Falhas na reindexação: {resposta['failures'][:5]}")
+            return resposta
+        time.sleep(intervalo)
+
+def documentos_do_indice(es, indice, tamanho=1000):
+    """Gera o _source de cada documento do índice (com 'id' preenchido a partir do _id), via scroll."""
+    for hit in helpers.scan(es, index=indice, query={"query": {"match_all": {}}}, size=tamanho):
+        documento = hit['_source']
+        documento.setdefault('id', hit['_id'])
+        yield documento
+
+def trocar_alias(es, alias, indice):
+    """Move o alias para `indice` atomicamente. Um índice físico com o nome do alias (layout antigo) é removido na mesma operação."""
+    acoes = []
+    if e_indice_concreto(es, alias):
+        acoes.append({"remove_index": {"index": alias}})
+    else:
+        acoes.extend({"remove": {"index": atual, "alias": alias}} for atual in indices_do_alias(es, alias) if atual != indice)
+    acoes.append({"add": {"index": indice, "alias": alias, "is_write_index": True}})
+    es.indices.update_aliases(actions=acoes)
+    print(f"Alias '{alias}' agora aponta para '{indice}'.")
+
+def remover_versoes_antigas(es, alias, manter=None):
+    """Apaga as versões que não estão no alias, exceto as `manter` mais recentes."""
+    manter = INDICES_VERSOES_MANTIDAS if manter is None else manter
+    ativos = set(indices_do_alias(es, alias))
+    antigas = [nome_versao(alias, v) for v in versoes(es, alias) if nome_versao(alias, v) not in ativos]
+    remover = antigas[:len(antigas) - manter] if manter else antigas
+    for indice in remover:
+        es.indices.delete(index=indice)
+        print(f"Versão antiga '{indice}' removida.")
+    return remover
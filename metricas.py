@@ -0,0 +1,263 @@
+# metricas.py - Métricas de latência e vazão no formato de exposição do Prometheus
+#
+# Implementação mínima (histogramas, contadores e métricas calculadas sob demanda), sem dependências,
+# exportada pela rota /metrics. Os valores são por processo; com METRICAS_DIR (o gunicorn.conf.py define um), cada
+# processo grava o estado das suas métricas num arquivo desse diretório a cada METRICAS_INTERVALO segundos e na saída,
+# e /metrics devolve a soma de todos: contadores e histogramas somados (inclusive os de workers já encerrados, para
+# não voltarem para trás), métricas calculadas com o rótulo `processo`, só dos processos vivos.
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+METRICAS_DIR = os.environ.get('METRICAS_DIR')
+METRICAS_INTERVALO = float(os.environ.get('METRICAS_INTERVALO', 5))
+
+BUCKETS_PADRAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_metricas = []
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    pares = list(zip(nomes, valores))
+    if extra: pares.append(extra)
+    if not pares: return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+def _formatar_numero(valor):
+    if valor == float('inf'): return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, descricao, rotulos=()):
+        self.nome, self.descricao, self.rotulos = nome, descricao, tuple(rotulos)
+        self._lock = threading.Lock()
+        _metricas.append(self)
+
+    def _chave(self, rotulos):
+        return tuple(rotulos.get(nome, '') for nome in self.rotulos)
+
+    def cabecalho(self):
+        return [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+
+class Contador(_Metrica):
+    tipo = 'counter'
+
+    def __init__(self, nome, descricao, rotulos=()):
+        super().__init__(nome, descricao, rotulos)
+        self._valores = {}
+
+    def incrementar(self, valor=1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def estado(self):
+        with self._lock:
+            return [[list(chave), v] for chave, v in self._valores.items()]
+
+    def exportar(self, estados=None):
+        if estados is None:
+            with self._lock:
+                valores = dict(self._valores)
+        else:
+            valores = {}
+            for _, estado in estados:
+                for chave, v in estado:
+                    valores[tuple(chave)] = valores.get(tuple(chave), 0) + v
+        return self.cabecalho() + [f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(v)}" for chave, v in valores.items()]
+
+class Histograma(_Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nome, descricao, rotulos=(), buckets=BUCKETS_PADRAO):
+        super().__init__(nome, descricao, rotulos)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}
+
+    def observar(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = {"contagens": [0] * len(self.buckets), "soma": 0.0, "total": 0}
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie["contagens"][i] += 1
+                    break
+            serie["soma"] += valor
+            serie["total"] += 1
+
+    @contextmanager
+    def cronometrar(self, **rotulos):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def estado(self):
+        with self._lock:
+            return [[list(chave), list(s["contagens"]), s["soma"], s["total"]] for chave, s in self._series.items()]
+
+    def exportar(self, estados=None):
+        linhas = self.cabecalho()
+        if estados is None:
+            with self._lock:
+                series = {chave: (list(s["contagens"]), s["soma"], s["total"]) for chave, s in self._series.items()}
+        else:
+            series = {}
+            for _, estado in estados:
+                for chave, contagens, soma, total in estado:
+                    chave = tuple(chave)
+                    anterior = series.get(chave)
+                    if anterior is not None:
+                        contagens = [a + b for a, b in zip(anterior[0], contagens)]
+                        soma, total = anterior[1] + soma, anterior[2] + total
+                    series[chave] = (contagens, soma, total)
+        for chave, (contagens, soma, total) in series.items():
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, contagens):
+                acumulado += contagem
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, ('le', _formatar_numero(limite)))} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(soma)}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(self.rotulos, chave)} {total}")
+        return linhas
+
+class MetricaCalculada(_Metrica):
+    """Valor lido sob demanda na exportação: `funcao()` devolve um número ou um dict {tupla de rótulos: número}."""
+
+    def __init__(self, nome, descricao, funcao, tipo='gauge', rotulos=()):
+        super().__init__(nome, descricao, rotulos)
+        self.tipo, self.funcao = tipo, funcao
+
+    def _valores(self):
+        valores = self.funcao()
+        return valores if isinstance(valores, dict) else {(): valores}
+
+    def estado(self):
+        return [[list(chave), v] for chave, v in self._valores().items()]
+
+    def exportar(self, estados=None):
+        if estados is None:
+            return self.cabecalho() + [f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(v)}" for chave, v in self._valores().items()]
+        linhas = self.cabecalho()
+        for pid, estado in estados:
+            if not _processo_vivo(pid): continue
+            for chave, v in estado:
+                linhas.append(f"{self.nome}{_formatar_rotulos(self.rotulos, chave, ('processo', pid))} {_formatar_numero(v)}")
+        return linhas
+
+def _processo_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def gravar_estado():
+    """Grava o estado das métricas deste processo em METRICAS_DIR (troca atômica do arquivo)."""
+    if not METRICAS_DIR: return
+    metricas = {}
+    for metrica in list(_metricas):
+        try:
+            metricas[metrica.nome] = metrica.estado()
+        except Exception as e:
+            print(f"Erro ao ler a métrica {metrica.nome}: {e}")
+    caminho = os.path.join(METRICAS_DIR, f"{os.getpid()}.json")
+    with open(caminho + '.tmp', 'w') as arquivo:
+        json.dump({"pid": os.getpid(), "metricas": metricas}, arquivo)
+    os.replace(caminho + '.tmp', caminho)
+
+def _ler_estados():
+    """{nome da métrica: [(pid, estado), ...]} com os arquivos de todos os processos em METRICAS_DIR."""
+    estados = {}
+    for nome in sorted(os.listdir(METRICAS_DIR)):
+        if not nome.endswith('.json'): continue
+        try:
+            with open(os.path.join(METRICAS_DIR, nome)) as arquivo:
+                conteudo = json.load(arquivo)
+        except (OSError, ValueError):
+            continue
+        for metrica, estado in conteudo["metricas"].items():
+            estados.setdefault(metrica, []).append((conteudo["pid"], estado))
+    return estados
+
+def iniciar_gravacao_periodica():
+    """Com METRICAS_DIR, grava o estado deste processo a cada METRICAS_INTERVALO segundos (thread daemon)."""
+    if not METRICAS_DIR: return
+    os.makedirs(METRICAS_DIR, exist_ok=True)
+
+    def gravar():
+        while True:
+            try:
+                gravar_estado()
+            except Exception as e:
+                print(f"Erro ao gravar as métricas em {METRICAS_DIR}: {e}")
+            time.sleep(METRICAS_INTERVALO)
+
+    threading.Thread(target=gravar, daemon=True, name='metricas').start()
+
+def exportar_prometheus():
+    estados = None
+    if METRICAS_DIR:
+        # O estado deste processo sai atualizado; o dos outros, com até METRICAS_INTERVALO segundos de atraso.
+        gravar_estado()
+        estados = _ler_estados()
+    linhas = []
+    for metrica in list(_metricas):
+        try:
+            linhas.extend(metrica.exportar() if estados is None else metrica.exportar(estados.get(metrica.nome, [])))
+        except Exception as e:
+            print(f"Erro ao exportar a métrica {metrica.nome}: {e}")
+    return '\n'.join(linhas) + '\n'
+
+# Métricas compartilhadas entre a busca, os coletores e a indexação.
+BUSCA_ETAPA_SEGUNDOS = Histograma(
+    'iurisadv_busca_etapa_segundos', 'Duração de cada etapa da busca (construcao, es_took, es_rede, renderizacao).', ('etapa',)
+)
+BUSCAS_TOTAL = Contador('iurisadv_buscas_total', 'Buscas atendidas, por origem do resultado (cache ou elasticsearch).', ('origem',))
+COLETA_ETAPA_SEGUNDOS = Histograma(
+    'iurisadv_coleta_etapa_segundos', 'Duração das etapas dos coletores (fetch, parse) por fonte.', ('fonte', 'etapa')
+)
+SUGESTOES_SEGUNDOS = Histograma(
+    'iurisadv_sugestoes_segundos', 'Latência do autocompletar, por origem da resposta (cache ou elasticsearch).', ('origem',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5)
+)
+INDEXACAO_LOTE_SEGUNDOS = Histograma(
+    'iurisadv_indexacao_lote_segundos', 'Latência de cada requisição _bulk, por origem da carga.', ('rotulo',)
+)
+INDEXACAO_DOCUMENTOS_TOTAL = Contador(
+    'iurisadv_indexacao_documentos_total', 'Documentos enviados ao _bulk, por origem da carga e resultado.', ('rotulo', 'resultado')
+)
+_ultima_vazao = {}
+INDEXACAO_DOCS_POR_SEGUNDO = MetricaCalculada(
+    'iurisadv_indexacao_docs_por_segundo', 'Vazão (docs/s) da última carga de cada origem.',
+    lambda: dict(_ultima_vazao), rotulos=('rotulo',)
+)
+
+def registrar_vazao(rotulo, docs_por_segundo):
+    _ultima_vazao[(rotulo,)] = docs_por_segundo
+
+def memoria_residente():
+    """RSS atual do processo em bytes (/proc/self/statm); sem /proc, o pico informado por getrusage."""
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss vem em KB no Linux e em bytes no macOS.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+PROCESSO_MEMORIA_RESIDENTE = MetricaCalculada(
+    'iurisadv_processo_memoria_residente_bytes', 'Memória residente (RSS) deste processo.', memoria_residente
+)
@@ -0,0 +1,64 @@
+# paginacao.py - Paginação por cursor (point-in-time + search_after)
+#
+# from+size fica mais caro a cada página e o Elasticsearch recusa passar de index.max_result_window.
+# Com search_after cada página custa o mesmo que a segunda: o cursor carrega os valores de ordenação
+# do último (ou primeiro, para voltar) resultado e o id do point-in-time, que mantém a visão do índice
+# estável enquanto novos documentos são indexados.
+
+import os
+import json
+import base64
+
+PIT_KEEP_ALIVE = os.environ.get('PIT_KEEP_ALIVE', '5m')
+# Padrão do Elasticsearch para index.max_result_window: além disso from+size falha.
+MAX_RESULT_WINDOW = int(os.environ.get('MAX_RESULT_WINDOW', 10000))
+# Desempate estável para search_after.
+TIEBREAKER = {"id": "asc"}
+
+def codificar_cursor(dados):
+    texto = json.dumps(dados, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor):
+    """Devolve o dicionário do cursor, ou None se ele for inválido."""
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(dados, dict) or not isinstance(dados.get('valores'), list): return None
+    return dados
+
+def ordenacao_com_desempate(sort_query):
+    """A ordenação pedida (ou relevância) seguida do desempate por id, para que search_after seja determinístico."""
+    return list(sort_query or [{"_score": {"order": "desc"}}]) + [TIEBREAKER]
+
+def inverter_ordenacao(ordenacao):
+    """Ordenação invertida, usada para buscar a página anterior com search_after."""
+    invertida = []
+    for criterio in ordenacao:
+        campo, opcoes = next(iter(criterio.items()))
+        if isinstance(opcoes, str): opcoes = {"order": opcoes}
+        opcoes = dict(opcoes)
+        opcoes["order"] = "asc" if opcoes.get("order", "asc") == "desc" else "desc"
+        if "missing" in opcoes:
+            opcoes["missing"] = "_first" if opcoes["missing"] == "_last" else "_last"
+        invertida.append({campo: opcoes})
+    return invertida
+
+def cursores_da_pagina(hits, pit_id, pagina, tamanho, ha_proxima=None):
+    """
+    Cursores para a próxima página e para a anterior, a partir dos valores de ordenação dos hits.
+    `ha_proxima` vem do hit a mais pedido além da página; sem ele, uma página cheia indica que pode haver outra.
+    O total não decide: limitado por track_total_hits (10.000, "gte") ou ausente, pararia a navegação ali.
+    """
+    if ha_proxima is None: ha_proxima = len(hits) == tamanho
+    proximo = anterior = None
+    if hits and ha_proxima:
+        proximo = codificar_cursor({"pit": pit_id, "valores": hits[-1]['sort'], "direcao": "proxima", "pagina": pagina + 1})
+    if hits and pagina > 1:
+        anterior = codificar_cursor({"pit": pit_id, "valores": hits[0]['sort'], "direcao": "anterior", "pagina": pagina - 1})
+    return proximo, anterior
+
+def ultima_pagina_numerada(tamanho):
+    """Última página acessível por from+size; além dela só se navega por cursor."""
+    return max(1, MAX_RESULT_WINDOW // tamanho)
@@ -0,0 +1,127 @@
+# registro_coleta.py - Registro persistente (SQLite) do que já foi coletado e indexado
+#
+# Guarda, por documento, o hash do conteúdo e a última vez em que foi coletado, e, por consulta,
+# uma marca d'água (o ano mais recente já coletado). Documentos cujo hash não mudou não são reenviados ao Elasticsearch.
+# Cada entrada vale só para o índice físico em que foi gravada (identificado pelo UUID, indices.identificador_do_indice):
+# depois de uma reconstrução (reconstruir_indice) ou de o índice ser apagado e recriado, nada é considerado já indexado.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+REGISTRO_COLETA_PATH = os.environ.get('REGISTRO_COLETA_PATH', os.path.join('data', 'registro_coleta.sqlite3'))
+
+def hash_documento(doc):
+    conteudo = json.dumps(doc, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+def chave_consulta(fonte, termo_de_busca):
+    return f"{fonte}:{' '.join(termo_de_busca.lower().split())}"
+
+class RegistroColeta:
+    def __init__(self, caminho=REGISTRO_COLETA_PATH):
+        diretorio = os.path.dirname(caminho)
+        if diretorio: os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS documentos (id TEXT PRIMARY KEY, hash TEXT NOT NULL, ultima_coleta REAL NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS marcas (consulta TEXT PRIMARY KEY, marca TEXT NOT NULL, atualizado REAL NOT NULL)")
+            # Registros criados antes da coluna `indice`: as entradas antigas (indice NULL) não valem para nenhum índice.
+            for tabela in ('documentos', 'marcas'):
+                colunas = {linha[1] for linha in self._conn.execute(f"PRAGMA table_info({tabela})")}
+                if 'indice' not in colunas: self._conn.execute(f"ALTER TABLE {tabela} ADD COLUMN indice TEXT")
+
+    def _hashes(self, ids, indice):
+        with self._lock:
+            linhas = self._conn.execute(
+                f"SELECT id, hash FROM documentos WHERE indice = ? AND id IN ({','.join('?' * len(ids))})", [indice, *ids]
+            ).fetchall()
+        return dict(linhas)
+
+    def sessao(self, indice, forcar=False):
+        """
+        Abre uma passagem de filtragem para o índice físico `indice`: filtrar_alterados e, após a indexação, confirmar.
+        Com `forcar`, todos os documentos são reenviados (os hashes continuam sendo gravados).
+        """
+        return SessaoRegistro(self, indice, forcar)
+
+    def marca(self, consulta, indice):
+        with self._lock:
+            linha = self._conn.execute("SELECT marca FROM marcas WHERE consulta = ? AND indice = ?", (consulta, indice)).fetchone()
+        return linha[0] if linha else None
+
+    def atualizar_marca(self, consulta, marca, indice):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO marcas (consulta, marca, atualizado, indice) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(consulta) DO UPDATE SET marca = excluded.marca, atualizado = excluded.atualizado, indice = excluded.indice",
+                (consulta, str(marca), time.time(), indice)
+            )
+
+    def fechar(self):
+        with self._lock:
+            self._conn.close()
+
+class SessaoRegistro:
+    """Estado de uma passagem de filtrar_alterados: o que foi pulado e o que aguarda confirmação."""
+
+    def __init__(self, registro, indice, forcar=False):
+        self.registro = registro
+        self.indice = indice
+        self.forcar = forcar
+        self.pendentes = {}
+        self.inalterados = []
+
+    def filtrar_alterados(self, documentos, tamanho_lote=500):
+        """
+        Gera apenas os documentos novos ou cujo conteúdo mudou desde a última coleta.
+        Os hashes dos documentos gerados ficam pendentes até `confirmar` ser chamado após a indexação.
+        """
+        lote = []
+        for doc in documentos:
+            lote.append(doc)
+            if len(lote) >= tamanho_lote:
+                yield from self._filtrar(lote)
+                lote = []
+        if lote:
+            yield from self._filtrar(lote)
+
+    def _filtrar(self, lote):
+        hashes = {doc['id']: hash_documento(doc) for doc in lote}
+        conhecidos = {} if self.forcar else self.registro._hashes(list(hashes), self.indice)
+        for doc in lote:
+            if conhecidos.get(doc['id']) == hashes[doc['id']]:
+                self.inalterados.append(doc['id'])
+                continue
+            self.pendentes[doc['id']] = hashes[doc['id']]
+            yield doc
+
+    def confirmar(self, ids_com_erro=()):
+        """Grava os hashes dos documentos indexados com sucesso e a data de coleta dos inalterados."""
+        agora = time.time()
+        ids_com_erro = set(ids_com_erro)
+        gravar = [(doc_id, h, agora, self.indice) for doc_id, h in self.pendentes.items() if doc_id not in ids_com_erro]
+        conn = self.registro._conn
+        with self.registro._lock, conn:
+            conn.executemany(
+                "INSERT INTO documentos (id, hash, ultima_coleta, indice) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET hash = excluded.hash, ultima_coleta = excluded.ultima_coleta, indice = excluded.indice", gravar
+            )
+            conn.executemany("UPDATE documentos SET ultima_coleta = ? WHERE id = ?", [(agora, i) for i in self.inalterados])
+        return len(gravar)
+
+_registro = None
+_registro_lock = threading.Lock()
+
+def registro_padrao():
+    """Registro compartilhado pelo processo, aberto no primeiro uso."""
+    global _registro
+    with _registro_lock:
+        if _registro is None:
+            _registro = RegistroColeta()
+        return _registro
@@ -0,0 +1,62 @@
+# resultados.py - O que a busca traz de cada documento: _source enxuto, trechos destacados e limite da contagem
+#
+# A página de resultados só mostra metadados e trechos. Pedir ao Elasticsearch apenas esses campos, e trechos de
+# ementa/texto_decisao em vez dos textos inteiros, faz o tamanho da resposta depender do tamanho da página, não
+# do tamanho dos documentos. A contagem exata dos hits também é opcional (track_total_hits).
+
+import os
+from markupsafe import escape
+
+# Campos devolvidos no _source de cada hit; os textos longos só chegam como trechos.
+CAMPOS_RESULTADO = (
+    "id", "titulo", "link", "tipo_documento", "fonte", "autoridade", "classe", "orgaoJulgador", "ramoDireito",
+    "numeroUnico", "assuntos", "data_julgamento", "data_julgamento_texto", "ano_julgamento", "outras_fontes"
+)
+CAMPOS_EXCLUIDOS = ("ementa", "texto_decisao")
+TRECHO_TAMANHO = int(os.environ.get('TRECHO_TAMANHO', 200))
+TRECHOS_POR_CAMPO = int(os.environ.get('TRECHOS_POR_CAMPO', 2))
+# Sem termo que combine (ou sem consulta), a ementa aparece pelo começo, com este tamanho.
+EMENTA_RESUMO_TAMANHO = int(os.environ.get('EMENTA_RESUMO_TAMANHO', 400))
+# Até quantos hits a contagem é exata (o padrão do Elasticsearch é 10000); acima disso o total é "pelo menos N".
+BUSCA_TOTAL_EXATO_ATE = int(os.environ.get('BUSCA_TOTAL_EXATO_ATE', 10000))
+
+def fonte_resultados():
+    return {"includes": list(CAMPOS_RESULTADO), "excludes": list(CAMPOS_EXCLUIDOS)}
+
+def destaques():
+    """Trechos de ementa e texto_decisao com os termos da busca em <em>; o texto original é escapado (encoder html)."""
+    return {
+        "encoder": "html", "pre_tags": ["<em>"], "post_tags": ["</em>"],
+        "fields": {
+            "ementa": {"fragment_size": TRECHO_TAMANHO, "number_of_fragments": TRECHOS_POR_CAMPO, "no_match_size": EMENTA_RESUMO_TAMANHO},
+            "texto_decisao": {"fragment_size": TRECHO_TAMANHO, "number_of_fragments": TRECHOS_POR_CAMPO}
+        }
+    }
+
+def limite_da_contagem(valor):
+    """track_total_hits a partir do parâmetro da URL: 'true', 'false' ou um número; vazio usa BUSCA_TOTAL_EXATO_ATE."""
+    if valor is None or str(valor).strip() == '': return BUSCA_TOTAL_EXATO_ATE
+    valor = str(valor).strip().lower()
+    if valor in ('true', 'sim'): return True
+    if valor in ('false', 'nao', 'não'): return False
+    return max(int(valor), 0) if valor.isdigit() else BUSCA_TOTAL_EXATO_ATE
+
+def resultado_do_hit(hit):
+    """O _source do hit com 'id' e os trechos destacados em 'trechos' ({campo: [fragmentos]})."""
+    resultado = dict(hit.get('_source', {}))
+    resultado.setdefault('id', hit.get('_id'))
+    resultado['trechos'] = hit.get('highlight', {})
+    return resultado
+
+def total_dos_hits(hits):
+    """(total, exato). Com track_total_hits=false o Elasticsearch não devolve o total: (None, False), desconhecido."""
+    total = hits.get('total')
+    if total is None: return None, False
+    return total['value'], total.get('relation', 'eq') == 'eq'
+
+def resumo_do_documento(documento):
+    """Um documento completo (ex.: vindo de um coletor) no mesmo formato de resultado_do_hit, com o começo da ementa como trecho."""
+    resultado = {campo: documento[campo] for campo in CAMPOS_RESULTADO if campo in documento}
+    ementa = documento.get('ementa') or ''
+    resultado['trechos'] = {"ementa": [str(escape(ementa[:EMENTA_RESUMO_TAMANHO]))]} if ementa else {}
+    return resultado
@@ -0,0 +1,76 @@
+# sugestoes.py - Autocompletar da caixa de busca (subcampos search_as_you_type + cache de prefixos)
+#
+# Uma única consulta com size 0 traz os títulos (top_hits) e os valores mais frequentes de classe, assuntos e
+# autoridade que começam com o que foi digitado. Respostas com size 0 entram no request cache de cada shard,
+# e o resultado por prefixo fica no cache do processo, então as teclas repetidas não chegam ao Elasticsearch.
+
+import os
+import unicodedata
+
+SUGESTOES_TAMANHO = int(os.environ.get('SUGESTOES_TAMANHO', 5))
+SUGESTOES_PREFIXO_MINIMO = int(os.environ.get('SUGESTOES_PREFIXO_MINIMO', 2))
+# Prazo da consulta ao Elasticsearch: acima disso o autocompletar desiste e devolve uma lista vazia.
+SUGESTOES_TIMEOUT = float(os.environ.get('SUGESTOES_TIMEOUT', 0.5))
+
+# (campo com o subcampo .sugestao, campo usado para agregar os valores; None = título, devolvido via top_hits)
+CAMPOS_SUGESTAO = (
+    ("titulo", None),
+    ("classe", "classe"),
+    ("assuntos", "assuntos.keyword"),
+    ("autoridade", "autoridade.keyword"),
+)
+
+def normalizar_prefixo(texto):
+    return ' '.join((texto or '').lower().split())[:100]
+
+def _dobrar(texto):
+    """Minúsculas e sem acentos, como o analisador sugestao_pt."""
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto.lower()) if not unicodedata.combining(c))
+
+def _combina(texto, prefixo):
+    """True se cada palavra do prefixo inicia alguma palavra do texto."""
+    palavras = _dobrar(texto).split()
+    return all(any(p.startswith(termo) for p in palavras) for termo in _dobrar(prefixo).split())
+
+def _prefixo(campo, prefixo):
+    sugestao = f"{campo}.sugestao"
+    return {"multi_match": {
+        "query": prefixo, "type": "bool_prefix", "operator": "and",
+        "fields": [sugestao, f"{sugestao}._2gram", f"{sugestao}._3gram"]
+    }}
+
+def consulta_sugestoes(prefixo, search_type, tamanho=None):
+    tamanho = tamanho or SUGESTOES_TAMANHO
+    aggs = {}
+    # Campos com vários valores (assuntos) trazem também os valores vizinhos do documento; a folga no tamanho
+    # compensa os que ler_sugestoes descarta por não começarem com o prefixo.
+    for campo, agregado in CAMPOS_SUGESTAO:
+        interna = ({"top_hits": {"size": tamanho, "_source": ["titulo"]}} if agregado is None
+                   else {"terms": {"field": agregado, "size": tamanho * 4}})
+        aggs[campo] = {"filter": _prefixo(campo, prefixo), "aggs": {"valores": interna}}
+    return {
+        "size": 0, "track_total_hits": False,
+        "query": {"bool": {
+            "filter": [{"term": {"tipo_documento.keyword": search_type}}],
+            "should": [_prefixo(campo, prefixo) for campo, _ in CAMPOS_SUGESTAO], "minimum_should_match": 1
+        }},
+        "aggs": aggs
+    }
+
+def ler_sugestoes(res, prefixo=None, tamanho=None):
+    """[{'texto', 'campo', 'contagem'}], sem repetições, na ordem título, classe, assuntos, autoridade."""
+    tamanho = tamanho or SUGESTOES_TAMANHO
+    sugestoes, vistos = [], set()
+    aggs = res.get('aggregations', {})
+    for campo, agregado in CAMPOS_SUGESTAO:
+        valores = aggs.get(campo, {}).get('valores', {})
+        if agregado is None:
+            itens = [(hit['_source'].get('titulo'), None) for hit in valores.get('hits', {}).get('hits', [])]
+        else:
+            itens = [(balde['key'], balde['doc_count']) for balde in valores.get('buckets', [])
+                     if not prefixo or _combina(balde['key'], prefixo)][:tamanho]
+        for texto, contagem in itens:
+            if not texto or texto.lower() in vistos: continue
+            vistos.add(texto.lower())
+            sugestoes.append({"texto": texto, "campo": campo, "contagem": contagem})
+    return sugestoes
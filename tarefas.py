@@ -0,0 +1,203 @@
+# tarefas.py - Fila de tarefas em segundo plano (coleta e importação) persistida em SQLite
+#
+# As rotas de importação enfileiram uma tarefa e respondem na hora com o id dela; um pool de threads
+# executa as tarefas e grava o progresso, consultável pela rota de status. Tarefas idênticas
+# (mesmo tipo e parâmetros) ainda pendentes ou em execução são unificadas numa só.
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+import traceback
+
+TAREFAS_PATH = os.environ.get('TAREFAS_PATH', os.path.join('data', 'tarefas.sqlite3'))
+TAREFAS_WORKERS = int(os.environ.get('TAREFAS_WORKERS', 2))
+# Uma tarefa "executando" sem atualização há mais tempo que isso é considerada abandonada (processo caiu) e volta para a fila.
+TAREFAS_TIMEOUT = float(os.environ.get('TAREFAS_TIMEOUT', 3600))
+# Ao encerrar o processo, quanto esperar as tarefas em execução antes de devolvê-las à fila.
+TAREFAS_ESPERA_ENCERRAR = float(os.environ.get('TAREFAS_ESPERA_ENCERRAR', 10))
+
+PENDENTE, EXECUTANDO, CONCLUIDA, ERRO = 'pendente', 'executando', 'concluida', 'erro'
+
+def chave_tarefa(tipo, parametros):
+    return f"{tipo}:{json.dumps(parametros, sort_keys=True, ensure_ascii=False)}"
+
+class FilaTarefas:
+    def __init__(self, caminho=TAREFAS_PATH, workers=TAREFAS_WORKERS):
+        diretorio = os.path.dirname(caminho)
+        if diretorio: os.makedirs(diretorio, exist_ok=True)
+        self.workers = workers
+        self.handlers = {}
+        self._lock = threading.Lock()
+        self._nova_tarefa = threading.Event()
+        self._encerrando = threading.Event()
+        self._threads = []
+        self._em_execucao = 0
+        self._processo = f"{socket.gethostname()}:{os.getpid()}"
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, timeout=30, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tarefas (id TEXT PRIMARY KEY, tipo TEXT NOT NULL, chave TEXT NOT NULL, "
+                "parametros TEXT NOT NULL, estado TEXT NOT NULL, progresso TEXT NOT NULL DEFAULT '{}', erro TEXT, "
+                "processo TEXT, criada REAL NOT NULL, iniciada REAL, atualizada REAL, finalizada REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tarefas_estado ON tarefas (estado, criada)")
+
+    def registrar(self, tipo, handler):
+        """`handler(parametros, atualizar)` executa a tarefa; `atualizar(**campos)` grava o progresso."""
+        self.handlers[tipo] = handler
+
+    def iniciar(self):
+        with self._lock:
+            if self._threads: return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._executar, name=f"tarefas-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def enfileirar(self, tipo, parametros):
+        """Enfileira a tarefa e devolve seu id, ou o id de uma tarefa idêntica ainda pendente/em execução."""
+        chave = chave_tarefa(tipo, parametros)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                existente = self._conn.execute(
+                    "SELECT id FROM tarefas WHERE chave = ? AND estado IN (?, ?)", (chave, PENDENTE, EXECUTANDO)
+                ).fetchone()
+                if existente:
+                    self._conn.execute("COMMIT")
+                    return existente[0]
+                tarefa_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO tarefas (id, tipo, chave, parametros, estado, criada) VALUES (?, ?, ?, ?, ?, ?)",
+                    (tarefa_id, tipo, chave, json.dumps(parametros, ensure_ascii=False), PENDENTE, time.time())
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.iniciar()
+        self._nova_tarefa.set()
+        return tarefa_id
+
+    def status(self, tarefa_id):
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT id, tipo, estado, erro, criada, iniciada, finalizada, parametros, progresso FROM tarefas WHERE id = ?",
+                (tarefa_id,)
+            ).fetchone()
+        if linha is None: return None
+        status = dict(zip(('id', 'tipo', 'estado', 'erro', 'criada', 'iniciada', 'finalizada'), linha[:7]))
+        status['parametros'] = json.loads(linha[7])
+        status['progresso'] = json.loads(linha[8])
+        return status
+
+    def _reservar(self):
+        """Reserva atomicamente a tarefa pendente mais antiga (ou uma abandonada) para este processo."""
+        agora = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                linha = self._conn.execute(
+                    "SELECT id, tipo, parametros FROM tarefas WHERE estado = ? OR (estado = ? AND atualizada < ?) "
+                    "ORDER BY criada LIMIT 1", (PENDENTE, EXECUTANDO, agora - TAREFAS_TIMEOUT)
+                ).fetchone()
+                if linha:
+                    self._conn.execute(
+                        "UPDATE tarefas SET estado = ?, processo = ?, iniciada = ?, atualizada = ? WHERE id = ?",
+                        (EXECUTANDO, self._processo, agora, agora, linha[0])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return linha
+
+    def _atualizar(self, tarefa_id, progresso, **campos):
+        # Só enquanto a tarefa é deste processo: devolvida à fila (encerrar) ou retomada por outro processo após
+        # TAREFAS_TIMEOUT, uma thread atrasada não sobrescreve mais o estado.
+        campos['progresso'] = json.dumps(progresso, ensure_ascii=False, default=str)
+        campos['atualizada'] = time.time()
+        atribuicoes = ', '.join(f"{k} = ?" for k in campos)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE tarefas SET {atribuicoes} WHERE id = ? AND processo = ?", (*campos.values(), tarefa_id, self._processo)
+            )
+
+    def encerrar(self, espera=TAREFAS_ESPERA_ENCERRAR):
+        """
+        Para de reservar tarefas e espera até `espera` segundos pelas que estão em execução. As que não terminarem
+        voltam para a fila como pendentes, para outro processo retomá-las, em vez de ficarem "executando" até
+        TAREFAS_TIMEOUT. Devolve quantas foram devolvidas.
+        """
+        self._encerrando.set()
+        self._nova_tarefa.set()
+        limite = time.monotonic() + espera
+        while self._em_execucao and time.monotonic() < limite:
+            time.sleep(0.1)
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE tarefas SET estado = ?, processo = NULL, atualizada = ? WHERE estado = ? AND processo = ?",
+                (PENDENTE, time.time(), EXECUTANDO, self._processo)
+            )
+        if cursor.rowcount: print(f"{cursor.rowcount} tarefa(s) em execução devolvida(s) à fila.")
+        return cursor.rowcount
+
+    def _executar(self):
+        while not self._encerrando.is_set():
+            try:
+                linha = self._reservar()
+            except Exception as e:
+                print(f"Erro ao buscar tarefa na fila: {e}")
+                linha = None
+            if linha is None:
+                self._nova_tarefa.wait(timeout=2)
+                self._nova_tarefa.clear()
+                continue
+            if self._encerrando.is_set():
+                # Reservou no meio do encerramento: devolve a tarefa à fila sem executá-la.
+                self._atualizar(linha[0], {}, estado=PENDENTE, processo=None)
+                break
+            tarefa_id, tipo, parametros = linha
+            progresso = {}
+
+            def atualizar(**campos):
+                progresso.update(campos)
+                self._atualizar(tarefa_id, progresso)
+
+            print(f"Tarefa {tarefa_id} ({tipo}) iniciada.")
+            with self._lock:
+                self._em_execucao += 1
+            try:
+                resultado = self.handlers[tipo](json.loads(parametros), atualizar)
+                if resultado: progresso.update(resultado)
+                self._atualizar(tarefa_id, progresso, estado=CONCLUIDA, finalizada=time.time())
+                print(f"Tarefa {tarefa_id} ({tipo}) concluída.")
+            except Exception as e:
+                print(f"Erro na tarefa {tarefa_id} ({tipo}): {e}")
+                traceback.print_exc()
+                self._atualizar(tarefa_id, progresso, estado=ERRO, erro=str(e), finalizada=time.time())
+            finally:
+                with self._lock:
+                    self._em_execucao -= 1
+
+_fila = None
+_fila_lock = threading.Lock()
+
+def fila_padrao():
+    """Fila compartilhada pelo processo, criada no primeiro uso."""
+    global _fila
+    with _fila_lock:
+        if _fila is None:
+            _fila = FilaTarefas()
+        return _fila
+
+def encerrar_fila_padrao():
+    """Encerra a fila do processo, se ela chegou a ser criada (chamado na saída de cada worker do gunicorn)."""
+    with _fila_lock:
+        fila = _fila
+    if fila is not None: fila.encerrar()
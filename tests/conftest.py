@@ -0,0 +1,8 @@
+# tests/conftest.py - Configuração comum: sem cache de busca e sem gravar páginas, antes de importar a aplicação.
+
+import os
+import sys
+
+os.environ.setdefault('CACHE_BUSCA_TTL', '0')
+os.environ.setdefault('PAGINAS_ARMAZENAR', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
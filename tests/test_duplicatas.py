@@ -0,0 +1,64 @@
+# tests/test_duplicatas.py - Agrupamento de quase-duplicatas na ingestão (duplicatas.AgrupadorDuplicatas)
+
+import random
+
+from duplicatas import AgrupadorDuplicatas
+
+CNJ = '0001234-56.2020.8.24.0023'
+
+def _ementa(semente, palavras=60):
+    rng = random.Random(semente)
+    return ' '.join(f"termo{rng.randrange(100_000)}" for _ in range(palavras))
+
+def _documento(doc_id, ementa, fonte='tjsc', **campos):
+    return dict({"id": doc_id, "tipo_documento": "jurisprudencia", "fonte": fonte, "link": f"https://{fonte}/{doc_id}",
+                 "ementa": ementa}, **campos)
+
+def _agrupar(documentos, **opcoes):
+    agrupador = AgrupadorDuplicatas(**opcoes)
+    return {d['id']: d for d in agrupador.agrupar(documentos)}, agrupador
+
+def test_decisoes_do_mesmo_processo_ficam_separadas():
+    acordao = _documento('tjsc-1', _ementa(1), numeroUnico=CNJ, data_julgamento='2021-03-10')
+    embargos = _documento('tjsc-2', _ementa(2), numeroUnico=CNJ, data_julgamento='2021-08-02')
+    agravo = _documento('tjsc-3', _ementa(3), numeroUnico=CNJ, data_julgamento=None)
+    emitidos, agrupador = _agrupar([acordao, embargos, agravo])
+    assert set(emitidos) == {'tjsc-1', 'tjsc-2', 'tjsc-3'}
+    assert not any(d.get('outras_fontes') for d in emitidos.values())
+    assert agrupador.relatorio["duplicatas_processo"] == 0
+
+def test_copia_de_outra_fonte_do_mesmo_processo_e_juntada():
+    original = _documento('tjsc-1', _ementa(1), numeroUnico=CNJ, data_julgamento='2021-03-10', texto_decisao='...')
+    # A mesma decisão no LexML: outro id, data em outro formato e ementa curta demais para o MinHash.
+    copia = _documento('lexml-9', 'Apelação cível. Recurso provido.', fonte='lexml', titulo=f"Acórdão {CNJ}",
+                       data_julgamento='10/03/2021')
+    emitidos, agrupador = _agrupar([copia, original])
+    assert list(emitidos) == ['tjsc-1']
+    assert emitidos['tjsc-1']['outras_fontes'] == [{"id": 'lexml-9', "fonte": 'lexml', "link": 'https://lexml/lexml-9'}]
+    assert agrupador.relatorio["duplicatas_processo"] == 1
+
+def test_ementas_quase_iguais_sao_agrupadas_pelo_minhash():
+    ementa = _ementa(10)
+    palavras = ementa.split()
+    palavras[-1] = 'alterada'  # uma palavra trocada: Jaccard dos shingles ~0,95
+    base = _documento('a', ementa, texto_decisao='integral')
+    republicada = _documento('b', ' '.join(palavras), fonte='lexml')
+    outra = _documento('c', _ementa(11))
+    emitidos, agrupador = _agrupar([republicada, outra, base])
+    assert set(emitidos) == {'a', 'c'}
+    assert [v['id'] for v in emitidos['a']['outras_fontes']] == ['b']
+    assert agrupador.relatorio == {"documentos": 3, "canonicos": 2, "duplicatas_processo": 0, "duplicatas_ementa": 1}
+
+def test_vinculos_tardios_e_limite_de_canonicos():
+    # Um documento por lote: a duplicata chega depois de o canônico já ter sido emitido.
+    documentos = [_documento(f"d{n}", _ementa(100 + n)) for n in range(3)]
+    copia_de_d2 = _documento('copia-d2', documentos[2]['ementa'], fonte='lexml')
+    copia_de_d0 = _documento('copia-d0', documentos[0]['ementa'], fonte='lexml')
+    emitidos, agrupador = _agrupar(documentos + [copia_de_d2, copia_de_d0], tamanho_lote=1, max_canonicos=2)
+    assert agrupador.vinculos_tardios == {'d2': [{"id": 'copia-d2', "fonte": 'lexml', "link": 'https://lexml/copia-d2'}]}
+    # d0 foi esquecido ao registrar d2: a cópia dele é indexada como um documento novo.
+    assert 'copia-d0' in emitidos and 'copia-d2' not in emitidos
+    assert len(agrupador._tipos) == len(agrupador._assinaturas) == 2
+    assert 'd0' not in agrupador._tipos
+    baldes = [i for balde in agrupador._baldes.values() for i in (balde if isinstance(balde, list) else [balde])]
+    assert 'd0' not in baldes and len(baldes) == 2 * 8
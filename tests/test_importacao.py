@@ -0,0 +1,47 @@
+# tests/test_importacao.py - Recoleta incremental de um coletor do registro: uma marca por termo
+
+import pytest
+
+import app as aplicacao
+from benchmarks.es_local import ClusterLocal
+from coletores.registro import Coletor, DescricaoColetor, registro_coletores
+from registro_coleta import RegistroColeta, chave_consulta
+
+# Termo -> (anos dos documentos coletados, coleta percorreu todos os resultados).
+COLETAS = {'dano moral': ([2019, 2021], True), 'usucapião': ([2018, 2022], False)}
+
+class ColetorTeste(Coletor):
+    def __init__(self):
+        self.chamadas = []
+
+    def coletar(self, termos, relatorio=None, ano_inicial=None, **opcoes):
+        (termo,) = termos
+        self.chamadas.append((termo, ano_inicial))
+        anos, completo = COLETAS[termo]
+        relatorio['completo'] = completo
+        return [{"id": f"{termo}-{ano}", "tipo_documento": "jurisprudencia", "titulo": termo, "ano_julgamento": ano}
+                for ano in anos]
+
+@pytest.fixture
+def registro(tmp_path, monkeypatch):
+    monkeypatch.setattr(aplicacao, 'es', ClusterLocal().cliente())
+    registro = RegistroColeta(str(tmp_path / 'registro.sqlite3'))
+    monkeypatch.setattr(aplicacao, 'registro_padrao', lambda: registro)
+    coletores = registro_coletores()
+    coletores.registrar(DescricaoColetor('teste', 'tests.test_importacao:ColetorTeste', 'Teste', 'jurisprudencia',
+                                         parametros=(('ano_inicial', int), ('completo', bool)), incremental=True))
+    yield registro
+    coletores._descricoes.pop('teste', None)
+    coletores._coletores.pop('teste', None)
+
+def _importar(termos):
+    aplicacao.tarefa_importar_coletor('teste')({"termos": termos}, lambda **campos: None)
+
+def test_marca_e_completo_sao_de_cada_termo(registro):
+    _importar(list(COLETAS))
+    indice = aplicacao.identificador_do_indice(aplicacao.es, aplicacao.INDEX_NAME)
+    assert registro.marca(chave_consulta('teste', 'dano moral'), indice) == '2021'
+    # A coleta de 'usucapião' não chegou ao fim: a marca dele não avança, mesmo com a do outro termo avançando.
+    assert registro.marca(chave_consulta('teste', 'usucapião'), indice) is None
+    _importar(list(COLETAS))
+    assert aplicacao.obter_coletor('teste').chamadas[2:] == [('dano moral', 2021), ('usucapião', None)]
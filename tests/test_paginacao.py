@@ -0,0 +1,79 @@
+# tests/test_paginacao.py - Navegação por cursor (point-in-time + search_after) além da janela de 10.000 resultados
+
+import pytest
+
+import app as aplicacao
+from benchmarks.es_local import ClusterLocal
+from indexacao import indexar_em_lote
+
+# Mais que o track_total_hits padrão (10.000): o total volta como "gte" e não pode decidir onde a navegação para.
+DOCUMENTOS = 10_050
+POR_PAGINA = 100
+
+@pytest.fixture(scope='module')
+def cluster():
+    cluster = ClusterLocal()
+    aplicacao.es = cluster.cliente()
+    aplicacao.create_index_if_not_exists()
+    documentos = ({"id": f"doc-{n:05d}", "tipo_documento": "jurisprudencia", "ano_julgamento": 1990 + n % 30,
+                   "titulo": f"Acórdão {n}", "ementa": f"Recurso de apelação número {n}."} for n in range(DOCUMENTOS))
+    indexar_em_lote(aplicacao.es, documentos, aplicacao.INDEX_NAME)
+    return cluster
+
+@pytest.fixture(autouse=True)
+def cliente_do_cluster(cluster, monkeypatch):
+    monkeypatch.setattr(aplicacao, 'es', cluster.cliente())
+    monkeypatch.setattr(aplicacao, 'RESULTS_PER_PAGE', POR_PAGINA)
+
+def _buscar(cursor=None, limite_contagem=None):
+    return aplicacao.buscar('recurso', 'jurisprudencia', 1, 'date_desc', '', '', False, cursor=cursor, limite_contagem=limite_contagem)
+
+def _percorrer(limite_contagem=None):
+    """Todas as páginas seguindo proximo_cursor a partir da primeira; devolve a lista de resultados de cada uma."""
+    paginas = [_buscar(limite_contagem=limite_contagem)]
+    while paginas[-1]["proximo_cursor"]:
+        paginas.append(_buscar(paginas[-1]["proximo_cursor"], limite_contagem))
+        assert paginas[-1]["pagina"] == len(paginas)
+        assert len(paginas) <= DOCUMENTOS // POR_PAGINA + 1
+    return paginas
+
+def _ids(paginas):
+    return [r["id"] for pagina in paginas for r in pagina["results"]]
+
+def test_cursor_passa_da_janela_de_10000_resultados():
+    paginas = _percorrer()
+    assert paginas[0]["total"] == 10_000 and paginas[0]["total_exato"] is False
+    ids = _ids(paginas)
+    assert len(ids) == DOCUMENTOS and len(set(ids)) == DOCUMENTOS
+    anos = [aplicacao.es.get(index=aplicacao.INDEX_NAME, id=i)['_source']['ano_julgamento'] for i in ids[::POR_PAGINA]]
+    assert anos == sorted(anos, reverse=True)
+    # Voltar da última página dá a penúltima, na mesma ordem.
+    anterior = _buscar(paginas[-1]["cursor_anterior"])
+    assert anterior["pagina"] == len(paginas) - 1
+    assert [r["id"] for r in anterior["results"]] == [r["id"] for r in paginas[-2]["results"]]
+    assert anterior["proximo_cursor"]
+
+def test_cursor_sem_contagem_de_total():
+    paginas = _percorrer(limite_contagem=False)
+    ids = _ids(paginas)
+    assert len(ids) == DOCUMENTOS and len(set(ids)) == DOCUMENTOS
+    assert len(paginas[-1]["results"]) == DOCUMENTOS % POR_PAGINA
+
+def test_pagina_por_cursor_nao_volta_para_o_total_limitado():
+    paginas = _percorrer()
+    # A última página (101) está além das 100 que o total limitado (10.000) permitiria.
+    resposta = aplicacao.app.test_client().get('/', query_string={'q': 'recurso', 'sort': 'date_desc', 'cursor': paginas[-2]["proximo_cursor"]})
+    html = resposta.get_data(as_text=True)
+    assert f'<span class="current">{len(paginas)}</span>' in html and len(paginas) > 10_000 // POR_PAGINA
+    assert 'Próxima' not in html
+
+def test_sem_contagem_o_total_e_desconhecido_e_a_pagina_tem_navegacao():
+    primeira = _buscar(limite_contagem=False)
+    assert primeira["total"] is None and primeira["total_exato"] is False
+    assert primeira["proximo_cursor"]
+    cliente = aplicacao.app.test_client()
+    api = cliente.get('/api/search', query_string={'q': 'recurso', 'track_total_hits': 'false'}).get_json()
+    assert api["total"] is None and api["proximo_cursor"]
+    html = cliente.get('/', query_string={'q': 'recurso', 'track_total_hits': 'false'}).get_data(as_text=True)
+    assert 'total de resultados não contado' in html
+    assert 'class="pagination"' in html and 'Próxima' in html
@@ -0,0 +1,24 @@
+# tests/test_paginas.py - Reprocessamento das páginas armazenadas pelo `extrair` dos coletores registrados
+
+from coletores.paginas import ArmazemPaginas, reprocessar
+from coletores.registro import Coletor, DescricaoColetor, registro_coletores
+
+class ColetorTeste(Coletor):
+    def extrair(self, html, url, contexto):
+        return [{"id": linha, "fonte": contexto['fonte'], "link": url} for linha in html.split()]
+
+def test_reprocessar_usa_o_extrair_do_coletor_registrado(tmp_path):
+    registro = registro_coletores()
+    registro.registrar(DescricaoColetor('teste', 'tests.test_paginas:ColetorTeste', 'Teste', 'jurisprudencia'))
+    try:
+        armazem = ArmazemPaginas(str(tmp_path), compressao='gzip')
+        armazem.guardar('teste', 'https://teste/1', 'a b', {"fonte": "teste"})
+        armazem.guardar('desconhecida', 'https://outra/1', 'c', {})
+        relatorio = {}
+        documentos = list(reprocessar(armazem, workers=1, relatorio=relatorio))
+    finally:
+        registro._descricoes.pop('teste', None)
+        registro._coletores.pop('teste', None)
+    assert [d['id'] for d in documentos] == ['a', 'b']
+    assert relatorio['paginas'] == 2 and relatorio['documentos'] == 2
+    assert [(f['fonte'], f['url']) for f in relatorio['falhas']] == [('desconhecida', 'https://outra/1')]